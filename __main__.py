@@ -1,8 +1,8 @@
 import pandas as pd
-from preprocessing import ParserFactory, MissingValuesStrategyManager, FeatureScalerStrategyManager
+from preprocessing import ParserFactory, ParseCache, MissingValuesStrategyManager
 from models import KNNClassifier
 from validation import Holdout, RandomSubsampling, LeavePOutCV
-from metrics import PerformanceMetricsVisualizer
+from metrics import PerformanceMetricsVisualizer, MetricsCalculator
 
 def map_validation_data(validation_data):
     """
@@ -28,6 +28,30 @@ def map_validation_data(validation_data):
     
     return mapped_validation_data
 
+def parse_k_values(k_input):
+    """
+    Interpreta la scelta di k: un singolo valore ("3"), una lista separata da virgole
+    ("1,3,5") oppure un intervallo ("1-50").
+
+    Args:
+        k_input (str): Il testo inserito dall'utente.
+
+    Returns:
+        int | list[int]: Il valore di k oppure la lista dei valori di k da confrontare.
+    """
+    if not k_input:
+        return 3
+    k_values = []
+    for part in k_input.split(','):
+        if '-' in part:
+            first, last = (int(value) for value in part.split('-', 1))
+            k_values.extend(range(first, last + 1))
+        else:
+            k_values.append(int(part))
+    if not k_values or min(k_values) <= 0:
+        raise ValueError("I valori di k devono essere interi positivi.")
+    return k_values[0] if len(k_values) == 1 else k_values
+
 def main():
     # Step 1: Input dell'utente per il percorso del file
     file_path = input("Inserisci il percorso del file del dataset che vuoi analizzare: ").strip()
@@ -37,8 +61,11 @@ def main():
 
     print("Parsing del dataset in corso...")
     try:
-        parser = ParserFactory.get_parser(file_path)
+        # I parsing successivi dello stesso file, se non modificato, vengono letti dalla cache su disco
+        cache = ParseCache()
+        parser = ParserFactory.get_parser(file_path, cache=cache)
         data = parser.parse(file_path)
+        print(cache.report())
     except Exception as e:
         print(f"Errore durante il parsing del file: {e}. Utilizzando un dataset vuoto per default.")
         data = pd.DataFrame()
@@ -54,10 +81,10 @@ def main():
 
     # Step 2: Scelta dell'utente per la gestione dei valori mancanti
     print("Come vuoi gestire i valori mancanti?")
-    print("Opzioni: remove | mean | median | mode")
+    print("Opzioni: remove | mean | median | mode | knn")
     missing_strategy = input("Inserisci la tua scelta: ").strip().lower()
 
-    if missing_strategy not in ['remove', 'mean', 'median', 'mode']:
+    if missing_strategy not in ['remove', 'mean', 'median', 'mode', 'knn']:
         print("Scelta non valida. Verrà utilizzata la strategia 'median' per default.")
         missing_strategy = 'median'
 
@@ -80,24 +107,18 @@ def main():
         scaling_strategy = 'normalize'
 
     exclude_columns = ['Sample code number', 'classtype_v1']
-    print(f"Applicazione dello scaling delle feature con la strategia: {scaling_strategy}...")
-    try:
-        scaled_data = FeatureScalerStrategyManager.scale_features(strategy=scaling_strategy, data=data, exclude_columns=exclude_columns)
-    except Exception as e:
-        print(f"Errore durante lo scaling delle feature: {e}. Procedo con i dati non scalati.")
-        scaled_data = data
-
-    print("Dati dopo lo scaling delle feature:")
-    print(scaled_data.head())
+    # I parametri dello scaling vengono stimati sul training set di ogni split e applicati al
+    # rispettivo test set, così che le statistiche dei campioni di test non entrino nel modello
+    print(f"Lo scaling delle feature ({scaling_strategy}) verrà addestrato sul training set di ogni split.")
 
         # Separazione delle feature e delle etichette
     labels_column = 'classtype_v1'  # Sostituisci con il nome corretto della colonna delle etichette
-    if labels_column not in scaled_data.columns:
+    if labels_column not in data.columns:
         print(f"La colonna delle etichette '{labels_column}' non è presente nel dataset. Termino l'esecuzione.")
         return
 
-    labels = scaled_data[labels_column]
-    features = scaled_data.drop(columns=exclude_columns, errors='ignore')
+    labels = data[labels_column]
+    features = data.drop(columns=exclude_columns, errors='ignore')
 
     # Step 4: Scelta della strategia di validazione
     print("Scegli la strategia di validazione:")
@@ -112,7 +133,7 @@ def main():
         if choice == '1':  # Holdout
             test_size = input("Inserisci la percentuale di test (default 0.2): ").strip()
             test_size = float(test_size) if test_size else 0.2
-            strategy = Holdout(test_size=test_size)
+            strategy = Holdout(test_size=test_size, scaling=scaling_strategy)
 
         elif choice == '2':  # Random Subsampling
             n_iter = input("Inserisci il numero di iterazioni (default 10): ").strip()
@@ -121,26 +142,26 @@ def main():
             test_size = input("Inserisci la percentuale di test (default 0.2): ").strip()
             test_size = float(test_size) if test_size else 0.2
 
-            strategy = RandomSubsampling(n_iter=n_iter, test_size=test_size)
+            strategy = RandomSubsampling(n_iter=n_iter, test_size=test_size, scaling=scaling_strategy)
 
         elif choice == '3':  # Leave-p-Out Cross Validation
             p = input("Inserisci il numero di campioni da lasciare fuori (default 2): ").strip()
             p = int(p) if p else 2
 
-            strategy = LeavePOutCV(p=p)
+            strategy = LeavePOutCV(p=p, scaling=scaling_strategy)
 
         else:  # Scelta non valida
             print("Scelta non valida. Uso Holdout come default con percentuale di test: 0.2.")
-            strategy = Holdout(test_size=0.2)
+            strategy = Holdout(test_size=0.2, scaling=scaling_strategy)
 
     except ValueError as e:
         print(f"Errore nei parametri di validazione: {e}")
         exit()
 
     # Scelta di k per il KNN
-    k_input = input("Scegli il valore di k per il KNN (default 3): ").strip()
+    k_input = input("Scegli il valore di k per il KNN, una lista (es. 1,3,5) o un intervallo (es. 1-50) (default 3): ").strip()
     try:
-        k = int(k_input) if k_input else 3
+        k = parse_k_values(k_input)
     except ValueError:
         print("Valore di k non valido. Utilizzo k=3 di default.")
         k = 3
@@ -149,6 +170,18 @@ def main():
     print(f"Generazione delle divisioni utilizzando la strategia: {strategy.__class__.__name__}...")
     validation_data = strategy.generate_splits(features, labels, k)
 
+    if isinstance(k, list):
+        # Confronto dei valori di k, ottenuti con una sola ricerca dei vicini per split
+        calculator = MetricsCalculator()
+        sweep = pd.DataFrame({value: calculator.calculate_metrics(map_validation_data(results))
+                              for value, results in validation_data.items()}).T
+        sweep.index.name = "k"
+        print("Metriche per ogni valore di k:")
+        print(sweep)
+        k = int(sweep["Accuracy Rate"].idxmax())
+        print(f"Valore di k con la migliore accuratezza: {k}")
+        validation_data = validation_data[k]
+
     # Mappa i valori 2 -> 0 e 4 -> 1 per le etichette reali e predette per calcolare le metriche
     mapped_validation_data = map_validation_data(validation_data)
 
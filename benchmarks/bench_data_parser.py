@@ -0,0 +1,95 @@
+"""
+Benchmark della lettura di un file CSV seguita dalla conversione numerica.
+
+Confronta la lettura con deduzione dei tipi (il comportamento di default di CsvDataParser)
+con la lettura a schema dichiarato (dtype e na_values, oppure solo dtype), su un CSV di
+200000 righe e 12 colonne numeriche in cui due colonne contengono il segnaposto '?' per i
+valori mancanti. In tutti i casi il DataFrame passa poi da MissingValuesHandler.convert_numeric_columns,
+come in MissingValuesStrategyManager.handle_missing_values. La memoria di picco è misurata
+con tracemalloc.
+
+Risultati indicativi (un core):
+
+                          method  time (s)  peak (MiB)
+                        inferred      0.42          60
+                  schema float64      0.21          60
+                  schema float32      0.20          47
+    schema float32, no na_values      0.33          47
+
+Con la deduzione dei tipi le colonne con '?' restano testuali (oggetti Python) e devono
+essere convertite da pd.to_numeric colonna per colonna; con lo schema il parser nativo le
+legge già come numeri e restano solo le conversioni nel tipo dichiarato, riunite in un
+blocco, quindi la conversione successiva non fa nulla. Con float32 le feature occupano la
+metà della memoria, quindi anche le copie successive (set_index) costano meno. Senza
+`na_values` il file viene comunque letto una sola volta: solo le due colonne con '?'
+passano da pd.to_numeric.
+
+Esecuzione (dalla radice del progetto):
+    python -m benchmarks.bench_data_parser
+"""
+import contextlib
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from preprocessing import ParserFactory, MissingValuesHandler
+
+N_ROWS = 200000
+N_FEATURES = 12
+MISSING_TOKEN_COLUMNS = ['f0', 'f1']
+
+
+def write_dataset(file_path: str) -> None:
+    """
+    Scrive un CSV con valori interi da 1 a 10 e il segnaposto '?' in alcune colonne.
+    """
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.integers(1, 11, size=(N_ROWS, N_FEATURES)).astype(float),
+                        columns=[f"f{i}" for i in range(N_FEATURES)])
+    for column in MISSING_TOKEN_COLUMNS:
+        data[column] = data[column].astype(object)
+        data.loc[rng.choice(N_ROWS, N_ROWS // 50, replace=False), column] = '?'
+    data.insert(0, 'Sample code number', np.arange(N_ROWS))
+    data.to_csv(file_path, index=False)
+
+
+def measure(function) -> tuple[float, float]:
+    """
+    Restituisce il tempo di esecuzione e la memoria di picco allocata dalla funzione. La
+    memoria viene misurata in un'esecuzione separata, perché tracemalloc rallenta molto le
+    allocazioni degli oggetti Python e falserebbe il confronto dei tempi.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak / 1024 ** 2
+
+
+def run() -> pd.DataFrame:
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'data.csv')
+        write_dataset(file_path)
+
+        parsers = {
+            'inferred': ParserFactory.get_parser(file_path),
+            'schema float64': ParserFactory.get_parser(file_path, dtype='float64', na_values=['?']),
+            'schema float32': ParserFactory.get_parser(file_path, dtype='float32', na_values=['?']),
+            'schema float32, no na_values': ParserFactory.get_parser(file_path, dtype='float32'),
+        }
+        rows = []
+        for method, parser in parsers.items():
+            elapsed, peak = measure(lambda: MissingValuesHandler.convert_numeric_columns(parser.parse(file_path)))
+            rows.append({"method": method, "time (s)": round(elapsed, 2), "peak (MiB)": round(peak)})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    print(run().to_string(index=False))
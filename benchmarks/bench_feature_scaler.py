@@ -0,0 +1,105 @@
+"""
+Benchmark dello scaling delle feature.
+
+Confronta il ciclo sulle colonne usato in origine da FeatureScaler (copia del dataset e
+assegnazione di una colonna alla volta) con il percorso vettorizzato a blocchi di colonne,
+con e senza `inplace`, su un DataFrame largo (200000 righe, 100 feature float64, più una
+colonna intera esclusa dallo scaling). La memoria di picco è misurata con tracemalloc e
+non include il dataset di partenza.
+
+Risultati indicativi (un core):
+
+       strategy      method  time (s)  peak (MiB)
+      normalize        loop      0.40         308
+      normalize  vectorized      0.31         200
+      normalize     inplace      0.25          46
+    standardize        loop      0.53         310
+    standardize  vectorized      0.43         200
+    standardize     inplace      0.40          46
+
+Il ciclo alloca una copia completa del dataset più i temporanei di ogni colonna. Il
+percorso vettorizzato alloca la copia del risultato e un solo blocco di colonne per volta
+(al più FittedScaler.BLOCK_BYTES, più la sua selezione temporanea dal DataFrame); con
+`inplace` restano solo i blocchi, perché le colonne float64 vengono sovrascritte nei blocchi
+esistenti del DataFrame. Il guadagno di tempo è più contenuto di quello di memoria: in
+entrambi i casi il costo è dominato dalle riduzioni e dalle operazioni aritmetiche.
+
+Esecuzione (dalla radice del progetto):
+    python -m benchmarks.bench_feature_scaler
+"""
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from preprocessing import FeatureScaler
+
+N_ROWS = 200000
+N_FEATURES = 100
+EXCLUDE_COLUMNS = ['id']
+
+
+def loop_normalize(data: pd.DataFrame, exclude_columns: list) -> pd.DataFrame:
+    """
+    Normalizzazione colonna per colonna, come nella versione originale di FeatureScaler.
+    """
+    data_scaled = data.copy()
+    for column in [col for col in data.columns if col not in exclude_columns]:
+        min_val = data[column].min()
+        max_val = data[column].max()
+        data_scaled[column] = (data[column] - min_val) / (max_val - min_val)
+    return data_scaled
+
+
+def loop_standardize(data: pd.DataFrame, exclude_columns: list) -> pd.DataFrame:
+    """
+    Standardizzazione colonna per colonna, come nella versione originale di FeatureScaler.
+    """
+    data_scaled = data.copy()
+    for column in [col for col in data.columns if col not in exclude_columns]:
+        data_scaled[column] = (data[column] - data[column].mean()) / data[column].std()
+    return data_scaled
+
+
+def measure(function, data: pd.DataFrame) -> tuple[float, float]:
+    """
+    Restituisce il tempo di esecuzione e la memoria di picco allocata dalla funzione.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(data)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024 ** 2
+
+
+def run() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    base = pd.DataFrame(rng.normal(size=(N_ROWS, N_FEATURES)), columns=[f"f{i}" for i in range(N_FEATURES)])
+    base['id'] = np.arange(N_ROWS)
+
+    methods = {
+        'normalize': {
+            'loop': lambda data: loop_normalize(data, EXCLUDE_COLUMNS),
+            'vectorized': lambda data: FeatureScaler.normalize(data, EXCLUDE_COLUMNS),
+            'inplace': lambda data: FeatureScaler.normalize(data, EXCLUDE_COLUMNS, inplace=True),
+        },
+        'standardize': {
+            'loop': lambda data: loop_standardize(data, EXCLUDE_COLUMNS),
+            'vectorized': lambda data: FeatureScaler.standardize(data, EXCLUDE_COLUMNS),
+            'inplace': lambda data: FeatureScaler.standardize(data, EXCLUDE_COLUMNS, inplace=True),
+        },
+    }
+
+    rows = []
+    for strategy, functions in methods.items():
+        for method, function in functions.items():
+            # Ogni misura parte da una copia, così che inplace non alteri le misure successive
+            elapsed, peak = measure(function, base.copy())
+            rows.append({"strategy": strategy, "method": method, "time (s)": round(elapsed, 2),
+                         "peak (MiB)": round(peak)})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    print(run().to_string(index=False))
@@ -0,0 +1,48 @@
+"""
+Benchmark dell'indice approssimato 'ivf' di KNNClassifier.
+
+Per diversi valori di `n_probe` misura il tempo di risposta di kneighbors e il richiamo
+(recall@k) rispetto alla ricerca esatta esaustiva, su dati ottenuti replicando con un
+piccolo rumore le feature di `data/version_1.csv`.
+
+Esecuzione (dalla radice del progetto):
+    python -m benchmarks.bench_knn_ivf
+"""
+import time
+import numpy as np
+import pandas as pd
+from models import KNNClassifier
+from benchmarks.bench_knn_algorithms import load_base_dataset, make_dataset
+
+N_TRAIN = 200000
+N_QUERIES = 1000
+N_PROBES = [1, 2, 4, 8, 16]
+K = 5
+
+
+def run() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    base, base_labels = load_base_dataset()
+    data, labels = make_dataset(base, base_labels, N_TRAIN + N_QUERIES, base.shape[1], rng)
+    points, data, labels = data.iloc[:N_QUERIES], data.iloc[N_QUERIES:], labels.iloc[N_QUERIES:]
+
+    exact = KNNClassifier(K)
+    exact.fit(data, labels)
+    start = time.perf_counter()
+    exact.kneighbors(points)
+    rows = [{"algorithm": "brute", "n_probe": "-", "query (s)": round(time.perf_counter() - start, 3),
+             "recall@k": 1.0}]
+
+    for n_probe in N_PROBES:
+        knn = KNNClassifier(K, algorithm='ivf', n_probe=n_probe, random_state=0)
+        knn.fit(data, labels)
+        start = time.perf_counter()
+        knn.kneighbors(points)
+        query_time = time.perf_counter() - start
+        rows.append({"algorithm": "ivf", "n_probe": n_probe, "query (s)": round(query_time, 3),
+                     "recall@k": round(knn.recall_at_k(points), 4)})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    print(run().to_string(index=False))
@@ -0,0 +1,73 @@
+"""
+Benchmark delle metriche di distanza di KNNClassifier.
+
+Misura la velocità di predict_batch con la ricerca esaustiva per ogni metrica, su un dataset
+ottenuto replicando 1000 volte `data/version_1.csv` (circa 680000 campioni, 9 feature) con un
+piccolo rumore.
+
+Risultati indicativi (200 query, un core):
+
+         metric   dtype  predict (s)  query/s
+      euclidean float64         1.55      129
+      euclidean float32         1.65      121
+    sqeuclidean float64         1.59      125
+         cosine float64         1.60      125
+      manhattan float64         3.83       52
+      chebyshev float64         3.33       60
+      minkowski float64         7.99       25
+
+Le metriche basate sul prodotto matriciale (euclidea, euclidea al quadrato e coseno) sono le
+più veloci e costano quanto la selezione dei candidati con `argpartition`: la radice viene
+calcolata solo sui candidati, quindi 'euclidean' e 'sqeuclidean' si equivalgono, e la
+precisione singola non porta vantaggi su 9 feature. Manhattan e Chebyshev accumulano le
+differenze feature per feature; Minkowski con p non intero paga anche l'elevamento a potenza.
+
+Esecuzione (dalla radice del progetto):
+    python -m benchmarks.bench_knn_metrics
+"""
+import time
+import numpy as np
+import pandas as pd
+from models import KNNClassifier
+from benchmarks.bench_knn_algorithms import load_base_dataset, make_dataset
+
+# Metrica, parametri aggiuntivi del classificatore
+CONFIGURATIONS = [
+    ('euclidean', {}),
+    ('euclidean', {'dtype': np.float32}),
+    ('sqeuclidean', {}),
+    ('cosine', {}),
+    ('manhattan', {}),
+    ('chebyshev', {}),
+    ('minkowski', {'p': 3.5}),
+]
+SCALE = 1000
+N_QUERIES = 200
+K = 3
+
+
+def run() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    base, base_labels = load_base_dataset()
+    data, labels = make_dataset(base, base_labels, SCALE * len(base) + N_QUERIES, base.shape[1], rng)
+    points, data, labels = data.iloc[:N_QUERIES], data.iloc[N_QUERIES:], labels.iloc[N_QUERIES:]
+
+    rows = []
+    for metric, params in CONFIGURATIONS:
+        knn = KNNClassifier(K, metric=metric, **params)
+        knn.fit(data, labels)
+
+        start = time.perf_counter()
+        knn.predict_batch(points)
+        predict_time = time.perf_counter() - start
+        rows.append({
+            "metric": metric,
+            "dtype": np.dtype(params.get('dtype', np.float64)).name,
+            "predict (s)": round(predict_time, 2),
+            "query/s": round(N_QUERIES / predict_time),
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    print(run().to_string(index=False))
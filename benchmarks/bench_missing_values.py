@@ -0,0 +1,92 @@
+"""
+Benchmark della gestione dei valori mancanti (MissingValuesHandler.impute).
+
+Confronta i singoli passaggi (conversione, rimozione delle righe senza etichetta e
+riempimento con `fillna`) con `impute`, con e senza `inplace`, su un dataset di 200000 righe
+e 12 colonne float con il 5% di valori mancanti e l'etichetta sempre presente (nessuna riga
+da rimuovere). La memoria di picco è misurata con tracemalloc e non comprende il dataset.
+
+Risultati indicativi (un core):
+
+    strategy          method  time (s)  peak (MiB)
+        mean           steps    0.0563        61.2
+        mean          impute    0.0534        26.3
+        mean  impute inplace    0.0592         6.8
+      median           steps    0.0698        61.2
+      median          impute    0.0703        26.3
+      median  impute inplace    0.0717         6.7
+        mode           steps    0.0815        61.2
+        mode          impute    0.0440        26.3
+        mode  impute inplace    0.0335         7.9
+
+I singoli passaggi creano il DataFrame filtrato e poi il DataFrame riempito, oltre alle
+maschere dei mancanti di pandas (il dataset occupa 20 MiB). Con `impute` le statistiche sono
+calcolate a blocchi di colonne di al più `BLOCK_BYTES` byte e il riempimento avviene nel
+solo DataFrame risultato: resta una copia del dataset, nessuna con `inplace` quando non ci
+sono righe da rimuovere, e la memoria aggiuntiva è limitata a pochi blocchi. I tempi sono
+simili: il costo è dominato dalle riduzioni, che sono le stesse di pandas per avere
+risultati identici.
+
+Esecuzione (dalla radice del progetto):
+    python -m benchmarks.bench_missing_values
+"""
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from preprocessing import MissingValuesHandler
+
+N_ROWS = 200000
+N_FEATURES = 12
+MISSING_RATE = 0.05
+
+
+def steps(data: pd.DataFrame, strategy: str) -> pd.DataFrame:
+    """
+    La gestione dei valori mancanti con i singoli passaggi, come prima di `impute`.
+    """
+    methods = {'mean': MissingValuesHandler.fill_missing_with_mean,
+               'median': MissingValuesHandler.fill_missing_with_median,
+               'mode': MissingValuesHandler.fill_missing_with_mode}
+    data = MissingValuesHandler.convert_numeric_columns(data)
+    data = MissingValuesHandler.remove_rows_with_missing_classtype(data)
+    return methods[strategy](data)
+
+
+def measure(function, data: pd.DataFrame) -> tuple[float, float]:
+    """
+    Restituisce tempo (s) e memoria di picco (MiB) della funzione, ciascuna su una copia del dataset.
+    """
+    copy = data.copy()
+    start = time.perf_counter()
+    function(copy)
+    elapsed = time.perf_counter() - start
+    copy = data.copy()
+    tracemalloc.start()
+    function(copy)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024 ** 2
+
+
+def run() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.integers(1, 11, size=(N_ROWS, N_FEATURES)).astype(float),
+                        columns=[f"f{i}" for i in range(N_FEATURES)])
+    data = data.mask(rng.random(data.shape) < MISSING_RATE)
+    data['classtype_v1'] = rng.choice([2.0, 4.0], size=N_ROWS)
+
+    rows = []
+    for strategy in ['mean', 'median', 'mode']:
+        methods = [('steps', lambda copy: steps(copy, strategy)),
+                   ('impute', lambda copy: MissingValuesHandler.impute(copy, strategy)),
+                   ('impute inplace', lambda copy: MissingValuesHandler.impute(copy, strategy, inplace=True))]
+        for method, function in methods:
+            elapsed, peak = measure(function, data)
+            rows.append({"strategy": strategy, "method": method, "time (s)": round(elapsed, 4),
+                         "peak (MiB)": round(peak, 1)})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    print(run().to_string(index=False))
@@ -0,0 +1,76 @@
+"""
+Benchmark della cache su disco dei dataset letti (ParseCache).
+
+Confronta il parsing del file con la lettura dalla cache, con e senza mappatura in memoria,
+per un file CSV e uno Excel con 50000 righe e 12 colonne float più l'identificativo. Il
+tempo del primo accesso (miss) include il parsing e il salvataggio nella cache.
+
+Risultati indicativi (un core):
+
+    format          method  time (s)
+       csv           parse    0.0835
+       csv      cache miss    0.0985
+       csv  cache hit mmap    0.0025
+       csv       cache hit    0.0048
+      xlsx           parse   10.6740
+      xlsx      cache miss   10.1901
+      xlsx  cache hit mmap    0.0012
+      xlsx       cache hit    0.0022
+
+Con la mappatura il caricamento legge solo l'intestazione dei file `.npy`: i dati vengono
+letti dal disco, o dalla cache del sistema operativo, solo quando servono. Il guadagno è
+massimo per i file Excel, il cui parsing è di gran lunga il più lento.
+
+Esecuzione (dalla radice del progetto):
+    python -m benchmarks.bench_parse_cache
+"""
+import contextlib
+import io
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from preprocessing import ParserFactory, ParseCache
+
+N_ROWS = 50000
+N_FEATURES = 12
+
+
+def timed(function) -> float:
+    """
+    Restituisce il tempo di esecuzione della funzione, senza le stampe dei parser.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+
+
+def run() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.integers(1, 11, size=(N_ROWS, N_FEATURES)).astype(float),
+                        columns=[f"f{i}" for i in range(N_FEATURES)])
+    data.insert(0, 'Sample code number', np.arange(N_ROWS, dtype=float))
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for extension, write in [('csv', data.to_csv), ('xlsx', data.to_excel)]:
+            file_path = os.path.join(directory, f"data.{extension}")
+            write(file_path, index=False)
+            cache_directory = os.path.join(directory, f"cache_{extension}")
+            parser = ParserFactory.get_parser(file_path)
+            cached = ParserFactory.get_parser(file_path, cache=ParseCache(cache_directory))
+            unmapped = ParserFactory.get_parser(file_path, cache=ParseCache(cache_directory, mmap=False))
+
+            methods = [('parse', lambda: parser.parse(file_path)),
+                       ('cache miss', lambda: cached.parse(file_path)),
+                       ('cache hit mmap', lambda: cached.parse(file_path)),
+                       ('cache hit', lambda: unmapped.parse(file_path))]
+            for method, function in methods:
+                rows.append({"format": extension, "method": method, "time (s)": round(timed(function), 4)})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    print(run().to_string(index=False))
@@ -1,7 +1,14 @@
+from itertools import chain
 from typing import List, Tuple, Dict
 import numpy as np
 
 class MetricsCalculator:
+    # Metriche calcolate per ogni split, nell'ordine dei risultati
+    METRICS = ("Accuracy Rate", "Error Rate", "Sensitivity", "Specificity", "Geometric Mean", "Area Under Curve")
+    # Colonna della matrice di confusione (TP, TN, FP, FN) per ogni coppia (reale, predetto),
+    # indicizzata da 2 * reale + predetto
+    _CELLS = np.array([1, 2, 3, 0])
+
     def __init__(self):
         """
         Inizializza  la classe MetricsCalculator tramite il costruttore.
@@ -18,28 +25,140 @@ class MetricsCalculator:
         Returns:
             Dict[str, float]: Dizionario con le metriche aggregate.
         """
-        # Inizializza metriche aggregate
-        aggregated_metrics = {
-            "Accuracy Rate": [],
-            "Error Rate": [],
-            "Sensitivity": [],
-            "Specificity": [],
-            "Geometric Mean": [],
-            "Area Under Curve": [],
+        split_metrics = self.calculate_split_metrics(input_data)
+        # Media delle iterazioni, con la stessa somma sequenziale dei valori di ogni split
+        return {key: sum(values.tolist()) / len(values) for key, values in split_metrics.items()}
+
+    def calculate_split_metrics(self, input_data: List[Tuple[List[int], List[int]]]) -> Dict[str, np.ndarray]:
+        """
+        Calcola le metriche di ogni coppia (y_real, y_pred), ad esempio di ogni split di una
+        validazione, con operazioni vettorizzate su tutti gli split insieme.
+
+        Args:
+            input_data (List[Tuple[List[int], List[int]]]): Lista di tuple contenenti i valori reali e predetti.
+
+        Returns:
+            Dict[str, np.ndarray]: Per ogni metrica, l'array dei valori degli split.
+        """
+        return self.metrics_from_confusion(self.confusion_matrices(input_data))
+
+    def confusion_matrices(self, input_data: List[Tuple[List[int], List[int]]]) -> np.ndarray:
+        """
+        Calcola le matrici di confusione di tutte le coppie (y_real, y_pred) con un solo
+        conteggio: i valori di tutti gli split vengono concatenati e ogni coppia
+        (reale, predetto) viene contata con `np.bincount` nella cella del proprio split.
+        Come in `_confusion_matrix`, le coppie con valori diversi da 0 e 1 non vengono contate.
+
+        Args:
+            input_data (List[Tuple[List[int], List[int]]]): Lista di tuple contenenti i valori reali e predetti.
+
+        Returns:
+            np.ndarray: Matrice (n_split x 4) con le colonne (TP, TN, FP, FN).
+        """
+        reals = [y_real for y_real, _ in input_data]
+        preds = [y_pred for _, y_pred in input_data]
+        lengths = np.array([len(y_real) for y_real in reals], dtype=np.intp)
+        if any(len(y_pred) != length for y_pred, length in zip(preds, lengths)):
+            raise ValueError("I valori reali e predetti di ogni split devono avere la stessa lunghezza.")
+        if lengths.sum() == 0:
+            return np.zeros((len(lengths), 4), dtype=np.int64)
+
+        real, pred = self._concatenate(reals), self._concatenate(preds)
+        splits = np.repeat(np.arange(len(lengths)), lengths)
+        real_positive, pred_positive = real == 1, pred == 1
+        valid = (real_positive | (real == 0)) & (pred_positive | (pred == 0))
+        cells = self._CELLS[2 * real_positive[valid] + pred_positive[valid]]
+        counts = np.bincount(4 * splits[valid] + cells, minlength=4 * len(lengths))
+        return counts.reshape(len(lengths), 4)
+
+    def metrics_from_confusion(self, matrices: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Calcola le metriche da una o più matrici di confusione, con gli stessi valori dei
+        metodi per il singolo split (0.0 quando un denominatore è nullo).
+
+        Args:
+            matrices (np.ndarray): Matrici di confusione (... x 4) con le colonne (TP, TN, FP, FN).
+
+        Returns:
+            Dict[str, np.ndarray]: Per ogni metrica, l'array dei valori delle matrici.
+        """
+        matrices = np.asarray(matrices)
+        tp, tn, fp, fn = (matrices[..., cell] for cell in range(4))
+        total = tp + tn + fp + fn
+        sensitivity = self._ratio(tp, tp + fn)
+        specificity = self._ratio(tn, tn + fp)
+        return {
+            "Accuracy Rate": self._ratio(tp + tn, total),
+            "Error Rate": self._ratio(fp + fn, total),
+            "Sensitivity": sensitivity,
+            "Specificity": specificity,
+            "Geometric Mean": np.sqrt(sensitivity * specificity),
+            "Area Under Curve": (sensitivity + specificity) / 2,
         }
 
-        # Calcola metriche per ogni coppia e aggiungi i valori alle liste aggregate
-        for y_real, y_pred in input_data:
-            tp, tn, fp, fn = self._confusion_matrix(y_real, y_pred)
-            aggregated_metrics["Accuracy Rate"].append(self._accuracy_rate(tp, tn, fp, fn))
-            aggregated_metrics["Error Rate"].append(self._error_rate(tp, tn, fp, fn))
-            aggregated_metrics["Sensitivity"].append(self._sensitivity(tp, fn))
-            aggregated_metrics["Specificity"].append(self._specificity(tn, fp))
-            aggregated_metrics["Geometric Mean"].append(self._geometric_mean(tp, tn, fp, fn))
-            aggregated_metrics["Area Under Curve"].append(self._area_under_curve(tp, tn, fp, fn))
+    @staticmethod
+    def _concatenate(sequences: list) -> np.ndarray:
+        """
+        Concatena i valori di tutti gli split in un unico array.
+        """
+        if all(isinstance(values, list) for values in sequences):
+            # Una sola conversione per tutte le liste, molto più veloce di una per split
+            return np.array(list(chain.from_iterable(sequences)))
+        return np.concatenate([np.asarray(values) for values in sequences])
+
+    @staticmethod
+    def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+        """
+        Divide elemento per elemento, con risultato 0.0 dove il denominatore è nullo.
+        """
+        return np.divide(numerator, denominator, out=np.zeros(np.shape(numerator)), where=denominator > 0)
+
+    def roc_curve(self, y_real: List[int], y_score: List[float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Calcola la curva ROC a partire dai punteggi della classe positiva (1), ad esempio le
+        probabilità restituite da `KNNClassifier.predict_proba_batch`.
+
+        Args:
+            y_real (List[int]): Valori reali (1 positivo, 0 negativo).
+            y_score (List[float]): Punteggio della classe positiva per ogni campione.
 
-        # Restituisce le metriche come media delle iterazioni tramite la seguente list comprehension
-        return {key: sum(values) / len(values) for key, values in aggregated_metrics.items()}
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: False positive rate, true positive rate
+                e soglie corrispondenti, per soglie decrescenti.
+        """
+        positives = np.asarray(y_real) == 1
+        scores = np.asarray(y_score, dtype=np.float64)
+        order = np.argsort(-scores, kind='stable')
+        scores, positives = scores[order], positives[order]
+
+        if len(scores) == 0:
+            return np.zeros(1), np.zeros(1), np.array([np.inf])
+
+        # Ultima posizione di ogni gruppo di punteggi uguali: una soglia per gruppo
+        ends = np.append(np.flatnonzero(np.diff(scores)), len(scores) - 1)
+        tps = np.cumsum(positives)[ends]
+        fps = ends + 1 - tps
+        n_positive, n_negative = int(positives.sum()), len(positives) - int(positives.sum())
+
+        tpr = np.concatenate([[0], tps / n_positive if n_positive > 0 else np.zeros(len(tps))])
+        fpr = np.concatenate([[0], fps / n_negative if n_negative > 0 else np.zeros(len(fps))])
+        thresholds = np.concatenate([[np.inf], scores[ends]])
+        return fpr, tpr, thresholds
+
+    def roc_auc(self, y_real: List[int], y_score: List[float]) -> float:
+        """
+        Calcola l'area sotto la curva ROC con la regola dei trapezi. A differenza di
+        `_area_under_curve`, che usa una sola soglia, considera tutte le soglie dei punteggi.
+
+        Args:
+            y_real (List[int]): Valori reali (1 positivo, 0 negativo).
+            y_score (List[float]): Punteggio della classe positiva per ogni campione.
+
+        Returns:
+            float: Area sotto la curva ROC.
+        """
+        fpr, tpr, _ = self.roc_curve(y_real, y_score)
+        return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
 
     def _confusion_matrix(self, y_real: List[int], y_pred: List[int]) -> Tuple[int, int, int, int]:
         """
@@ -52,10 +171,7 @@ class MetricsCalculator:
         Returns:
             Tuple[int, int, int, int]: (True Positive, True Negative, False Positive, False Negative).
         """
-        tp = sum(1 for r, p in zip(y_real, y_pred) if r == 1 and p == 1)
-        tn = sum(1 for r, p in zip(y_real, y_pred) if r == 0 and p == 0)
-        fp = sum(1 for r, p in zip(y_real, y_pred) if r == 0 and p == 1)
-        fn = sum(1 for r, p in zip(y_real, y_pred) if r == 1 and p == 0)
+        tp, tn, fp, fn = self.confusion_matrices([(y_real, y_pred)])[0].tolist()
         return tp, tn, fp, fn
 
     def _accuracy_rate(self, tp: int, tn: int, fp: int, fn: int) -> float:
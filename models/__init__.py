@@ -1 +1,6 @@
-from .knn import KNNClassifier
\ No newline at end of file
+from .knn import KNNClassifier
+from .neighbor_search import NeighborSearch, BruteForceSearch
+from .spatial_tree import KDTree, BallTree
+from .ivf_index import IVFIndex
+from .distance_cache import DistanceCache
+from .distance_metrics import DistanceMetric, DistanceMetricFactory
\ No newline at end of file
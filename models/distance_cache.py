@@ -0,0 +1,53 @@
+import numpy as np
+from .distance_metrics import DistanceMetric, EuclideanDistance
+
+
+class DistanceCache:
+    """
+    Matrice delle distanze tra tutte le coppie di campioni di un dataset,
+    calcolata una sola volta e riutilizzata da tutti gli split di una validazione.
+
+    Le distanze sono calcolate come nella ricerca esaustiva del KNN, quindi le predizioni
+    ottenute dalla cache coincidono con quelle calcolate da zero. La memoria richiesta è
+    n_campioni² x 8 byte.
+    """
+    # Memoria massima indicativa (in byte) per il blocco di righe calcolato a ogni passo
+    MAX_BLOCK_BYTES = 64 * 1024 ** 2
+
+    def __init__(self, data: np.ndarray, metric: DistanceMetric = None):
+        """
+        Calcola la matrice delle distanze a blocchi di righe.
+
+        Args:
+            data (np.ndarray): Feature del dataset (n_campioni x n_feature).
+            metric (DistanceMetric, optional): Metrica di distanza (default: euclidea).
+        """
+        metric = EuclideanDistance() if metric is None else metric
+        data = np.ascontiguousarray(data, dtype=np.float64)
+        n_samples = len(data)
+        self.matrix = np.empty((n_samples, n_samples))
+
+        # Il calcolo feature per feature richiede circa tre matrici temporanee del blocco
+        block_rows = max(1, self.MAX_BLOCK_BYTES // (24 * max(n_samples, 1)))
+        columns = np.arange(n_samples)
+        for start in range(0, n_samples, block_rows):
+            block = data[start:start + block_rows]
+            candidates = np.broadcast_to(columns, (len(block), n_samples))
+            self.matrix[start:start + len(block)] = metric.distances(block, data, candidates)
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def distances(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """
+        Restituisce le distanze tra i campioni `rows` (tipicamente il test set) e i campioni
+        `columns` (tipicamente il training set), nell'ordine indicato.
+
+        Args:
+            rows (np.ndarray): Posizioni dei campioni di riga.
+            columns (np.ndarray): Posizioni dei campioni di colonna.
+
+        Returns:
+            np.ndarray: Distanze (len(rows) x len(columns)).
+        """
+        return self.matrix[np.ix_(rows, columns)]
@@ -0,0 +1,312 @@
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+class DistanceMetric(ABC):
+    """
+    Questa classe astratta definisce un'interfaccia comune per le metriche di distanza.
+
+    Ogni metrica espone un kernel a blocchi che calcola una distanza "ridotta", monotona
+    rispetto a quella vera ma senza l'eventuale radice finale: serve solo a selezionare i
+    candidati, per cui la radice sull'intera matrice sarebbe superflua. La distanza vera
+    viene calcolata solo per i candidati, sommando feature per feature sempre nello stesso
+    ordine, così che ogni algoritmo di ricerca ottenga esattamente gli stessi valori.
+    """
+    # Nome con cui la metrica viene richiesta a DistanceMetricFactory
+    name = None
+    # True se vale la disuguaglianza triangolare, richiesta dagli alberi di ricerca
+    is_metric = True
+    # Margine relativo sulle distanze ridotte che copre arrotondamenti e radice finale
+    RELATIVE_TOLERANCE = 1e-9
+
+    @abstractmethod
+    def pairwise_reduced(self, queries: np.ndarray, train: np.ndarray) -> np.ndarray:
+        """
+        Kernel a blocchi: distanze ridotte tra ogni query e ogni campione di training.
+        Deve essere implementato nelle sottoclassi.
+
+        Args:
+            queries (np.ndarray): Blocco di punti (n_query x n_feature).
+            train (np.ndarray): Blocco di training (n_train x n_feature).
+
+        Returns:
+            np.ndarray: Distanze ridotte (n_query x n_train).
+        """
+        pass
+
+    def tolerance(self, queries: np.ndarray, train: np.ndarray, kth: np.ndarray) -> np.ndarray:
+        """
+        Margine da aggiungere alla k-esima distanza ridotta di ogni query perché tra i
+        candidati rientrino tutti i campioni che, dopo il calcolo esatto, potrebbero
+        risultare a pari merito con il k-esimo vicino.
+
+        Args:
+            queries (np.ndarray): Blocco di punti (n_query x n_feature).
+            train (np.ndarray): Blocco di training (n_train x n_feature).
+            kth (np.ndarray): K-esima distanza ridotta di ogni query (n_query x 1).
+
+        Returns:
+            np.ndarray: Margine per ogni query (n_query x 1).
+        """
+        return self.RELATIVE_TOLERANCE * np.abs(kth)
+
+    @abstractmethod
+    def distances(self, queries: np.ndarray, train: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        """
+        Calcola le distanze esatte tra ogni query e i rispettivi candidati.
+        Deve essere implementato nelle sottoclassi.
+
+        Args:
+            queries (np.ndarray): Blocco di punti (n_query x n_feature).
+            train (np.ndarray): Dati di training (n_train x n_feature).
+            candidates (np.ndarray): Posizioni dei candidati per ogni query (n_query x n_candidati).
+
+        Returns:
+            np.ndarray: Distanze (n_query x n_candidati).
+        """
+        pass
+
+    def from_reduced(self, reduced: np.ndarray) -> np.ndarray:
+        """
+        Converte le distanze ridotte in distanze vere.
+        """
+        return reduced
+
+
+class MinkowskiFamilyDistance(DistanceMetric):
+    """
+    Classe astratta per le metriche della famiglia di Minkowski, definite sui vettori
+    differenza: la distanza ridotta si accumula feature per feature, quindi il kernel a
+    blocchi e il calcolo esatto dei candidati sono comuni. Solo queste metriche espongono
+    `norm`, usata dagli alberi di ricerca per limiti e filtri.
+    """
+    # Celle della matrice delle distanze elaborate insieme dal kernel generico (circa 256 KiB)
+    CACHE_BLOCK_CELLS = 32768
+
+    def pairwise_reduced(self, queries: np.ndarray, train: np.ndarray) -> np.ndarray:
+        reduced = np.zeros((len(queries), len(train)))
+        # Le righe vengono elaborate a gruppi che restano in cache per tutte le feature
+        columns = np.asfortranarray(train, dtype=np.float64)
+        rows_per_block = max(1, self.CACHE_BLOCK_CELLS // max(len(train), 1))
+        for start in range(0, len(queries), rows_per_block):
+            block = reduced[start:start + rows_per_block]
+            differences = np.empty(block.shape)
+            for feature in range(train.shape[1]):
+                np.subtract(queries[start:start + rows_per_block, feature:feature + 1], columns[:, feature],
+                            out=differences, dtype=np.float64)
+                self._accumulate(block, differences)
+        return reduced
+
+    def distances(self, queries: np.ndarray, train: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        reduced = np.zeros(candidates.shape)
+        for feature in range(train.shape[1]):
+            self._accumulate(reduced, np.subtract(train[candidates, feature], queries[:, feature:feature + 1],
+                                                  dtype=np.float64))
+        return self.from_reduced(reduced)
+
+    @abstractmethod
+    def norm(self, offsets: np.ndarray) -> np.ndarray:
+        """
+        Restituisce la lunghezza dei vettori differenza lungo l'ultimo asse, con un'unica
+        riduzione vettorizzata. Il risultato può differire dal calcolo esatto per un errore
+        di arrotondamento: gli alberi la usano solo per limiti e filtri, con un margine.
+        Deve essere implementato nelle sottoclassi.
+
+        Args:
+            offsets (np.ndarray): Vettori differenza (..., n_feature).
+
+        Returns:
+            np.ndarray: Distanze (...).
+        """
+        pass
+
+    @abstractmethod
+    def _accumulate(self, reduced: np.ndarray, differences: np.ndarray) -> None:
+        """
+        Aggiunge alla distanza ridotta il contributo di una feature, sul posto.
+        Deve essere implementato nelle sottoclassi.
+
+        Args:
+            reduced (np.ndarray): Distanze ridotte parziali.
+            differences (np.ndarray): Differenze lungo la feature, modificabili sul posto.
+        """
+        pass
+
+
+class EuclideanDistance(MinkowskiFamilyDistance):
+    """
+    Distanza euclidea. Il kernel a blocchi usa lo sviluppo ||a||² + ||b||² - 2ab, calcolato con
+    un prodotto matriciale; le distanze dei candidati vengono ricalcolate in modo esatto, nello
+    stesso ordine del calcolo su DataFrame, e solo su di esse viene applicata la radice.
+    """
+    name = 'euclidean'
+
+    def pairwise_reduced(self, queries: np.ndarray, train: np.ndarray) -> np.ndarray:
+        squared_queries = np.einsum('ij,ij->i', queries, queries)
+        squared_train = np.einsum('ij,ij->i', train, train)
+        reduced = queries @ train.T
+        reduced *= -2.0
+        reduced += squared_queries[:, None]
+        reduced += squared_train[None, :]
+        return reduced
+
+    def tolerance(self, queries: np.ndarray, train: np.ndarray, kth: np.ndarray) -> np.ndarray:
+        # Lo sviluppo del quadrato perde precisione in proporzione alle norme dei punti;
+        # in precisione singola l'errore di arrotondamento è molto più ampio
+        relative_tolerance = self.RELATIVE_TOLERANCE if queries.dtype == np.float64 else 1e-4
+        squared_queries = np.einsum('ij,ij->i', queries, queries)
+        return relative_tolerance * (squared_queries[:, None] + np.einsum('ij,ij->i', train, train).max())
+
+    def norm(self, offsets: np.ndarray) -> np.ndarray:
+        if offsets.ndim == 1:
+            # Percorso rapido per i singoli vettori usati nei limiti dei nodi degli alberi
+            return np.sqrt(offsets @ offsets)
+        return np.sqrt(np.einsum('ij,ij->i', offsets, offsets))
+
+    def _accumulate(self, reduced: np.ndarray, differences: np.ndarray) -> None:
+        reduced += differences ** 2
+
+    def from_reduced(self, reduced: np.ndarray) -> np.ndarray:
+        return np.sqrt(reduced)
+
+
+class SquaredEuclideanDistance(EuclideanDistance):
+    """
+    Quadrato della distanza euclidea: ordina i vicini come la distanza euclidea ma non calcola
+    mai la radice. Non rispetta la disuguaglianza triangolare, quindi non è usabile dagli alberi.
+    """
+    name = 'sqeuclidean'
+    is_metric = False
+
+    def norm(self, offsets: np.ndarray) -> np.ndarray:
+        return np.einsum('...i,...i->...', offsets, offsets)
+
+    def from_reduced(self, reduced: np.ndarray) -> np.ndarray:
+        return reduced
+
+
+class ManhattanDistance(MinkowskiFamilyDistance):
+    """
+    Distanza di Manhattan (L1): somma dei valori assoluti delle differenze.
+    """
+    name = 'manhattan'
+
+    def norm(self, offsets: np.ndarray) -> np.ndarray:
+        return np.abs(offsets).sum(axis=-1)
+
+    def _accumulate(self, reduced: np.ndarray, differences: np.ndarray) -> None:
+        reduced += np.abs(differences, out=differences)
+
+
+class ChebyshevDistance(MinkowskiFamilyDistance):
+    """
+    Distanza di Chebyshev (L∞): massimo dei valori assoluti delle differenze.
+    """
+    name = 'chebyshev'
+
+    def norm(self, offsets: np.ndarray) -> np.ndarray:
+        return np.abs(offsets).max(axis=-1, initial=0.0)
+
+    def _accumulate(self, reduced: np.ndarray, differences: np.ndarray) -> None:
+        np.maximum(reduced, np.abs(differences, out=differences), out=reduced)
+
+
+class MinkowskiDistance(MinkowskiFamilyDistance):
+    """
+    Distanza di Minkowski di ordine p: radice p-esima della somma delle differenze assolute
+    elevate alla p. Il kernel a blocchi lavora sulla somma, senza radice.
+    """
+    name = 'minkowski'
+
+    def __init__(self, p: float = 2):
+        """
+        Args:
+            p (float): Ordine della distanza, almeno 1 (default 2).
+        """
+        if isinstance(p, bool) or not isinstance(p, (int, float)) or not p >= 1 or np.isinf(p):
+            raise ValueError("p deve essere un numero finito maggiore o uguale a 1.")
+        self.p = p
+
+    def norm(self, offsets: np.ndarray) -> np.ndarray:
+        return np.power(np.power(np.abs(offsets), self.p).sum(axis=-1), 1.0 / self.p)
+
+    def _accumulate(self, reduced: np.ndarray, differences: np.ndarray) -> None:
+        np.abs(differences, out=differences)
+        reduced += np.power(differences, self.p, out=differences)
+
+    def from_reduced(self, reduced: np.ndarray) -> np.ndarray:
+        return np.power(reduced, 1.0 / self.p)
+
+
+class CosineDistance(DistanceMetric):
+    """
+    Distanza coseno: 1 meno il coseno dell'angolo tra i vettori. Un vettore nullo ha distanza 1
+    da ogni punto. Non rispetta la disuguaglianza triangolare, quindi non è usabile dagli alberi.
+    """
+    name = 'cosine'
+    is_metric = False
+
+    def pairwise_reduced(self, queries: np.ndarray, train: np.ndarray) -> np.ndarray:
+        reduced = queries @ train.T
+        reduced /= self._norms(queries)[:, None]
+        reduced /= self._norms(train)[None, :]
+        np.subtract(1.0, reduced, out=reduced)
+        return reduced
+
+    def tolerance(self, queries: np.ndarray, train: np.ndarray, kth: np.ndarray) -> np.ndarray:
+        # Le distanze coseno sono comprese tra 0 e 2: l'errore del prodotto matriciale è assoluto
+        relative_tolerance = self.RELATIVE_TOLERANCE if queries.dtype == np.float64 else 1e-4
+        return np.full(kth.shape, relative_tolerance)
+
+    def distances(self, queries: np.ndarray, train: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        dots = np.zeros(candidates.shape)
+        for feature in range(train.shape[1]):
+            dots += np.multiply(train[candidates, feature], queries[:, feature:feature + 1], dtype=np.float64)
+        dots /= self._norms(queries)[:, None]
+        dots /= self._norms(train)[candidates]
+        return 1.0 - dots
+
+    @staticmethod
+    def _norms(points: np.ndarray) -> np.ndarray:
+        """
+        Restituisce le norme dei punti, sostituendo con infinito quelle nulle così che il
+        coseno con un vettore nullo valga 0.
+        """
+        norms = np.sqrt(np.einsum('ij,ij->i', points, points, dtype=np.float64))
+        norms[norms == 0] = np.inf
+        return norms
+
+
+class DistanceMetricFactory:
+    """
+    Questa classe fornisce un metodo statico per ottenere la metrica di distanza dal nome.
+    """
+    METRICS = ('euclidean', 'sqeuclidean', 'manhattan', 'chebyshev', 'minkowski', 'cosine')
+
+    @staticmethod
+    def get_metric(metric: str, p: float = 2) -> DistanceMetric:
+        """
+        Restituisce la metrica di distanza richiesta.
+
+        Args:
+            metric (str): Nome della metrica: 'euclidean', 'sqeuclidean', 'manhattan',
+                          'chebyshev', 'minkowski' o 'cosine'.
+            p (float): Ordine della distanza di Minkowski (default 2).
+
+        Returns:
+            DistanceMetric: La metrica richiesta.
+        """
+        if metric == 'euclidean':
+            return EuclideanDistance()
+        elif metric == 'sqeuclidean':
+            return SquaredEuclideanDistance()
+        elif metric == 'manhattan':
+            return ManhattanDistance()
+        elif metric == 'chebyshev':
+            return ChebyshevDistance()
+        elif metric == 'minkowski':
+            return MinkowskiDistance(p)
+        elif metric == 'cosine':
+            return CosineDistance()
+        else:
+            raise ValueError(f"Metrica non valida. Scegli tra {', '.join(DistanceMetricFactory.METRICS)}.")
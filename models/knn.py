@@ -1,21 +1,111 @@
+import json
+import math
+import os
 import random
 import pandas as pd
 import numpy as np
-from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from .neighbor_search import BruteForceSearch, merge_neighbors, nearest_from_distances
+from .distance_metrics import DistanceMetricFactory
+from .spatial_tree import KDTree, BallTree
+from .ivf_index import IVFIndex
 
 class KNNClassifier:
-    def __init__(self, k=3):
+    # Numero di punti di query elaborati per blocco nel calcolo vettorizzato delle distanze
+    BATCH_BLOCK_SIZE = 1024
+    # Memoria massima indicativa (in byte) per una tessera di distanze query x training
+    MAX_BLOCK_BYTES = 64 * 1024 ** 2
+    # Byte stimati per cella della tessera, inclusi i temporanei di partition e argpartition
+    BYTES_PER_CELL = 48
+
+    # Algoritmi di ricerca dei vicini disponibili ('ivf' è approssimato)
+    ALGORITHMS = ('brute', 'kd_tree', 'ball_tree', 'ivf', 'auto')
+    # Con 'auto' gli alberi vengono usati solo da questo numero di campioni di training
+    # (vedi benchmarks/bench_knn_algorithms.py)
+    AUTO_MIN_SAMPLES = 50000
+    # Con 'auto' il KD-tree viene preferito al ball-tree fino a questo numero di feature
+    AUTO_MAX_KD_FEATURES = 30
+    # Tipi ammessi per la matrice di training convertita in fit
+    DTYPES = (np.float64, np.float32)
+    # Pesi dei vicini nel voto: uniformi o inversamente proporzionali alla distanza
+    WEIGHTS = ('uniform', 'distance')
+    # Con gli alberi e con 'ivf' i campioni aggiunti con partial_fit vengono cercati in modo
+    # esaustivo in coda all'indice, che viene ricostruito quando la coda supera questa
+    # frazione dei campioni indicizzati
+    REBUILD_FRACTION = 0.5
+    # I campioni rimossi con forget vengono eliminati dagli array, ricostruendo l'indice,
+    # quando superano questa frazione dei campioni memorizzati
+    COMPACT_FRACTION = 0.25
+    # Versione del formato dei modelli scritti da save
+    SAVE_FORMAT_VERSION = 1
+    # Classi di ricerca per algoritmo, usate da load per ricostruire l'indice salvato
+    SEARCH_CLASSES = {'brute': BruteForceSearch, 'kd_tree': KDTree, 'ball_tree': BallTree, 'ivf': IVFIndex}
+
+    def __init__(self, k=3, algorithm='brute', leaf_size=40, n_lists=None, n_probe=1, random_state=None, n_jobs=1,
+                 dtype=np.float64, metric='euclidean', p=2, weights='uniform'):
         """
         Inizializza il classificatore KNN con il numero di vicini (k).
+
+        Args:
+            k (int): Numero di vicini (default 3).
+            algorithm (str): Algoritmo di ricerca dei vicini: 'brute', 'kd_tree', 'ball_tree',
+                             'ivf' (approssimato) o 'auto' (default 'brute').
+            leaf_size (int): Numero massimo di campioni per foglia degli alberi (default 40).
+            n_lists (int, optional): Numero di celle dell'indice 'ivf' (default: radice
+                                     quadrata dei campioni di training).
+            n_probe (int): Celle esaminate per ogni query con 'ivf' (default 1). Valori più
+                           alti aumentano il richiamo e il tempo di risposta.
+            random_state (int, optional): Seme per la costruzione dell'indice 'ivf'.
+            n_jobs (int): Numero di thread usati per la ricerca dei vicini nelle predizioni a
+                          batch; -1 usa tutti i core disponibili (default 1).
+            dtype (type): Tipo della matrice di training, np.float64 o np.float32 (default
+                          np.float64). Con np.float32 la memoria si dimezza e, con molte
+                          feature, il prodotto matriciale è più veloce; feature e punti
+                          vengono però arrotondati a precisione singola.
+            metric (str): Metrica di distanza: 'euclidean', 'sqeuclidean', 'manhattan',
+                          'chebyshev', 'minkowski' o 'cosine' (default 'euclidean'). Gli
+                          alberi accettano solo metriche vere: 'sqeuclidean' e 'cosine' sono
+                          disponibili con 'brute' e 'ivf'.
+            p (float): Ordine della distanza di Minkowski (default 2).
+            weights (str): Peso dei vicini nel voto: 'uniform' (ogni vicino vale un voto) o
+                           'distance' (peso pari all'inverso della distanza; i vicini a
+                           distanza nulla, se presenti, ricevono tutto il peso) (default 'uniform').
         """
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Algoritmo non valido. Scegli tra {', '.join(self.ALGORITHMS)}.")
+        if not isinstance(n_jobs, int) or n_jobs == 0 or n_jobs < -1:
+            raise ValueError("n_jobs deve essere un intero positivo oppure -1.")
+        if np.dtype(dtype) not in [np.dtype(allowed) for allowed in self.DTYPES]:
+            raise ValueError("dtype deve essere np.float64 oppure np.float32.")
+        if weights not in self.WEIGHTS:
+            raise ValueError(f"Pesi non validi. Scegli tra {', '.join(self.WEIGHTS)}.")
+        self._metric = DistanceMetricFactory.get_metric(metric, p)
+        if algorithm in ('kd_tree', 'ball_tree') and not self._metric.is_metric:
+            raise ValueError(f"La metrica '{metric}' è disponibile solo con gli algoritmi 'brute' e 'ivf'.")
         self.k = k
-        self.data = None
-        self.labels = None
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.dtype = np.dtype(dtype)
+        self.metric = metric
+        self.p = p
+        self.weights = weights
+        # Array di preprocessing (ad esempio i parametri dello scaling) salvati con il modello
+        self.preprocessing = {}
+        self._search = None
 
     def fit(self, data: pd.DataFrame, labels: pd.Series) -> None:
         """
         Memorizza i dati di training e le rispettive etichette.
 
+        I dati vengono convertiti una sola volta in una matrice NumPy contigua e le etichette
+        in codici interi (con la corrispondenza codice -> classe), così che le predizioni
+        lavorino solo su array, senza allineamento degli indici pandas. `data` e `labels`
+        vengono ricostruiti dagli stessi array, senza conservare gli oggetti originali.
+
         Args:
             data (pd.DataFrame): Dataset di training con le feature.
             labels (pd.Series): Etichette corrispondenti ai dati di training.
@@ -25,59 +115,846 @@ class KNNClassifier:
         if not isinstance(labels, pd.Series):
             raise ValueError("Le etichette devono essere fornite come Pandas Series.")
         
-        self.data = data
-        self.labels = labels
+        if len(data) != len(labels):
+            raise ValueError("I dati e le etichette devono avere lo stesso numero di righe.")
+
+        self._columns = data.columns
+        self._index_name = data.index.name
+        self._label_name = labels.name
+        self._buffer = np.ascontiguousarray(data.to_numpy(dtype=self.dtype))
+        self._classes, self._label_buffer = np.unique(labels.to_numpy(), return_inverse=True)
+        self._index_buffer = data.index.to_numpy()
+        self._removed_buffer = np.zeros(len(data), dtype=bool)
+        self._rows_by_id = None
+        self._size = len(data)
+        self._n_removed = 0
+        self._build_search()
+
+    def partial_fit(self, data: pd.DataFrame, labels: pd.Series) -> None:
+        """
+        Aggiunge campioni di training senza ripetere l'addestramento.
+
+        Le feature, i codici delle etichette e l'indice vengono scritti in buffer la cui
+        capacità raddoppia quando si esaurisce, così che il costo di un'aggiunta sia
+        ammortizzato costante per campione. Con la ricerca esaustiva i nuovi campioni entrano
+        subito nella ricerca; con gli alberi e con 'ivf' vengono cercati in modo esaustivo in
+        coda all'indice, che viene ricostruito solo quando la coda supera `REBUILD_FRACTION`
+        dei campioni indicizzati. Le predizioni coincidono con quelle di un modello addestrato
+        con fit su tutti i campioni (con 'ivf', a meno dell'approssimazione dell'indice).
+        Se il modello non è ancora stato addestrato equivale a fit.
+
+        Args:
+            data (pd.DataFrame): Nuovi campioni, con le stesse colonne dei dati di training.
+            labels (pd.Series): Etichette corrispondenti ai nuovi campioni.
+        """
+        if self._search is None:
+            self.fit(data, labels)
+            return
+        if not isinstance(data, pd.DataFrame):
+            raise ValueError("I dati devono essere forniti come Pandas DataFrame.")
+        if not isinstance(labels, pd.Series):
+            raise ValueError("Le etichette devono essere fornite come Pandas Series.")
+        if len(data) != len(labels):
+            raise ValueError("I dati e le etichette devono avere lo stesso numero di righe.")
+        if not data.columns.equals(self._columns):
+            if len(data.columns) != len(self._columns) or set(data.columns) != set(self._columns):
+                raise ValueError("I nuovi dati devono avere le stesse colonne dei dati di training.")
+            data = data[self._columns]
+        if len(data) == 0:
+            return
+
+        index = data.index.to_numpy()
+        if index.dtype != self._index_buffer.dtype and self._index_buffer.dtype != object:
+            self._index_buffer = self._index_buffer.astype(object)
+
+        # I buffer vengono ingranditi prima di ogni scrittura: quelli caricati da load, mappati
+        # in sola lettura, hanno capacità pari ai campioni e vengono quindi copiati
+        start, end = self._size, self._size + len(data)
+        self._buffer = self._reserve(self._buffer, start, end)
+        self._label_buffer = self._reserve(self._label_buffer, start, end)
+        self._index_buffer = self._reserve(self._index_buffer, start, end)
+        self._removed_buffer = self._reserve(self._removed_buffer, start, end)
+
+        # Le nuove classi vengono inserite nell'ordine crescente, ricodificando le etichette già memorizzate
+        values = labels.to_numpy()
+        classes = np.union1d(self._classes, values)
+        if len(classes) != len(self._classes):
+            remap = np.searchsorted(classes, self._classes)
+            self._label_buffer[:start] = remap[self._label_buffer[:start]]
+            self._classes = classes
+        self._buffer[start:end] = data.to_numpy(dtype=self.dtype)
+        self._label_buffer[start:end] = np.searchsorted(self._classes, values)
+        self._index_buffer[start:end] = index
+        self._removed_buffer[start:end] = False
+        if self._rows_by_id is not None:
+            for row, index_id in enumerate(data.index.tolist(), start):
+                self._rows_by_id.setdefault(index_id, []).append(row)
+        self._size = end
+        self._sync_search()
+
+    def forget(self, index_ids) -> int:
+        """
+        Rimuove dal training i campioni con le etichette di indice indicate.
+
+        Le righe dei campioni vengono cercate in una tabella etichetta -> righe, costruita alla
+        prima rimozione e aggiornata da partial_fit, quindi il costo dipende solo dalle
+        etichette indicate. I campioni vengono solo segnati come rimossi e la ricerca li
+        esclude senza ricostruire l'indice. Gli array vengono compattati, ricostruendo l'indice, solo quando i campioni
+        rimossi superano `COMPACT_FRACTION` dei campioni memorizzati, così che il costo della
+        compattazione sia ammortizzato sulle rimozioni. L'ordine dei campioni rimasti non
+        cambia, quindi i pareggi vengono risolti come in un modello addestrato con fit sui soli
+        campioni rimasti.
+
+        Args:
+            index_ids: Etichetta o lista di etichette dell'indice dei campioni da rimuovere.
+
+        Returns:
+            int: Numero di campioni rimossi.
+        """
+        if self._search is None:
+            raise ValueError("Il modello non è stato addestrato. Usa il metodo 'fit' prima di rimuovere campioni.")
+        if not pd.api.types.is_list_like(index_ids):
+            index_ids = [index_ids]
+
+        if self._rows_by_id is None:
+            self._rows_by_id = {}
+            for row, index_id in enumerate(pd.Index(self._index_buffer[:self._size]).tolist()):
+                self._rows_by_id.setdefault(index_id, []).append(row)
+        index_ids = [index_id for index_id in dict.fromkeys(index_ids) if index_id in self._rows_by_id]
+        rows = [row for index_id in index_ids for row in self._rows_by_id[index_id]]
+        if len(rows) == 0:
+            return 0
+        if len(rows) == self._size - self._n_removed:
+            raise ValueError("Non è possibile rimuovere tutti i campioni di training.")
+
+        for index_id in index_ids:
+            del self._rows_by_id[index_id]
+        self._removed_buffer[rows] = True
+        self._n_removed += len(rows)
+        if self._n_removed > self.COMPACT_FRACTION * self._size:
+            self._compact()
+        else:
+            self._sync_search()
+        return len(rows)
+
+    def save(self, path: str, preprocessing: dict[str, np.ndarray] = None) -> None:
+        """
+        Salva il modello addestrato nella cartella `path`.
+
+        Ogni array (matrice di training, codici delle etichette, classi, indice delle righe,
+        array dell'indice di ricerca e di preprocessing) viene scritto in un file `.npy`
+        separato, così che `load` possa mapparlo in memoria senza copiarlo; i parametri del
+        classificatore, le colonne e lo schema dei file sono in `meta.json`. I campioni rimossi
+        con forget e quelli aggiunti in coda all'indice vengono prima integrati nell'indice.
+
+        Args:
+            path (str): Cartella di destinazione, creata se non esiste.
+            preprocessing (dict[str, np.ndarray], optional): Array aggiuntivi da salvare con il
+                modello, ad esempio i parametri dello scaling (default: `self.preprocessing`).
+        """
+        if self._search is None:
+            raise ValueError("Il modello non è stato addestrato. Usa il metodo 'fit' prima di salvarlo.")
+        preprocessing = self.preprocessing if preprocessing is None else preprocessing
+        if any(not isinstance(name, str) or not name.isidentifier() for name in preprocessing):
+            raise ValueError("I nomi degli array di preprocessing devono essere identificatori validi.")
+        if self._n_removed or self._n_indexed < self._size:
+            self._compact()
+
+        os.makedirs(path, exist_ok=True)
+        search_params, search_arrays = self._search.get_state()
+        arrays = {'train': self._train, 'label_codes': self._label_codes, 'classes': self._classes,
+                  'index': self._index_buffer[:self._size]}
+        arrays.update({'search.' + name: value for name, value in search_arrays.items()})
+        arrays.update({'preprocessing.' + name: value for name, value in preprocessing.items()})
+        object_arrays = [name for name, value in arrays.items() if self._save_array(path, name, value)]
+
+        meta = {
+            'format_version': self.SAVE_FORMAT_VERSION,
+            'params': {'k': self.k, 'algorithm': self.algorithm, 'leaf_size': self.leaf_size,
+                       'n_lists': self.n_lists, 'n_probe': self.n_probe, 'random_state': self.random_state,
+                       'n_jobs': self.n_jobs, 'dtype': self.dtype.name, 'metric': self.metric, 'p': self.p,
+                       'weights': self.weights},
+            'columns': self._columns.tolist(),
+            'index_name': self._index_name,
+            'label_name': self._label_name,
+            'search': {'algorithm': self._search_algorithm, 'dtype': self._search.data.dtype.name,
+                       'params': search_params},
+            'preprocessing': list(preprocessing),
+            'object_arrays': object_arrays,
+        }
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as file:
+            # Gli scalari NumPy (ad esempio k passato come np.int64) vengono salvati come scalari Python
+            json.dump(meta, file, indent=2, default=lambda value: value.item())
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'KNNClassifier':
+        """
+        Carica un modello salvato con `save`.
+
+        Con `mmap` gli array vengono mappati in memoria in sola lettura: il caricamento non
+        legge i dati dal disco e più processi che caricano lo stesso modello condividono le
+        pagine attraverso la cache del sistema operativo. Dopo il caricamento `data` contiene
+        le feature già convertite nel tipo del modello.
+
+        Args:
+            path (str): Cartella scritta da `save`.
+            mmap (bool): Se True, mappa gli array in memoria invece di leggerli (default True).
+
+        Returns:
+            KNNClassifier: Il modello addestrato, con gli array di preprocessing in `preprocessing`.
+        """
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as file:
+            meta = json.load(file)
+        if meta.get('format_version') != cls.SAVE_FORMAT_VERSION:
+            raise ValueError("Formato del modello salvato non supportato.")
+
+        def read(name: str) -> np.ndarray:
+            if name in meta['object_arrays']:
+                return np.load(os.path.join(path, name + '.npy')).astype(object)
+            return np.load(os.path.join(path, name + '.npy'), mmap_mode='r' if mmap else None)
+
+        knn = cls(**meta['params'])
+        knn.preprocessing = {name: read('preprocessing.' + name) for name in meta['preprocessing']}
+        knn._columns = pd.Index(meta['columns'])
+        knn._buffer = read('train')
+        knn._label_buffer = read('label_codes')
+        knn._classes = read('classes')
+        knn._index_buffer = read('index')
+        knn._size = len(knn._buffer)
+        knn._index_name = meta['index_name']
+        knn._label_name = meta['label_name']
+        knn._removed_buffer = np.zeros(knn._size, dtype=bool)
+        knn._rows_by_id = None
+        knn._n_removed = 0
+
+        search = meta['search']
+        search_class = cls.SEARCH_CLASSES[search['algorithm']]
+        arrays = {name: read('search.' + name) for name in search_class.STATE_ARRAYS}
+        knn._search = search_class.from_state(knn._buffer, search['params'], arrays, np.dtype(search['dtype']),
+                                              knn._metric)
+        knn._search_algorithm = search['algorithm']
+        knn._n_indexed = knn._size
+        knn._sync_search()
+        return knn
+
+    @staticmethod
+    def _save_array(path: str, name: str, array: np.ndarray) -> bool:
+        """
+        Scrive un array in `<path>/<name>.npy`. Gli array di oggetti Python (ad esempio
+        etichette stringa) vengono convertiti in un tipo NumPy nativo, così che il file non
+        richieda pickle.
+
+        Returns:
+            bool: True se l'array era di oggetti e va riconvertito al caricamento.
+        """
+        array = np.asarray(array)
+        is_object = array.dtype == object
+        if is_object:
+            converted = np.array(array.tolist())
+            if converted.dtype == object or converted.shape != array.shape or \
+                    converted.astype(object).tolist() != array.tolist():
+                raise ValueError(f"L'array '{name}' contiene valori che non possono essere salvati.")
+            array = converted
+        np.save(os.path.join(path, name + '.npy'), array)
+        return is_object
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """
+        Dati di training correnti, con le feature già convertite nel tipo del modello: i
+        campioni aggiunti con fit e partial_fit e non rimossi, nell'ordine di inserimento.
+        Senza campioni rimossi il DataFrame è una vista sul buffer di training.
+        """
+        if self._search is None:
+            return None
+        rows = self._live_rows()
+        return pd.DataFrame(self._buffer[rows], index=self._live_index(rows), columns=self._columns, copy=False)
+
+    @property
+    def labels(self) -> pd.Series:
+        """
+        Etichette dei dati di training correnti.
+        """
+        if self._search is None:
+            return None
+        rows = self._live_rows()
+        return pd.Series(self._classes[self._label_buffer[rows]], index=self._live_index(rows), name=self._label_name)
+
+    def _live_rows(self) -> slice | np.ndarray:
+        """
+        Restituisce le righe dei buffer occupate da campioni non rimossi.
+        """
+        if self._n_removed:
+            return np.flatnonzero(~self._removed_buffer[:self._size])
+        return slice(0, self._size)
+
+    def _live_index(self, rows: slice | np.ndarray) -> pd.Index:
+        """
+        Restituisce l'indice pandas delle righe indicate.
+        """
+        return pd.Index(self._index_buffer[rows], name=self._index_name)
+
+    @staticmethod
+    def _reserve(buffer: np.ndarray, size: int, needed: int) -> np.ndarray:
+        """
+        Restituisce un buffer con spazio per almeno `needed` righe. Se la capacità non basta,
+        viene allocato un buffer di capacità doppia in cui vengono copiate le prime `size` righe.
+
+        Args:
+            buffer (np.ndarray): Buffer attuale.
+            size (int): Righe occupate.
+            needed (int): Righe richieste.
+
+        Returns:
+            np.ndarray: Il buffer attuale oppure quello ingrandito.
+        """
+        if needed <= len(buffer):
+            return buffer
+        grown = np.empty((max(needed, 2 * len(buffer)),) + buffer.shape[1:], dtype=buffer.dtype)
+        grown[:size] = buffer[:size]
+        return grown
+
+    def _compact(self) -> None:
+        """
+        Elimina dagli array i campioni rimossi, mantenendo l'ordine degli altri, e ricostruisce
+        l'indice di ricerca.
+        """
+        keep = np.flatnonzero(~self._removed_buffer[:self._size])
+        self._buffer = self._buffer[keep]
+        self._label_buffer = self._label_buffer[keep]
+        self._index_buffer = self._index_buffer[keep]
+        self._removed_buffer = np.zeros(len(keep), dtype=bool)
+        # Le righe cambiano: la tabella etichetta -> righe viene ricostruita alla prossima rimozione
+        self._rows_by_id = None
+        self._size = len(keep)
+        self._n_removed = 0
+        self._build_search()
+
+    def _build_search(self) -> None:
+        """
+        Costruisce l'indice di ricerca su tutti i campioni memorizzati.
+        """
+        train = self._buffer[:self._size]
+        algorithm = self._resolve_algorithm((self._size - self._n_removed, train.shape[1]))
+        if algorithm == 'kd_tree':
+            self._search = KDTree(train, self.leaf_size, dtype=self.dtype, metric=self._metric)
+        elif algorithm == 'ball_tree':
+            self._search = BallTree(train, self.leaf_size, dtype=self.dtype, metric=self._metric)
+        elif algorithm == 'ivf':
+            self._search = IVFIndex(train, self.n_lists, self.n_probe, random_state=self.random_state,
+                                    dtype=self.dtype, metric=self._metric)
+        else:
+            self._search = BruteForceSearch(train, dtype=self.dtype, metric=self._metric)
+        self._search_algorithm = algorithm
+        self._n_indexed = self._size
+        self._sync_search()
+
+    def _sync_search(self) -> None:
+        """
+        Aggiorna le viste sugli array di training e le maschere dei campioni rimossi usate
+        dalla ricerca dopo ogni aggiunta o rimozione. La ricerca esaustiva lavora direttamente
+        sulla vista del buffer; per gli altri algoritmi i campioni non indicizzati formano una
+        coda cercata in modo esaustivo, e l'indice viene ricostruito quando la coda diventa
+        troppo lunga o quando 'auto' sceglierebbe un algoritmo diverso.
+        """
+        size = self._size
+        n_features = self._buffer.shape[1]
+        tail_too_long = self._search_algorithm != 'brute' and size - self._n_indexed > self.REBUILD_FRACTION * self._n_indexed
+        if tail_too_long or self._resolve_algorithm((size - self._n_removed, n_features)) != self._search_algorithm:
+            self._build_search()
+            return
+
+        self._train = self._buffer[:size]
+        self._label_codes = self._label_buffer[:size]
+        if self._search_algorithm == 'brute':
+            self._search.data = self._train
+            self._n_indexed = size
+        removed = self._removed_buffer[:size] if self._n_removed else None
+        self._search.removed = None if removed is None else removed[:self._n_indexed]
+        if self._n_indexed < size:
+            self._tail_search = BruteForceSearch(self._train[self._n_indexed:], dtype=self.dtype, metric=self._metric)
+            self._tail_search.removed = None if removed is None else removed[self._n_indexed:]
+        else:
+            self._tail_search = None
+
+    def _query(self, queries: np.ndarray, k: int, block_rows: int = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Cerca i vicini nell'indice e tra i campioni in coda, escludendo quelli rimossi.
+
+        Args:
+            queries (np.ndarray): Punti da cercare (n_query x n_feature).
+            k (int): Numero di vicini.
+            block_rows (int, optional): Campioni di training per blocco.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Distanze e posizioni negli array di training,
+                                           compresi i campioni rimossi (n_query x min(k, n_train)).
+        """
+        k = min(k, self._size - self._n_removed)
+        distances, positions = self._search.query(queries, k, block_rows)
+        if self._tail_search is not None:
+            tail_distances, tail_positions = self._tail_search.query(queries, k, block_rows)
+            distances, positions = merge_neighbors(
+                np.concatenate([distances, tail_distances], axis=1),
+                np.concatenate([positions, tail_positions + self._n_indexed], axis=1),
+                k,
+            )
+        return distances[:, :k], positions[:, :k]
+
+    def _live_positions(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Converte le posizioni negli array di training in posizioni tra i soli campioni non rimossi.
+        """
+        if not self._n_removed:
+            return positions
+        return (np.cumsum(~self._removed_buffer[:self._size]) - 1)[positions]
+
+    def _buffer_positions(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Converte le posizioni tra i campioni non rimossi in posizioni negli array di training.
+        """
+        if not self._n_removed:
+            return positions
+        return np.flatnonzero(~self._removed_buffer[:self._size])[positions]
+
+    def _resolve_algorithm(self, shape: tuple[int, int]) -> str:
+        """
+        Sceglie l'algoritmo di ricerca effettivo. Con 'auto' la ricerca esaustiva vettorizzata
+        resta la più veloce sui dataset piccoli; sui più grandi si usa il KD-tree se le
+        feature sono poche, altrimenti il ball-tree. 'auto' non sceglie mai l'indice
+        approssimato 'ivf' e, per le metriche non supportate dagli alberi, resta sulla
+        ricerca esaustiva.
+
+        Args:
+            shape (tuple[int, int]): Dimensioni del dataset di training.
+
+        Returns:
+            str: 'brute', 'kd_tree', 'ball_tree' o 'ivf'.
+        """
+        if self.algorithm != 'auto':
+            return self.algorithm
+        n_samples, n_features = shape
+        if n_samples < self.AUTO_MIN_SAMPLES or not self._metric.is_metric:
+            return 'brute'
+        return 'kd_tree' if n_features <= self.AUTO_MAX_KD_FEATURES else 'ball_tree'
 
     def predict(self, point: pd.Series) -> int:
         """
         Classifica un singolo punto utilizzando i dati di training.
 
+        Il punto viene convertito in array e cercato con la stessa ricerca di `predict_batch`;
+        i vicini sono ordinati per distanza e, a parità di distanza, per posizione, e i
+        pareggi tra classi vengono risolti con `random.choice`.
+
         Args:
             point (pd.Series): Il punto da classificare.
 
         Returns:
             Etichetta predetta.
         """
-        if self.data is None or self.labels is None:
+        if self._search is None:
             raise ValueError("Il modello non è stato addestrato. Usa il metodo 'fit' prima di predire.")
         
         if not isinstance(point, pd.Series):
             raise ValueError("Il punto deve essere un Pandas Series.")
-        
-        # Calcolo delle distanze euclidee
-        distances = np.sqrt(((self.data - point) ** 2).sum(axis=1))
-        
-        # Selezione dei k vicini più vicini
-        nearest_neighbors = distances.nsmallest(self.k).index
-        
-        # Determinazione della classe più frequente
-        nearest_labels = self.labels.loc[nearest_neighbors]
-        label_count = Counter(nearest_labels)
-        most_common = label_count.most_common()
-        max_count = most_common[0][1]  # Frequenza più alta
-
-        # Gestione del caso di pareggio
-        tied_classes = [label for label, count in most_common if count == max_count]
-        if len(tied_classes) > 1:
-            # Scegli una classe casualmente in caso di pareggio
-            return random.choice(tied_classes)
-        else:
-            # Restituisci la classe più comune
-            return tied_classes[0]
 
+        distances, neighbors = self._query(self._as_queries(point), self.k)
+        code = self._predict_codes(neighbors, distances)[0][0]
+        # tolist restituisce scalari Python, come le etichette contate in origine con Counter
+        return self._classes[code:code + 1].tolist()[0]
 
-    def predict_batch(self, points: pd.DataFrame) -> pd.Series:
+    def predict_batch(self, points: pd.DataFrame, chunk_size: int = None, max_bytes: int = None) -> pd.Series:
         """
         Classifica un batch di punti utilizzando i dati di training.
 
+        Le distanze vengono calcolate a tessere (blocchi di query x blocchi di training) con
+        il kernel vettorizzato della metrica (per la distanza euclidea il prodotto matriciale
+        ||a||² + ||b||² - 2ab, senza radice), i vicini vengono selezionati con
+        `argpartition` e i voti contati con `bincount`. Per ogni query viene mantenuta una
+        classifica dei k vicini migliori, aggiornata dopo ogni blocco di training, così che la
+        memoria di picco dipenda solo dalla dimensione delle tessere e non dal dataset.
+        Il risultato coincide con quello di `predict` applicato riga per riga, compresa la
+        gestione dei pareggi. Se in fit è stato costruito un indice spaziale, le query
+        vengono risolte con la ricerca con potatura dell'indice.
+
         Args:
             points (pd.DataFrame): Dataset di punti da classificare.
+            chunk_size (int, optional): Numero di query per blocco (default BATCH_BLOCK_SIZE).
+            max_bytes (int, optional): Memoria massima indicativa per una tessera di distanze
+                                       (default MAX_BLOCK_BYTES).
 
         Returns:
             pd.Series: Etichette predette per ogni punto.
         """
+        if self._search is None:
+            raise ValueError("Il modello non è stato addestrato. Usa il metodo 'fit' prima di predire.")
+
         if not isinstance(points, pd.DataFrame):
             raise ValueError("I punti devono essere forniti come Pandas DataFrame.")
-        
-        predictions = points.apply(self.predict, axis=1)
-        return predictions
+
+        predicted_codes = np.empty(len(points), dtype=np.intp)
+        for start, distances, neighbors in self._iter_neighbors(points, self.k, chunk_size, max_bytes):
+            predicted_codes[start:start + len(neighbors)] = self._predict_codes(neighbors, distances)[0]
+
+        return pd.Series(self._classes[predicted_codes], index=points.index)
+
+    def predict_proba_batch(self, points: pd.DataFrame, chunk_size: int = None, max_bytes: int = None,
+                            return_predictions: bool = False) -> pd.DataFrame | tuple[pd.DataFrame, pd.Series]:
+        """
+        Restituisce, per ogni punto, la frazione dei voti ottenuta da ogni classe tra i k
+        vicini; con `weights='distance'` i voti sono pesati con l'inverso della distanza.
+
+        Le probabilità vengono calcolate dalla stessa ricerca dei vicini di `predict_batch`
+        e, con `return_predictions`, insieme alle etichette predette, senza una seconda
+        ricerca. Le etichette coincidono con quelle di `predict_batch`, compresa la gestione
+        dei pareggi; senza `return_predictions` non viene consumata alcuna scelta casuale.
+
+        Args:
+            points (pd.DataFrame): Dataset di punti da classificare.
+            chunk_size (int, optional): Numero di query per blocco.
+            max_bytes (int, optional): Memoria massima indicativa per una tessera di distanze.
+            return_predictions (bool): Se True, restituisce anche le etichette predette.
+
+        Returns:
+            pd.DataFrame | tuple[pd.DataFrame, pd.Series]: Probabilità (una colonna per classe,
+                in ordine crescente) ed eventualmente le etichette predette.
+        """
+        if self._search is None:
+            raise ValueError("Il modello non è stato addestrato. Usa il metodo 'fit' prima di predire.")
+
+        if not isinstance(points, pd.DataFrame):
+            raise ValueError("I punti devono essere forniti come Pandas DataFrame.")
+
+        probabilities = np.empty((len(points), len(self._classes)))
+        predicted_codes = np.empty(len(points), dtype=np.intp)
+        for start, distances, neighbors in self._iter_neighbors(points, self.k, chunk_size, max_bytes):
+            neighbor_codes = self._label_codes[neighbors]
+            scores = self._class_scores(neighbor_codes, len(self._classes), self._neighbor_weights(distances))
+            rows = slice(start, start + len(neighbors))
+            probabilities[rows] = scores / scores.sum(axis=1, keepdims=True)
+            if return_predictions:
+                predicted_codes[rows] = self._vote(neighbor_codes, scores)
+
+        probabilities = pd.DataFrame(probabilities, index=points.index, columns=self._classes)
+        if return_predictions:
+            return probabilities, pd.Series(self._classes[predicted_codes], index=points.index)
+        return probabilities
+
+    def predict_from_distances(self, distances: np.ndarray, index: pd.Index = None) -> pd.Series:
+        """
+        Classifica un batch di punti a partire dalle distanze già calcolate tra i punti e i
+        campioni di training, ad esempio estratte da una `DistanceCache`.
+
+        Args:
+            distances (np.ndarray): Distanze (n_punti x n_train), con le colonne nell'ordine
+                                    dei dati di training correnti (`data`).
+            index (pd.Index, optional): Indice da assegnare alle predizioni.
+
+        Returns:
+            pd.Series: Etichette predette per ogni punto.
+        """
+        if self._search is None:
+            raise ValueError("Il modello non è stato addestrato. Usa il metodo 'fit' prima di predire.")
+        if distances.ndim != 2 or distances.shape[1] != self._size - self._n_removed:
+            raise ValueError("La matrice delle distanze deve avere una colonna per ogni campione di training.")
+
+        neighbor_distances, neighbors = nearest_from_distances(distances, self.k)
+        return self.predict_from_neighbors(neighbors, index, neighbor_distances)
+
+    def predict_from_neighbors(self, neighbors: np.ndarray, index: pd.Index = None,
+                               distances: np.ndarray = None) -> pd.Series:
+        """
+        Classifica un batch di punti a partire dalle posizioni dei vicini già trovate, ad
+        esempio con `kneighbors`. Tutti i vicini passati partecipano al voto: per un valore
+        di k inferiore basta passare le prime k colonne, poiché i vicini sono ordinati.
+
+        Args:
+            neighbors (np.ndarray): Posizioni nel training set dei vicini (n_punti x k).
+            index (pd.Index, optional): Indice da assegnare alle predizioni.
+            distances (np.ndarray, optional): Distanze dei vicini, richieste con
+                                              `weights='distance'`.
+
+        Returns:
+            pd.Series: Etichette predette per ogni punto.
+        """
+        if self._search is None:
+            raise ValueError("Il modello non è stato addestrato. Usa il metodo 'fit' prima di predire.")
+        if self.weights == 'distance' and distances is None:
+            raise ValueError("Con weights='distance' occorre fornire le distanze dei vicini.")
+
+        predicted_codes = self._predict_codes(self._buffer_positions(neighbors), distances)[0]
+        return pd.Series(self._classes[predicted_codes], index=index)
+
+    def predict_batch_multi_k(self, points: pd.DataFrame, ks: list[int], chunk_size: int = None,
+                              max_bytes: int = None) -> dict[int, pd.Series]:
+        """
+        Classifica un batch di punti per più valori di k con una sola ricerca dei vicini.
+
+        I vicini vengono cercati una volta sola fino al k massimo; poiché sono ordinati per
+        distanza e, a parità di distanza, per posizione, i primi k di questa lista coincidono
+        con i k vicini di una ricerca separata. Le predizioni per ogni k coincidono quindi con
+        quelle di `predict_batch`; i pareggi vengono risolti nell'ordine dei valori di `ks`.
+
+        Args:
+            points (pd.DataFrame): Dataset di punti da classificare.
+            ks (list[int]): Valori di k da valutare.
+            chunk_size (int, optional): Numero di query per blocco.
+            max_bytes (int, optional): Memoria massima indicativa per una tessera di distanze.
+
+        Returns:
+            dict[int, pd.Series]: Etichette predette per ogni valore di k.
+        """
+        ks = self._validate_ks(ks)
+        distances, neighbors = self.kneighbors(points, max(ks), chunk_size, max_bytes)
+        return {k: self.predict_from_neighbors(neighbors[:, :k], points.index, distances[:, :k]) for k in ks}
+
+    @staticmethod
+    def _validate_ks(ks: list[int]) -> list[int]:
+        """
+        Verifica una lista di valori di k e ne rimuove i duplicati, mantenendo l'ordine.
+
+        Args:
+            ks (list[int]): Valori di k.
+
+        Returns:
+            list[int]: Valori di k distinti.
+        """
+        ks = list(dict.fromkeys(ks))
+        if not ks or any(isinstance(k, bool) or not isinstance(k, (int, np.integer)) or k <= 0 for k in ks):
+            raise ValueError("I valori di k devono essere interi positivi.")
+        return [int(k) for k in ks]
+
+    def kneighbors(self, points: pd.DataFrame, k: int = None, chunk_size: int = None,
+                   max_bytes: int = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Restituisce distanze e posizioni nel training set dei vicini di ogni punto, ordinati
+        per distanza crescente e, a parità di distanza, per posizione.
+
+        Args:
+            points (pd.DataFrame): Dataset di punti da cercare.
+            k (int, optional): Numero di vicini (default: il k del classificatore).
+            chunk_size (int, optional): Numero di query per blocco.
+            max_bytes (int, optional): Memoria massima indicativa per una tessera di distanze.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Distanze e posizioni (n_punti x k).
+        """
+        if self._search is None:
+            raise ValueError("Il modello non è stato addestrato. Usa il metodo 'fit' prima di predire.")
+        if not isinstance(points, pd.DataFrame):
+            raise ValueError("I punti devono essere forniti come Pandas DataFrame.")
+
+        k = min(self.k if k is None else k, self._size - self._n_removed)
+        distances = np.empty((len(points), k))
+        positions = np.empty((len(points), k), dtype=np.intp)
+        for start, block_distances, block_positions in self._iter_neighbors(points, k, chunk_size, max_bytes):
+            distances[start:start + len(block_positions)] = block_distances
+            positions[start:start + len(block_positions)] = block_positions
+        return distances, self._live_positions(positions)
+
+    def recall_at_k(self, points: pd.DataFrame, k: int = None, sample_size: int = None) -> float:
+        """
+        Misura il richiamo (recall@k) della ricerca dei vicini rispetto alla ricerca esatta
+        esaustiva: la frazione dei veri k vicini che viene effettivamente restituita.
+        Utile per calibrare `n_probe` dell'indice approssimato 'ivf'.
+
+        Args:
+            points (pd.DataFrame): Punti di verifica, non usati per l'addestramento.
+            k (int, optional): Numero di vicini (default: il k del classificatore).
+            sample_size (int, optional): Se indicato, il richiamo viene misurato su un
+                                         campione casuale di questa dimensione.
+
+        Returns:
+            float: Recall@k compreso tra 0 e 1.
+        """
+        if self._search is None:
+            raise ValueError("Il modello non è stato addestrato. Usa il metodo 'fit' prima di predire.")
+        if sample_size is not None and sample_size < len(points):
+            points = points.sample(sample_size, random_state=self.random_state)
+
+        k = min(self.k if k is None else k, self._size - self._n_removed)
+        found = np.concatenate([np.empty((0, k), dtype=np.intp)] +
+                               [positions for _, _, positions in self._iter_neighbors(points, k)])
+        if found.size == 0:
+            return 1.0
+        exact_search = BruteForceSearch(self._train, dtype=self.dtype, metric=self._metric)
+        exact_search.removed = self._removed_buffer[:self._size] if self._n_removed else None
+        exact = np.concatenate([positions for _, _, positions in
+                                self._iter_neighbors(points, found.shape[1], search=exact_search)])
+        hits = (found[:, :, None] == exact[:, None, :]).any(axis=2).sum()
+        return float(hits / exact.size)
+
+    def _iter_neighbors(self, points: pd.DataFrame, k: int, chunk_size: int = None, max_bytes: int = None,
+                        search=None):
+        """
+        Scorre i punti a blocchi di query e restituisce, per ogni blocco, la posizione
+        iniziale e le distanze e posizioni dei vicini trovati.
+
+        Args:
+            points (pd.DataFrame): Dataset di punti da cercare.
+            k (int): Numero di vicini.
+            chunk_size (int, optional): Numero di query per blocco.
+            max_bytes (int, optional): Memoria massima indicativa per una tessera di distanze.
+            search (NeighborSearch, optional): Ricerca da usare al posto di quella del modello.
+
+        Yields:
+            tuple[int, np.ndarray, np.ndarray]: (inizio del blocco, distanze, posizioni negli
+                                                array di training).
+        """
+        if chunk_size is not None and (not isinstance(chunk_size, int) or chunk_size <= 0):
+            raise ValueError("chunk_size deve essere un intero positivo.")
+        if max_bytes is not None and (not isinstance(max_bytes, int) or max_bytes <= 0):
+            raise ValueError("max_bytes deve essere un intero positivo.")
+
+        queries = self._as_queries(points)
+
+        n_jobs = (os.cpu_count() or 1) if self.n_jobs == -1 else self.n_jobs
+        if n_jobs > 1:
+            # Il budget di memoria è condiviso tra i thread che lavorano contemporaneamente
+            max_bytes = (self.MAX_BLOCK_BYTES if max_bytes is None else max_bytes) // n_jobs
+            chunk_size = min(chunk_size or self.BATCH_BLOCK_SIZE, max(1, -(-len(queries) // n_jobs)))
+        n_train = self._size if search is None else len(search.data)
+        query_rows, train_rows = self._tile_shape(len(queries), n_train, chunk_size, max_bytes)
+        starts = range(0, len(queries), query_rows)
+
+        def search_block(start: int) -> tuple[int, np.ndarray, np.ndarray]:
+            block = queries[start:start + query_rows]
+            if search is None:
+                distances, positions = self._query(block, k, train_rows)
+            else:
+                distances, positions = search.query(block, k, train_rows)
+            return start, distances, positions
+
+        if n_jobs == 1 or len(starts) <= 1:
+            yield from map(search_block, starts)
+            return
+
+        # I thread condividono i dati di training senza copiarli: le operazioni NumPy più
+        # costose (prodotto matriciale, partition) rilasciano il GIL. I blocchi vengono
+        # restituiti nell'ordine delle query, così che il voto resti deterministico.
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            yield from executor.map(search_block, starts)
+
+    def _as_queries(self, points: pd.Series | pd.DataFrame) -> np.ndarray:
+        """
+        Converte uno o più punti in una matrice contigua con le colonne nell'ordine dei dati
+        di training. Le colonne vengono riordinate solo se necessario.
+
+        Args:
+            points (pd.Series | pd.DataFrame): Un punto oppure un dataset di punti.
+
+        Returns:
+            np.ndarray: Matrice dei punti (n_punti x n_feature) nel tipo dei dati di training.
+        """
+        if isinstance(points, pd.Series):
+            values = points if points.index.equals(self._columns) else points[self._columns]
+            return np.ascontiguousarray(values.to_numpy(dtype=self.dtype)[None, :])
+        values = points if points.columns.equals(self._columns) else points[self._columns]
+        return np.ascontiguousarray(values.to_numpy(dtype=self.dtype))
+
+    def _tile_shape(self, n_queries: int, n_train: int, chunk_size: int = None, max_bytes: int = None) -> tuple[int, int]:
+        """
+        Determina il numero di query e di campioni di training per ogni tessera di distanze,
+        in modo da rispettare il budget di memoria.
+
+        Args:
+            n_queries (int): Numero di punti da classificare.
+            n_train (int): Numero di campioni di training.
+            chunk_size (int, optional): Numero di query per blocco richiesto.
+            max_bytes (int, optional): Memoria massima per una tessera.
+
+        Returns:
+            tuple[int, int]: (query per tessera, campioni di training per tessera).
+        """
+        budget = self.MAX_BLOCK_BYTES if max_bytes is None else max_bytes
+        cells = max(budget // self.BYTES_PER_CELL, 1)
+        query_rows = chunk_size if chunk_size is not None else self.BATCH_BLOCK_SIZE
+        query_rows = max(1, min(query_rows, n_queries))
+        # Blocchi di training troppo stretti renderebbero dominante il costo delle fusioni:
+        # se il budget è ridotto si rinuncia piuttosto a parte delle query per blocco
+        train_rows = max(1, min(n_train, max(cells // query_rows, math.isqrt(cells))))
+        query_rows = max(1, min(query_rows, cells // train_rows))
+        return query_rows, train_rows
+
+    def _predict_codes(self, neighbors: np.ndarray, distances: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Conta i voti (eventualmente pesati) dei vicini e determina la classe predetta.
+
+        Args:
+            neighbors (np.ndarray): Posizioni dei vicini (n_query x k).
+            distances (np.ndarray, optional): Distanze dei vicini (n_query x k).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Codici delle classi predette e punteggi per classe.
+        """
+        neighbor_codes = self._label_codes[neighbors]
+        scores = self._class_scores(neighbor_codes, len(self._classes), self._neighbor_weights(distances))
+        return self._vote(neighbor_codes, scores), scores
+
+    def _neighbor_weights(self, distances: np.ndarray = None) -> np.ndarray:
+        """
+        Restituisce i pesi dei vicini nel voto, oppure None per i pesi uniformi.
+
+        Con `weights='distance'` il peso è l'inverso della distanza; nelle righe con vicini a
+        distanza nulla solo questi ultimi ricevono un peso, pari a 1.
+
+        Args:
+            distances (np.ndarray, optional): Distanze dei vicini (n_query x k).
+
+        Returns:
+            np.ndarray: Pesi dei vicini (n_query x k), oppure None.
+        """
+        if self.weights == 'uniform':
+            return None
+        with np.errstate(divide='ignore'):
+            weights = 1.0 / distances
+        exact = np.isinf(weights)
+        exact_rows = exact.any(axis=1)
+        weights[exact_rows] = exact[exact_rows]
+        return weights
+
+    @staticmethod
+    def _class_scores(neighbor_codes: np.ndarray, n_classes: int, weights: np.ndarray = None) -> np.ndarray:
+        """
+        Somma i voti dei vicini per ogni classe con un unico `bincount`.
+
+        Args:
+            neighbor_codes (np.ndarray): Codici delle classi dei vicini (n_query x k).
+            n_classes (int): Numero di classi distinte.
+            weights (np.ndarray, optional): Pesi dei vicini (n_query x k); se assenti ogni
+                                            vicino vale un voto.
+
+        Returns:
+            np.ndarray: Punteggio di ogni classe (n_query x n_classes).
+        """
+        n_rows = len(neighbor_codes)
+        offsets = np.arange(n_rows)[:, None] * n_classes
+        scores = np.bincount((offsets + neighbor_codes).ravel(), None if weights is None else weights.ravel(),
+                             minlength=n_rows * n_classes)
+        return scores.reshape(n_rows, n_classes)
+
+    @staticmethod
+    def _vote(neighbor_codes: np.ndarray, scores: np.ndarray) -> np.ndarray:
+        """
+        Determina la classe con il punteggio più alto per ogni query.
+
+        In caso di pareggio la classe viene scelta con `random.choice` tra le classi in
+        parità, elencate nell'ordine in cui compaiono tra i vicini, come in `predict`.
+
+        Args:
+            neighbor_codes (np.ndarray): Codici delle classi dei vicini (n_query x k).
+            scores (np.ndarray): Punteggio di ogni classe (n_query x n_classes).
+
+        Returns:
+            np.ndarray: Codice della classe predetta per ogni query.
+        """
+        max_scores = scores.max(axis=1)
+        winners = scores.argmax(axis=1)
+
+        # Gestione del caso di pareggio
+        tied_rows = np.flatnonzero((scores == max_scores[:, None]).sum(axis=1) > 1)
+        for row in tied_rows:
+            tied_classes = [code for code in dict.fromkeys(neighbor_codes[row].tolist())
+                            if scores[row, code] == max_scores[row]]
+            winners[row] = random.choice(tied_classes)
+        return winners
@@ -0,0 +1,203 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from .distance_metrics import DistanceMetric, EuclideanDistance
+
+
+def merge_neighbors(distances: np.ndarray, positions: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Seleziona i k vicini migliori di ogni query ordinandoli per distanza e, a parità di
+    distanza, per posizione nel training set.
+
+    Args:
+        distances (np.ndarray): Distanze dei candidati (n_query x n_candidati).
+        positions (np.ndarray): Posizioni dei candidati (n_query x n_candidati).
+        k (int): Numero di vicini da mantenere.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Distanze e posizioni dei k vicini, ordinate.
+    """
+    order = np.lexsort((positions, distances), axis=1)[:, :k]
+    return np.take_along_axis(distances, order, axis=1), np.take_along_axis(positions, order, axis=1)
+
+
+def nearest_from_distances(distances: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Seleziona i k vicini di ogni riga da una matrice di distanze già calcolate, ordinandoli
+    per distanza e, a parità di distanza, per colonna.
+
+    Args:
+        distances (np.ndarray): Distanze query x training (n_query x n_train).
+        k (int): Numero di vicini.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Distanze e colonne dei vicini (n_query x min(k, n_train)).
+    """
+    k = min(k, distances.shape[1])
+    if k == 0 or len(distances) == 0:
+        return np.empty((len(distances), k)), np.empty((len(distances), k), dtype=np.intp)
+
+    # Tutte le colonne a pari merito con il k-esimo vicino entrano tra i candidati,
+    # così che i pareggi vengano risolti per colonna e non dall'ordine di argpartition
+    kth = np.partition(distances, k - 1, axis=1)[:, k - 1:k]
+    n_candidates = int((distances <= kth).sum(axis=1).max())
+    if n_candidates < distances.shape[1]:
+        candidates = np.argpartition(distances, n_candidates - 1, axis=1)[:, :n_candidates]
+    else:
+        candidates = np.broadcast_to(np.arange(distances.shape[1]), distances.shape)
+    return merge_neighbors(np.take_along_axis(distances, candidates, axis=1), candidates, k)
+
+
+class NeighborSearch(ABC):
+    """
+    Questa classe astratta definisce un'interfaccia comune per la ricerca dei vicini più vicini.
+
+    Tutte le implementazioni restituiscono gli stessi vicini della ricerca esaustiva:
+    ordinati per distanza crescente e, a parità di distanza, per posizione nel training set.
+
+    I campioni segnati in `removed` non vengono mai restituiti come vicini: se i campioni
+    rimasti sono meno di k, le ultime colonne hanno distanza infinita e vanno scartate.
+    """
+    # Attributi scalari e array che descrivono l'indice costruito, salvati da KNNClassifier.save
+    STATE_PARAMS = ()
+    STATE_ARRAYS = ()
+
+    def __init__(self, data: np.ndarray, dtype: type = np.float64, metric: DistanceMetric = None):
+        """
+        Memorizza i dati di training su cui effettuare la ricerca. Se i dati sono già una
+        matrice contigua del tipo richiesto non vengono copiati.
+
+        Args:
+            data (np.ndarray): Dati di training (n_train x n_feature).
+            dtype (type): Tipo della matrice usata nella ricerca (default np.float64).
+            metric (DistanceMetric, optional): Metrica di distanza (default: euclidea).
+        """
+        self.data = np.ascontiguousarray(data, dtype=dtype)
+        self.metric = EuclideanDistance() if metric is None else metric
+        # Maschera dei campioni rimossi (None se non ce ne sono)
+        self.removed = None
+
+    def get_state(self) -> tuple[dict, dict[str, np.ndarray]]:
+        """
+        Restituisce i parametri e gli array dell'indice costruito.
+
+        Returns:
+            tuple[dict, dict[str, np.ndarray]]: Parametri scalari e array, per nome.
+        """
+        return ({name: getattr(self, name) for name in self.STATE_PARAMS},
+                {name: getattr(self, name) for name in self.STATE_ARRAYS})
+
+    @classmethod
+    def from_state(cls, data: np.ndarray, params: dict, arrays: dict[str, np.ndarray], dtype: type = np.float64,
+                   metric: DistanceMetric = None) -> 'NeighborSearch':
+        """
+        Ricostruisce un indice dai dati di training e dallo stato restituito da `get_state`,
+        senza ripeterne la costruzione. Gli array non vengono copiati, quindi possono essere
+        mappati in memoria.
+
+        Args:
+            data (np.ndarray): Dati di training (n_train x n_feature).
+            params (dict): Parametri scalari dell'indice.
+            arrays (dict[str, np.ndarray]): Array dell'indice.
+            dtype (type): Tipo della matrice usata nella ricerca (default np.float64).
+            metric (DistanceMetric, optional): Metrica di distanza (default: euclidea).
+
+        Returns:
+            NeighborSearch: L'indice ricostruito.
+        """
+        search = cls.__new__(cls)
+        NeighborSearch.__init__(search, data, dtype, metric)
+        for name in cls.STATE_PARAMS:
+            setattr(search, name, params[name])
+        for name in cls.STATE_ARRAYS:
+            setattr(search, name, arrays[name])
+        return search
+
+    @abstractmethod
+    def query(self, queries: np.ndarray, k: int, block_rows: int = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Restituisce distanze e posizioni dei k vicini più vicini di ogni query.
+
+        Args:
+            queries (np.ndarray): Punti da cercare (n_query x n_feature).
+            k (int): Numero di vicini.
+            block_rows (int, optional): Campioni di training per blocco, dove applicabile.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Distanze e posizioni (n_query x min(k, n_train)).
+        """
+        pass
+
+
+class BruteForceSearch(NeighborSearch):
+    """
+    Ricerca esaustiva vettorizzata: calcola le distanze ridotte a blocchi di training con il
+    kernel della metrica (per la distanza euclidea lo sviluppo ||a||² + ||b||² - 2ab) e
+    seleziona i candidati con `argpartition`. Con dati np.float32 il prodotto matriciale viene
+    calcolato in precisione singola, con un margine di tolleranza più ampio.
+    """
+    def query(self, queries: np.ndarray, k: int, block_rows: int = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Il training set viene scorso a blocchi di `block_rows` campioni: i vicini di ogni
+        blocco vengono fusi con quelli migliori trovati finora. Poiché l'ordinamento per
+        (distanza, posizione) è totale, la fusione restituisce esattamente gli stessi vicini
+        di una ricerca sull'intero training set.
+        """
+        k = min(k, len(self.data))
+        block_rows = len(self.data) if block_rows is None else block_rows
+
+        best_distances = np.empty((len(queries), 0))
+        best_positions = np.empty((len(queries), 0), dtype=np.intp)
+        for offset in range(0, len(self.data), block_rows):
+            removed = None if self.removed is None else self.removed[offset:offset + block_rows]
+            distances, positions = self._block_neighbors(queries, self.data[offset:offset + block_rows], k,
+                                                         self.metric, removed)
+            best_distances, best_positions = merge_neighbors(
+                np.concatenate([best_distances, distances], axis=1),
+                np.concatenate([best_positions, positions + offset], axis=1),
+                k,
+            )
+        return best_distances, best_positions
+
+    @staticmethod
+    def _block_neighbors(queries: np.ndarray, train: np.ndarray, k: int, metric: DistanceMetric = None,
+                         removed: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Individua i k vicini di ogni query all'interno di un blocco di training.
+
+        Le distanze ridotte del kernel servono solo a individuare i candidati; per questi la
+        distanza viene ricalcolata in modo esatto, così da riprodurre lo stesso ordinamento
+        di `nsmallest`.
+
+        Args:
+            queries (np.ndarray): Blocco di punti (n_query x n_feature).
+            train (np.ndarray): Blocco di training (n_blocco x n_feature).
+            k (int): Numero di vicini da restituire.
+            metric (DistanceMetric, optional): Metrica di distanza (default: euclidea).
+            removed (np.ndarray, optional): Maschera dei campioni rimossi nel blocco.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Distanze e posizioni nel blocco dei vicini
+                                           (n_query x min(k, n_blocco)), ordinate.
+        """
+        metric = EuclideanDistance() if metric is None else metric
+        k = min(k, len(train))
+        reduced = metric.pairwise_reduced(queries, train)
+        if removed is not None:
+            reduced[:, removed] = np.inf
+
+        partitioned = np.argpartition(reduced, k - 1, axis=1)
+        kth = np.take_along_axis(reduced, partitioned[:, k - 1:k], axis=1)
+        # Il margine copre gli arrotondamenti del kernel e i pareggi creati dal calcolo esatto
+        n_candidates = int((reduced <= kth + metric.tolerance(queries, train, kth)).sum(axis=1).max())
+        if n_candidates == k:
+            candidates = partitioned[:, :k]
+        elif n_candidates < len(train):
+            candidates = np.argpartition(reduced, n_candidates - 1, axis=1)[:, :n_candidates]
+        else:
+            candidates = np.broadcast_to(np.arange(len(train)), reduced.shape)
+
+        distances = metric.distances(queries, train, candidates)
+        if removed is not None:
+            distances[removed[candidates]] = np.inf
+        return merge_neighbors(distances, candidates, k)
+
@@ -0,0 +1,231 @@
+from abc import abstractmethod
+import numpy as np
+from .distance_metrics import DistanceMetric, MinkowskiFamilyDistance
+from .neighbor_search import NeighborSearch, merge_neighbors
+
+
+class SpatialTree(NeighborSearch):
+    """
+    Classe base per gli alberi di partizione dello spazio (KD-tree e ball-tree).
+
+    L'albero è memorizzato in array NumPy: ogni nodo copre un intervallo contiguo di
+    `indices` e i nodi foglia contengono al più `leaf_size` campioni. La ricerca è esatta:
+    un nodo viene scartato solo se la sua distanza minima dalla query supera la distanza
+    del k-esimo vicino trovato finora. I limiti dei nodi si basano sulla disuguaglianza
+    triangolare e sulla lunghezza dei vettori differenza, quindi l'albero accetta solo le
+    metriche vere della famiglia di Minkowski (non 'sqeuclidean' né 'cosine').
+    """
+    # Margine relativo che rende conservative le stime di distanza minima dai nodi
+    PRUNING_MARGIN = 1e-9
+    STATE_PARAMS = ('leaf_size',)
+    STATE_ARRAYS = ('indices', 'node_start', 'node_end', 'left', 'right')
+
+    def __init__(self, data: np.ndarray, leaf_size: int = 40, dtype: type = np.float64, metric: DistanceMetric = None):
+        """
+        Costruisce l'albero sui dati di training.
+
+        Args:
+            data (np.ndarray): Dati di training (n_train x n_feature).
+            leaf_size (int): Numero massimo di campioni per foglia (default 40).
+            dtype (type): Tipo della matrice usata nella ricerca (default np.float64).
+            metric (DistanceMetric, optional): Metrica di distanza (default: euclidea).
+        """
+        if not isinstance(leaf_size, int) or leaf_size <= 0:
+            raise ValueError("leaf_size deve essere un intero positivo.")
+        super().__init__(data, dtype, metric)
+        if not isinstance(self.metric, MinkowskiFamilyDistance) or not self.metric.is_metric:
+            raise ValueError(f"La metrica '{self.metric.name}' non è supportata dagli alberi di ricerca.")
+        self.leaf_size = leaf_size
+        self._build()
+
+    def _build(self) -> None:
+        """
+        Partiziona ricorsivamente i campioni lungo la feature con la maggiore escursione,
+        dividendo ogni nodo alla mediana, e calcola i limiti geometrici di ogni nodo.
+        """
+        self.indices = np.arange(len(self.data))
+        node_start, node_end, left, right = [], [], [], []
+
+        def build(start: int, end: int) -> int:
+            node = len(node_start)
+            node_start.append(start)
+            node_end.append(end)
+            left.append(-1)
+            right.append(-1)
+            if end - start > self.leaf_size:
+                middle = self._split(start, end)
+                left[node] = build(start, middle)
+                right[node] = build(middle, end)
+            return node
+
+        build(0, len(self.data))
+        self.node_start = np.array(node_start, dtype=np.intp)
+        self.node_end = np.array(node_end, dtype=np.intp)
+        self.left = np.array(left, dtype=np.intp)
+        self.right = np.array(right, dtype=np.intp)
+        self._compute_bounds()
+        self._prepare_query()
+
+    @classmethod
+    def from_state(cls, data: np.ndarray, params: dict, arrays: dict[str, np.ndarray], dtype: type = np.float64,
+                   metric: DistanceMetric = None) -> 'SpatialTree':
+        search = super().from_state(data, params, arrays, dtype, metric)
+        search._prepare_query()
+        return search
+
+    def _prepare_query(self) -> None:
+        """
+        Prepara le strutture usate da ogni ricerca: i campioni riordinati come nelle foglie,
+        così che ogni foglia sia una vista contigua, e i nodi come tuple Python, più rapide
+        da leggere durante la visita rispetto agli elementi degli array.
+        """
+        self._ordered = self.data[self.indices]
+        self._nodes = list(zip(self.node_start.tolist(), self.node_end.tolist(), self.left.tolist(),
+                               self.right.tolist()))
+
+    @property
+    def removed(self) -> np.ndarray:
+        """
+        Maschera dei campioni rimossi (None se non ce ne sono). Ad ogni assegnazione viene
+        ricalcolata la maschera dei campioni validi nell'ordine delle foglie.
+        """
+        return self._removed
+
+    @removed.setter
+    def removed(self, removed: np.ndarray) -> None:
+        self._removed = removed
+        self._alive = None if removed is None else ~removed[self.indices]
+
+    def _split(self, start: int, end: int) -> int:
+        """
+        Riordina `indices[start:end]` attorno alla mediana della feature con la maggiore
+        escursione e restituisce la posizione di divisione.
+        """
+        segment = self.indices[start:end]
+        points = self.data[segment]
+        feature = int(np.argmax(np.ptp(points, axis=0)))
+        middle = (end - start) // 2
+        order = np.argpartition(points[:, feature], middle)
+        self.indices[start:end] = segment[order]
+        return start + middle
+
+    @abstractmethod
+    def _compute_bounds(self) -> None:
+        """
+        Calcola i limiti geometrici di ogni nodo. Deve essere implementato nelle sottoclassi.
+        """
+        pass
+
+    @abstractmethod
+    def _min_distance(self, point: np.ndarray, node: int) -> float:
+        """
+        Restituisce una stima per difetto della distanza tra il punto e i campioni del nodo.
+        Deve essere implementato nelle sottoclassi.
+        """
+        pass
+
+    def query(self, queries: np.ndarray, k: int, block_rows: int = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Esegue una ricerca esatta con potatura per ogni query. Il parametro `block_rows`
+        è ignorato. Limiti e filtri vengono calcolati in doppia precisione anche con dati
+        np.float32, così che il margine di potatura resti valido.
+        """
+        k = min(k, len(self.data))
+        queries = np.asarray(queries, dtype=np.float64)
+        distances = np.empty((len(queries), k))
+        positions = np.empty((len(queries), k), dtype=np.intp)
+        for row, point in enumerate(queries):
+            distances[row], positions[row] = self._query_point(point, k)
+        return distances, positions
+
+    def _query_point(self, point: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Visita l'albero in profondità, esplorando per primo il figlio più vicino e scartando
+        i nodi che non possono contenere vicini migliori di quelli già trovati.
+        """
+        # Posizione sentinella: ordina dopo ogni campione reale a parità di distanza
+        best_distances = np.full((1, k), np.inf)
+        best_positions = np.full((1, k), len(self.data), dtype=np.intp)
+        worst = np.inf
+        query = point[None, :]
+        ordered, nodes, alive = self._ordered, self._nodes, self._alive
+
+        stack = [(self._min_distance(point, 0), 0)]
+        while stack:
+            bound, node = stack.pop()
+            if bound > worst:
+                continue
+
+            start, end, left, right = nodes[node]
+            if left < 0:
+                # Filtro rapido sulle distanze della foglia; quelle esatte servono solo ai candidati
+                distances = self.metric.norm(ordered[start:end] - point)
+                selected = distances <= worst * (1 + self.PRUNING_MARGIN)
+                if alive is not None:
+                    selected &= alive[start:end]
+                local = np.flatnonzero(selected)
+                if len(local) == 0:
+                    continue
+                candidates = self.indices[start + local][None, :]
+                distances = self.metric.distances(query, self.data, candidates)
+                best_distances, best_positions = merge_neighbors(
+                    np.concatenate([best_distances, distances], axis=1),
+                    np.concatenate([best_positions, candidates], axis=1),
+                    k,
+                )
+                worst = best_distances[0, -1]
+                continue
+
+            left_bound, right_bound = self._min_distance(point, left), self._min_distance(point, right)
+            if left_bound <= right_bound:
+                stack.append((right_bound, right))
+                stack.append((left_bound, left))
+            else:
+                stack.append((left_bound, left))
+                stack.append((right_bound, right))
+
+        return best_distances[0], best_positions[0]
+
+
+class KDTree(SpatialTree):
+    """
+    KD-tree: ogni nodo è descritto dal parallelepipedo che racchiude i suoi campioni.
+    Adatto a spazi con poche feature, come quello del dataset Wisconsin.
+    """
+    STATE_ARRAYS = SpatialTree.STATE_ARRAYS + ('lower', 'upper')
+
+    def _compute_bounds(self) -> None:
+        n_nodes, n_features = len(self.node_start), self.data.shape[1]
+        self.lower = np.empty((n_nodes, n_features))
+        self.upper = np.empty((n_nodes, n_features))
+        for node in range(n_nodes):
+            points = self.data[self.indices[self.node_start[node]:self.node_end[node]]]
+            self.lower[node] = points.min(axis=0, initial=np.inf)
+            self.upper[node] = points.max(axis=0, initial=-np.inf)
+
+    def _min_distance(self, point: np.ndarray, node: int) -> float:
+        gaps = np.maximum(self.lower[node] - point, 0) + np.maximum(point - self.upper[node], 0)
+        return float(self.metric.norm(gaps)) * (1 - self.PRUNING_MARGIN)
+
+
+class BallTree(SpatialTree):
+    """
+    Ball-tree: ogni nodo è descritto da un centro e dal raggio che racchiude i suoi campioni.
+    Meno sensibile del KD-tree all'aumentare del numero di feature.
+    """
+    STATE_ARRAYS = SpatialTree.STATE_ARRAYS + ('centers', 'radii')
+
+    def _compute_bounds(self) -> None:
+        n_nodes, n_features = len(self.node_start), self.data.shape[1]
+        self.centers = np.zeros((n_nodes, n_features))
+        self.radii = np.zeros(n_nodes)
+        for node in range(n_nodes):
+            points = self.data[self.indices[self.node_start[node]:self.node_end[node]]]
+            if len(points):
+                self.centers[node] = points.mean(axis=0)
+                self.radii[node] = self.metric.norm(points - self.centers[node]).max()
+
+    def _min_distance(self, point: np.ndarray, node: int) -> float:
+        center_distance = float(self.metric.norm(point - self.centers[node]))
+        radius = self.radii[node]
+        return max(center_distance - radius - self.PRUNING_MARGIN * (center_distance + radius), 0.0)
@@ -1,3 +1,5 @@
 from .data_parser import ParserFactory
-from .feature_scaler import FeatureScalerStrategyManager, FeatureScaler
-from .missing_values_handler import MissingValuesStrategyManager, MissingValuesHandler
\ No newline at end of file
+from .parse_cache import ParseCache
+from .feature_scaler import FeatureScalerStrategyManager, FeatureScaler, FittedScaler, MinMaxScaler, StandardScaler
+from .missing_values_handler import MissingValuesStrategyManager, MissingValuesHandler, MissingValuesImputer
+from .streaming_statistics import ScalingStatistics, QuantileSketch, FrequentValuesSketch
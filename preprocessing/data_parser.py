@@ -1,26 +1,233 @@
+import glob
+import importlib.util
+import json
+import os
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
+from .parse_cache import ParseCache
+
+class SeenIds:
+    """
+    Insieme compatto degli identificativi già incontrati durante la lettura a blocchi.
+
+    Gli identificativi interi (anche se letti come float, come accade quando la colonna
+    contiene valori mancanti) sono conservati in un array int64 ordinato, 8 byte ciascuno
+    invece delle decine di byte di un intero Python in un set; gli altri valori finiscono
+    in un set. Come in `drop_duplicates`, i valori mancanti sono considerati uguali tra loro.
+    """
+    def __init__(self):
+        self._integers = np.empty(0, dtype=np.int64)
+        self._others = set()
+        self._missing = False
+
+    def __len__(self) -> int:
+        return len(self._integers) + len(self._others) + int(self._missing)
+
+    def first_occurrences(self, ids: pd.Series) -> np.ndarray:
+        """
+        Restituisce la maschera delle righe il cui identificativo compare per la prima volta,
+        nel blocco e nei blocchi precedenti, e aggiunge i nuovi identificativi all'insieme.
+
+        Args:
+            ids (pd.Series): Identificativi delle righe del blocco.
+
+        Returns:
+            np.ndarray: Maschera booleana delle righe da mantenere.
+        """
+        keep = ~ids.duplicated(keep='first').to_numpy()
+        missing = ids.isna().to_numpy()
+        if self._missing:
+            keep &= ~missing
+        self._missing |= bool(missing.any())
+
+        values = ids.to_numpy()
+        if ids.dtype.kind in 'iu':
+            integral = np.ones(len(values), dtype=bool)
+        elif ids.dtype.kind == 'f':
+            with np.errstate(invalid='ignore'):
+                integral = ~missing & (values == np.floor(values)) & (np.abs(values) < 2.0 ** 63)
+        else:
+            integral = np.zeros(len(values), dtype=bool)
+        others = ~missing & ~integral
+
+        if integral.any():
+            rows = np.flatnonzero(integral)
+            integers = values[rows].astype(np.int64)
+            if len(self._integers) > 0:
+                positions = np.minimum(np.searchsorted(self._integers, integers), len(self._integers) - 1)
+                keep[rows[self._integers[positions] == integers]] = False
+            self._integers = np.union1d(self._integers, integers[keep[rows]])
+        if others.any():
+            rows = np.flatnonzero(others)
+            found = np.fromiter((value in self._others for value in values[rows]), dtype=bool, count=len(rows))
+            keep[rows[found]] = False
+            self._others.update(values[rows[keep[rows]]])
+        return keep
+
 
 class DataParser(ABC):
     """
     Questa classe astratta definisce un'interfaccia comune per i parser di dataset.
+
+    Oltre a `parse`, che carica l'intero file, ogni parser offre `iter_chunks`, che legge il
+    file a blocchi di righe con memoria limitata: i duplicati di 'Sample code number' vengono
+    rimossi anche tra blocchi diversi, mantenendo la prima occorrenza come `parse`. I blocchi
+    possono essere passati direttamente, ad esempio, a `FittedScaler.partial_fit`.
     """
+    ID_COLUMN = "Sample code number"
+    DEFAULT_CHUNKSIZE = 10000
+
     @abstractmethod
     def parse(self, file_path: str) -> pd.DataFrame:
         pass
 
+    def iter_chunks(self, file_path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+        """
+        Legge il file a blocchi di al più `chunksize` righe.
 
-class CsvDataParser(DataParser):
+        Il tipo delle colonne viene dedotto separatamente per ogni blocco, quindi può
+        differire da quello restituito da `parse` (ad esempio int in un blocco e float in un
+        altro che contiene valori mancanti).
+
+        Args:
+            file_path (str): Percorso del file.
+            chunksize (int): Numero massimo di righe lette per blocco (default 10000).
+
+        Returns:
+            Iterator[pd.DataFrame]: Blocchi senza duplicati, indicizzati su 'Sample code number'.
+        """
+        if isinstance(chunksize, bool) or not isinstance(chunksize, (int, np.integer)) or chunksize <= 0:
+            raise ValueError("chunksize deve essere un intero positivo.")
+        seen = SeenIds()
+        for chunk in self._read_chunks(file_path, int(chunksize)):
+            chunk = chunk[seen.first_occurrences(chunk[self.ID_COLUMN])]
+            if len(chunk) > 0:
+                yield chunk.set_index(self.ID_COLUMN)
+
+    @abstractmethod
+    def _read_chunks(self, file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+        """
+        Restituisce i blocchi di righe del file così come sono letti, senza rimuovere i duplicati.
+        Deve essere implementato nelle sottoclassi.
+        """
+        pass
+
+
+class DelimitedDataParser(DataParser):
     """
-    Questa classe implementa il parser per i file CSV.
+    Classe base dei parser per i file di testo con delimitatore (CSV, TXT e TSV).
+
+    Di default pandas deduce il tipo di ogni colonna e `MissingValuesHandler.convert_numeric_columns`
+    converte poi in float le colonne rimaste testuali. Dichiarando lo schema con `dtype`,
+    `na_values` e `usecols`, le colonne vengono invece convertite subito dopo l'unico
+    passaggio del parser nativo: quelle pulite ne escono già numeriche e vengono solo
+    convertite nel tipo dichiarato, mentre quelle con valori non numerici passano da
+    pd.to_numeric. La conversione successiva non ha più nulla da fare. Indicando in
+    `na_values` i segnaposto noti (ad esempio '?') anche queste colonne escono numeriche.
     """
+    FORMAT = None
+    DELIMITER = ','
+    ENGINES = (None, 'c', 'pyarrow')
+    EXTENSIONS = (".csv", ".txt", ".tsv")
+
+    def __init__(self, dtype=None, na_values: list = None, usecols: list = None, engine: str = None):
+        """
+        Args:
+            dtype (optional): Tipo float di tutte le colonne ('float32' o 'float64', vedi
+                              _apply_dtype per 'Sample code number') oppure dizionario
+                              {colonna: tipo}. I valori non numerici delle colonne dichiarate
+                              numeriche diventano NaN, come in convert_numeric_columns.
+            na_values (list, optional): Valori aggiuntivi da interpretare come mancanti (ad esempio ['?']).
+            usecols (list, optional): Colonne da leggere; 'Sample code number' viene sempre letta.
+            engine (str, optional): Parser di pandas ('c' o 'pyarrow'). 'pyarrow' richiede il
+                                    pacchetto opzionale pyarrow e viene usato solo da `parse`,
+                                    perché non supporta la lettura a blocchi.
+        """
+        if dtype is not None and not isinstance(dtype, dict):
+            dtype = pd.api.types.pandas_dtype(dtype)
+            if not pd.api.types.is_float_dtype(dtype):
+                raise ValueError("Un tipo unico per tutte le colonne deve essere float (ad esempio 'float32').")
+        if engine not in self.ENGINES:
+            raise ValueError("engine deve essere 'c' o 'pyarrow'.")
+        if engine == 'pyarrow' and importlib.util.find_spec('pyarrow') is None:
+            raise ImportError("Il motore 'pyarrow' richiede il pacchetto pyarrow.")
+        if usecols is not None:
+            usecols = list(usecols)
+            if self.ID_COLUMN not in usecols:
+                usecols.append(self.ID_COLUMN)
+        self.dtype = dtype
+        self.na_values = na_values
+        self.usecols = usecols
+        self.engine = engine
+
     def parse(self, file_path: str) -> pd.DataFrame:
-        print(f"Parsing CSV: {file_path}")
-        df = pd.read_csv(file_path)
+        print(f"Parsing {self.FORMAT}: {file_path}")
+        # Il file viene letto una sola volta: lo schema viene applicato al risultato
+        df = self._apply_dtype(pd.read_csv(file_path, **self._read_options(), engine=self.engine))
         # Rimuovere i duplicati basati su 'Sample code number' e impostare come indice
         df_cleaned = df.drop_duplicates(subset="Sample code number").set_index("Sample code number")
         return df_cleaned
 
+    def _read_chunks(self, file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+        print(f"Parsing {self.FORMAT} a blocchi: {file_path}")
+        with pd.read_csv(file_path, **self._read_options(), chunksize=chunksize) as reader:
+            for chunk in reader:
+                yield self._apply_dtype(chunk)
+
+    def _read_options(self) -> dict:
+        """
+        Restituisce le opzioni di pd.read_csv comuni a parse e _read_chunks.
+        """
+        options = {'delimiter': self.DELIMITER}
+        if self.na_values is not None:
+            options['na_values'] = self.na_values
+        if self.usecols is not None:
+            options['usecols'] = self.usecols
+        return options
+
+    def _apply_dtype(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converte le colonne nei tipi dichiarati. Le colonne pulite escono già numeriche dal
+        parser nativo e vengono solo convertite; quelle rimaste testuali per un valore non
+        numerico passano da pd.to_numeric, che trasforma in NaN i valori non validi.
+
+        Con un tipo unico 'Sample code number' resta float64 (esatta per gli interi fino a
+        2**53): con float32 perderebbe precisione e identificativi diversi potrebbero
+        coincidere. Le colonne vengono riunite in blocchi del tipo dichiarato (uno solo con
+        float64), come se fossero state lette con quel tipo: blocchi separati per ogni
+        colonna verrebbero ricopiati da set_index.
+        """
+        if self.dtype is None:
+            return df
+        if isinstance(self.dtype, dict):
+            dtypes = {column: pd.api.types.pandas_dtype(dtype) for column, dtype in self.dtype.items()
+                      if column in df.columns}
+        else:
+            dtypes = {column: np.dtype(np.float64) if column == self.ID_COLUMN else self.dtype
+                      for column in df.columns}
+        for column, dtype in dtypes.items():
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_numeric_dtype(df[column]):
+                df[column] = pd.to_numeric(df[column], errors='coerce')
+        if isinstance(self.dtype, dict) or self.ID_COLUMN not in df.columns:
+            return df.astype(dtypes, copy=False)
+        if self.dtype == np.float64:
+            return pd.DataFrame(df.to_numpy(dtype=np.float64), index=df.index, columns=df.columns, copy=False)
+
+        features = [column for column in df.columns if column != self.ID_COLUMN]
+        result = pd.DataFrame(df[features].to_numpy(dtype=self.dtype), index=df.index, columns=features, copy=False)
+        result.insert(df.columns.get_loc(self.ID_COLUMN), self.ID_COLUMN, df[self.ID_COLUMN].to_numpy(dtype=np.float64))
+        return result
+
+
+class CsvDataParser(DelimitedDataParser):
+    """
+    Questa classe implementa il parser per i file CSV.
+    """
+    FORMAT = 'CSV'
+
 
 class ExcelDataParser(DataParser):
     """
@@ -33,6 +240,28 @@ class ExcelDataParser(DataParser):
         df_cleaned = df.drop_duplicates(subset="Sample code number").set_index("Sample code number")
         return df_cleaned
 
+    def _read_chunks(self, file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+        print(f"Parsing Excel a blocchi: {file_path}")
+        # pandas non legge i file Excel a blocchi: openpyxl in sola lettura scorre le righe
+        # del primo foglio (lo stesso letto da parse) senza caricare l'intero file
+        import openpyxl
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            block = []
+            for row in rows:
+                block.append(row)
+                if len(block) == chunksize:
+                    yield pd.DataFrame(block, columns=header)
+                    block = []
+            if block:
+                yield pd.DataFrame(block, columns=header)
+        finally:
+            workbook.close()
+
 
 class JsonDataParser(DataParser):
     """
@@ -40,34 +269,72 @@ class JsonDataParser(DataParser):
     """
     def parse(self, file_path: str) -> pd.DataFrame:
         print(f"Parsing JSON: {file_path}")
-        df = pd.read_json(file_path)
+        df = pd.read_json(file_path, lines=self._is_json_lines(file_path))
         # Rimuovere i duplicati basati su 'Sample code number' e impostare come indice
         df_cleaned = df.drop_duplicates(subset="Sample code number").set_index("Sample code number")
         return df_cleaned
 
+    def _read_chunks(self, file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+        print(f"Parsing JSON a blocchi: {file_path}")
+        if self._is_json_lines(file_path):
+            with pd.read_json(file_path, lines=True, chunksize=chunksize) as reader:
+                yield from reader
+        else:
+            # Un documento JSON unico non si può leggere a blocchi: viene caricato e poi suddiviso
+            df = pd.read_json(file_path)
+            for start in range(0, len(df), chunksize):
+                yield df.iloc[start:start + chunksize]
+
+    @staticmethod
+    def _is_json_lines(file_path: str) -> bool:
+        """
+        Verifica se il file è in formato JSON Lines, cioè se la prima riga è un record completo
+        con valori scalari (un documento orientato per colonne ha invece dizionari come valori).
+        """
+        with open(file_path, encoding="utf-8") as file:
+            first_line = file.readline().strip()
+        try:
+            record = json.loads(first_line)
+        except ValueError:
+            return False
+        return isinstance(record, dict) and not any(isinstance(value, (dict, list)) for value in record.values())
 
-class TxtDataParser(DataParser):
+
+class TxtDataParser(DelimitedDataParser):
     """
     Questa classe implementa il parser per i file TXT.
     """
-    def parse(self, file_path: str) -> pd.DataFrame:
-        print(f"Parsing TXT: {file_path}")
-        df = pd.read_csv(file_path, delimiter=',')
-        # Rimuovere i duplicati basati su 'Sample code number' e impostare come indice
-        df_cleaned = df.drop_duplicates(subset="Sample code number").set_index("Sample code number")
-        return df_cleaned
+    FORMAT = 'TXT'
+    DELIMITER = ','
 
 
-class TsvDataParser(DataParser):
+class TsvDataParser(DelimitedDataParser):
     """
     Questa classe implementa il parser per i file TSV.
     """
+    FORMAT = 'TSV'
+    DELIMITER = '\t'
+
+
+class CachedDataParser(DataParser):
+    """
+    Questa classe aggiunge a un parser la cache su disco dei dataset già letti (vedi ParseCache).
+    """
+    def __init__(self, parser: DataParser, cache: ParseCache):
+        """
+        Args:
+            parser (DataParser): Parser del formato del file.
+            cache (ParseCache): Cache in cui cercare e salvare i dataset.
+        """
+        self.parser = parser
+        self.cache = cache
+
     def parse(self, file_path: str) -> pd.DataFrame:
-        print(f"Parsing TSV: {file_path}")
-        df = pd.read_csv(file_path, delimiter='\t')
-        # Rimuovere i duplicati basati su 'Sample code number' e impostare come indice
-        df_cleaned = df.drop_duplicates(subset="Sample code number").set_index("Sample code number")
-        return df_cleaned
+        return self.cache.load_or_parse(self.parser, file_path)
+
+    def _read_chunks(self, file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+        # La lettura a blocchi serve per i file che non entrano in memoria e non passa dalla cache
+        return self.parser._read_chunks(file_path, chunksize)
 
 
 class ParserFactory:
@@ -75,16 +342,100 @@ class ParserFactory:
     Questa classe fornisce un metodo statico per ottenere il parser corretto in base all'estensione del file.
     """
     @staticmethod
-    def get_parser(file_path: str) -> DataParser:
+    def get_parser(file_path: str, cache: ParseCache = None, **options) -> DataParser:
+        """
+        Restituisce il parser adatto al file.
+
+        Args:
+            file_path (str): Percorso del file.
+            cache (ParseCache, optional): Se indicata, `parse` legge il dataset dalla cache quando
+                                          il file non è cambiato dall'ultima lettura.
+            **options: Schema di lettura (dtype, na_values, usecols, engine), supportato solo dai
+                       file con delimitatore (vedi DelimitedDataParser).
+
+        Returns:
+            DataParser: Il parser del formato del file.
+        """
+        if options and file_path.endswith((".xlsx", ".json")):
+            raise ValueError("Le opzioni di lettura sono supportate solo per i file CSV, TXT e TSV.")
+        if cache is not None:
+            return CachedDataParser(ParserFactory.get_parser(file_path, **options), cache)
         if file_path.endswith(".csv"):
-            return CsvDataParser()
+            return CsvDataParser(**options)
         elif file_path.endswith(".xlsx"):
             return ExcelDataParser()
         elif file_path.endswith(".json"):
             return JsonDataParser()
         elif file_path.endswith(".txt"):
-            return TxtDataParser()
+            return TxtDataParser(**options)
         elif file_path.endswith(".tsv"):
-            return TsvDataParser()
+            return TsvDataParser(**options)
         else:
             raise RuntimeError("Formato file non supportato")
+
+    @staticmethod
+    def parse_files(files: str | list[str], n_jobs: int = 1, cache: ParseCache = None, **options) -> pd.DataFrame:
+        """
+        Legge più file con lo stesso schema, anche di formati diversi, e li unisce in un solo dataset.
+
+        Con `n_jobs > 1` i file vengono letti in parallelo su un pool di processi, a partire dai
+        file Excel e poi dai più grandi, così che i file più lenti non si accodino agli altri.
+        Il risultato non dipende da `n_jobs`: i duplicati di 'Sample code number' vengono rimossi
+        anche tra file diversi mantenendo la prima occorrenza nell'ordine dei file, come se
+        fossero un unico file.
+
+        Args:
+            files (str | list[str]): Lista di percorsi oppure pattern glob (ad esempio 'data/*.csv');
+                                     i file di un pattern sono letti in ordine alfabetico.
+            n_jobs (int): Numero di processi; -1 usa tutti i core disponibili (default 1).
+            cache (ParseCache, optional): Cache su disco dei dataset già letti.
+            **options: Schema di lettura, applicato solo ai file con delimitatore (CSV, TXT e TSV).
+
+        Returns:
+            pd.DataFrame: Dataset unito, indicizzato su 'Sample code number'.
+        """
+        if isinstance(files, str):
+            pattern = files
+            files = sorted(glob.glob(pattern))
+            if not files:
+                raise ValueError(f"Nessun file corrisponde a '{pattern}'.")
+        files = list(files)
+        if not files:
+            raise ValueError("La lista dei file è vuota.")
+        if not isinstance(n_jobs, int) or n_jobs == 0 or n_jobs < -1:
+            raise ValueError("n_jobs deve essere un intero positivo oppure -1.")
+
+        tasks = [(file_path, cache, options if file_path.endswith(DelimitedDataParser.EXTENSIONS) else {})
+                 for file_path in files]
+        n_jobs = min((os.cpu_count() or 1) if n_jobs == -1 else n_jobs, len(tasks))
+        if n_jobs == 1:
+            results = [_parse_file(*task) for task in tasks]
+        else:
+            # I file più lenti partono per primi; i risultati tornano poi nell'ordine dei file
+            order = sorted(range(len(files)), reverse=True,
+                           key=lambda i: (files[i].endswith(".xlsx"), os.path.getsize(files[i])))
+            results = [None] * len(files)
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                for position, result in zip(order, executor.map(_parse_file, *zip(*[tasks[i] for i in order]))):
+                    results[position] = result
+            if cache is not None:
+                # I processi usano una copia della cache: i loro accessi vengono riportati sull'originale
+                cache.hits += sum(hits for _, hits, _ in results)
+                cache.misses += sum(misses for _, _, misses in results)
+
+        data = pd.concat([frame for frame, _, _ in results])
+        return data[~data.index.duplicated(keep='first')]
+
+
+def _parse_file(file_path: str, cache: ParseCache, options: dict) -> tuple[pd.DataFrame, int, int]:
+    """
+    Legge un file per ParserFactory.parse_files, anche in un processo del pool.
+
+    Returns:
+        tuple[pd.DataFrame, int, int]: Il dataset e gli accessi alla cache (hit, miss) di questa lettura.
+    """
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    data = ParserFactory.get_parser(file_path, cache=cache, **options).parse(file_path)
+    if cache is None:
+        return data, 0, 0
+    return data, cache.hits - hits, cache.misses - misses
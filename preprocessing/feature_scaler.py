@@ -1,56 +1,266 @@
+import warnings
+from abc import ABC, abstractmethod
 import pandas as pd
 import numpy as np
 from .data_parser import ParserFactory
 from .missing_values_handler import MissingValuesStrategyManager
+from .streaming_statistics import ScalingStatistics
 
 class FeatureScaler:
     """
     Classe per la gestione del feature scaling in un DataFrame.
     """
     @staticmethod
-    def normalize(data: pd.DataFrame, exclude_columns: list) -> pd.DataFrame:
+    def normalize(data: pd.DataFrame, exclude_columns: list, inplace: bool = False) -> pd.DataFrame:
         """
         Applica la normalizzazione (range [0, 1]) alle colonne numeriche del dataset, escludendo alcune colonne specifiche.
 
+        Le colonne vengono scalate a blocchi con operazioni NumPy vettorizzate (vedi
+        `MinMaxScaler`); con `inplace` il dataset viene modificato senza crearne una copia.
+
         Args:
             data (pd.DataFrame): Il dataset da scalare.
             exclude_columns (list): Lista di colonne da escludere dallo scaling.
+            inplace (bool): Se True, scala le colonne direttamente in `data` (default False).
 
         Returns:
             pd.DataFrame: Dataset con scaling applicato alle colonne rilevanti.
         """
-        columns_to_scale = [col for col in data.columns if col not in exclude_columns]
-
-        data_scaled = data.copy()
-        for column in columns_to_scale:
-            min_val = data[column].min()
-            max_val = data[column].max()
-            data_scaled[column] = (data[column] - min_val) / (max_val - min_val)
-
-        return data_scaled
+        return MinMaxScaler(exclude_columns).fit_transform(data, inplace=inplace)
 
     @staticmethod
-    def standardize(data: pd.DataFrame, exclude_columns: list) -> pd.DataFrame:
+    def standardize(data: pd.DataFrame, exclude_columns: list, inplace: bool = False) -> pd.DataFrame:
         """
         Applica la standardizzazione (media 0, deviazione standard 1) alle colonne numeriche del dataset, escludendo alcune colonne specifiche.
 
+        Le colonne vengono scalate a blocchi con operazioni NumPy vettorizzate (vedi
+        `StandardScaler`); con `inplace` il dataset viene modificato senza crearne una copia.
+
         Args:
             data (pd.DataFrame): Il dataset da scalare.
             exclude_columns (list): Lista di colonne da escludere dallo scaling.
+            inplace (bool): Se True, scala le colonne direttamente in `data` (default False).
 
         Returns:
             pd.DataFrame: Dataset con scaling applicato alle colonne rilevanti.
         """
-        columns_to_scale = [col for col in data.columns if col not in exclude_columns]
+        return StandardScaler(exclude_columns).fit_transform(data, inplace=inplace)
+
+class FittedScaler(ABC):
+    """
+    Classe base degli scaler con parametri memorizzati.
+
+    `fit` calcola i parametri di ogni colonna con riduzioni vettorizzate sulla matrice delle
+    feature; `transform` li applica come un'unica operazione broadcast
+    (valore - offset_) / scale_, anche a dati diversi da quelli usati in fit, ad esempio al
+    test set di uno split o a un singolo punto, in O(numero di feature).
+
+    Le colonne vengono convertite in float64 a blocchi di al più `BLOCK_BYTES` byte, così che
+    la memoria aggiuntiva non dipenda dal numero di colonne del dataset. Per i dataset che
+    non entrano in memoria, `partial_fit` stima i parametri blocco per blocco e
+    `fit_from_statistics` li ricava da statistiche calcolate altrove, ad esempio unendo
+    quelle di più processi (vedi `ScalingStatistics`).
+    """
+    # Memoria massima indicativa (in byte) per un blocco di colonne convertito in float64;
+    # la selezione del blocco dal DataFrame ne crea una copia temporanea di pari dimensione
+    BLOCK_BYTES = 16 * 1024 ** 2
+
+    def __init__(self, exclude_columns: list = None):
+        """
+        Args:
+            exclude_columns (list, optional): Lista di colonne da escludere dallo scaling.
+        """
+        self.exclude_columns = [] if exclude_columns is None else list(exclude_columns)
+        self.columns_ = None
+        self.offset_ = None
+        self.scale_ = None
+        self.statistics_ = None
+
+    def fit(self, data: pd.DataFrame) -> 'FittedScaler':
+        """
+        Calcola i parametri dello scaling delle colonne non escluse.
+
+        Args:
+            data (pd.DataFrame): Il dataset su cui stimare i parametri.
+
+        Returns:
+            FittedScaler: Lo scaler stesso.
+        """
+        if not isinstance(data, pd.DataFrame):
+            raise ValueError("I dati devono essere forniti come Pandas DataFrame.")
+        if len(data) == 0:
+            raise ValueError("Il dataset su cui addestrare lo scaler è vuoto.")
+        columns = data.columns[~data.columns.isin(self.exclude_columns)]
+
+        offsets, scales = [], []
+        for block in self._column_blocks(columns, len(data)):
+            # In ordine Fortran ogni colonna è contigua, quindi le riduzioni per colonna sommano
+            # i valori come le riduzioni pandas sulla singola colonna
+            values = np.asfortranarray(data[block].to_numpy(dtype=np.float64))
+            with warnings.catch_warnings():
+                # Le colonne senza valori validi danno parametri NaN, come in pandas
+                warnings.simplefilter('ignore', RuntimeWarning)
+                offset, scale = self._compute_parameters(values)
+            offsets.append(offset)
+            scales.append(scale)
+        self.columns_ = columns
+        self.statistics_ = None
+        self.offset_ = np.concatenate(offsets) if offsets else np.empty(0)
+        self.scale_ = np.concatenate(scales) if scales else np.empty(0)
+        return self
+
+    def partial_fit(self, data: pd.DataFrame) -> 'FittedScaler':
+        """
+        Aggiorna i parametri dello scaling con un blocco di righe, ad esempio letto a blocchi
+        da un file più grande della memoria. Le righe non vengono conservate: le statistiche
+        accumulate sono in `statistics_`.
+
+        Args:
+            data (pd.DataFrame): Blocco del dataset.
+
+        Returns:
+            FittedScaler: Lo scaler stesso.
+        """
+        if self.statistics_ is None:
+            self.statistics_ = ScalingStatistics(self.exclude_columns)
+        self.statistics_.update(data)
+        return self.fit_from_statistics(self.statistics_)
+
+    def fit_from_statistics(self, statistics: ScalingStatistics) -> 'FittedScaler':
+        """
+        Ricava i parametri dello scaling da statistiche accumulate in streaming.
+
+        Args:
+            statistics (ScalingStatistics): Statistiche delle colonne da scalare.
+
+        Returns:
+            FittedScaler: Lo scaler stesso.
+        """
+        if statistics.count is None or not statistics.count.any():
+            raise ValueError("Le statistiche non contengono dati su cui addestrare lo scaler.")
+        self.columns_ = statistics.columns
+        self.offset_, self.scale_ = self._parameters_from_statistics(statistics)
+        return self
+
+    def transform(self, data: pd.DataFrame | pd.Series, inplace: bool = False) -> pd.DataFrame | pd.Series:
+        """
+        Applica i parametri memorizzati a un dataset oppure a un singolo punto.
+
+        Ogni blocco di colonne viene convertito in una matrice float64 e scalato sul posto
+        con due operazioni broadcast; le colonne già float64 vengono poi sovrascritte nei
+        blocchi esistenti del DataFrame, le altre sostituite. Senza `inplace` il lavoro avviene
+        su una copia del dataset, che resta invariato.
+
+        Args:
+            data (pd.DataFrame | pd.Series): Il dataset o il punto da scalare, con le colonne
+                                             usate in fit.
+            inplace (bool): Se True, scala le colonne direttamente nel DataFrame `data`
+                            (default False); non disponibile per un singolo punto.
+
+        Returns:
+            pd.DataFrame | pd.Series: Dati con scaling applicato alle colonne rilevanti.
+        """
+        if self.columns_ is None:
+            raise ValueError("Lo scaler non è stato addestrato. Usa il metodo 'fit' prima di trasformare.")
+        labels = data.index if isinstance(data, pd.Series) else data.columns
+        if not self.columns_.isin(labels).all():
+            raise ValueError("I dati non contengono tutte le colonne usate in fit.")
+
+        if isinstance(data, pd.Series):
+            if inplace:
+                raise ValueError("inplace è disponibile solo per i DataFrame.")
+            scaled = self._scale(data[self.columns_].to_numpy(dtype=np.float64, copy=True), slice(None))
+            result = data.astype(object) if data.dtype != np.float64 else data.copy()
+            result[self.columns_] = scaled
+            return result.infer_objects()
 
-        data_scaled = data.copy()
-        for column in columns_to_scale:
-            mean_val = data[column].mean()
-            std_val = data[column].std()
-            data_scaled[column] = (data[column] - mean_val) / std_val
+        data_scaled = data if inplace else data.copy()
+        start = 0
+        for block in self._column_blocks(self.columns_, len(data)):
+            positions = slice(start, start + len(block))
+            start += len(block)
+            scaled = self._scale(data_scaled[block].to_numpy(dtype=np.float64, copy=True), positions)
 
+            is_float = (data_scaled.dtypes[block] == np.float64).to_numpy()
+            if is_float.any():
+                data_scaled.loc[:, block[is_float]] = scaled[:, is_float]
+            if not is_float.all():
+                data_scaled[block[~is_float]] = scaled[:, ~is_float]
         return data_scaled
 
+    def fit_transform(self, data: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+        """
+        Calcola i parametri dello scaling e li applica allo stesso dataset.
+
+        Args:
+            data (pd.DataFrame): Il dataset da scalare.
+            inplace (bool): Se True, scala le colonne direttamente in `data` (default False).
+
+        Returns:
+            pd.DataFrame: Dataset con scaling applicato alle colonne rilevanti.
+        """
+        return self.fit(data).transform(data, inplace=inplace)
+
+    def _scale(self, values: np.ndarray, positions: slice) -> np.ndarray:
+        """
+        Scala sul posto una matrice (n_campioni x colonne) con i parametri delle colonne indicate.
+        """
+        # Le colonne costanti danno 0/0 = NaN senza avvisi, come nelle operazioni pandas
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values -= self.offset_[positions]
+            values /= self.scale_[positions]
+        return values
+
+    def _column_blocks(self, columns: pd.Index, n_rows: int):
+        """
+        Suddivide le colonne in blocchi la cui matrice float64 occupa al più `BLOCK_BYTES` byte.
+        """
+        block_columns = max(1, self.BLOCK_BYTES // max(8 * n_rows, 1))
+        for start in range(0, len(columns), block_columns):
+            yield columns[start:start + block_columns]
+
+    @abstractmethod
+    def _compute_parameters(self, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calcola offset e fattore di scala di ogni colonna della matrice (n_campioni x n_colonne).
+        Deve essere implementato nelle sottoclassi.
+        """
+        pass
+
+    @abstractmethod
+    def _parameters_from_statistics(self, statistics: ScalingStatistics) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calcola offset e fattore di scala di ogni colonna dalle statistiche accumulate.
+        Deve essere implementato nelle sottoclassi.
+        """
+        pass
+
+class MinMaxScaler(FittedScaler):
+    """
+    Normalizzazione nell'intervallo [0, 1]: offset_ è il minimo e scale_ l'escursione
+    (massimo - minimo) di ogni colonna, calcolati ignorando i valori mancanti.
+    """
+    def _compute_parameters(self, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        minimum = np.nanmin(values, axis=0)
+        return minimum, np.nanmax(values, axis=0) - minimum
+
+    def _parameters_from_statistics(self, statistics: ScalingStatistics) -> tuple[np.ndarray, np.ndarray]:
+        return statistics.minimum.copy(), statistics.maximum - statistics.minimum
+
+class StandardScaler(FittedScaler):
+    """
+    Standardizzazione: offset_ è la media e scale_ la deviazione standard campionaria
+    (ddof=1, come in pandas) di ogni colonna, calcolate ignorando i valori mancanti.
+    """
+    def _compute_parameters(self, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        if not np.isnan(values).any():
+            # Senza valori mancanti le funzioni nan* eseguono le stesse operazioni, ma copiano la matrice
+            return values.mean(axis=0), values.std(axis=0, ddof=1)
+        return np.nanmean(values, axis=0), np.nanstd(values, axis=0, ddof=1)
+
+    def _parameters_from_statistics(self, statistics: ScalingStatistics) -> tuple[np.ndarray, np.ndarray]:
+        return statistics.mean.copy(), statistics.std(ddof=1)
+
 class FeatureScalerStrategyManager:
     """
     Factory per la gestione dinamica dello scaling delle feature.
@@ -72,5 +282,25 @@ class FeatureScalerStrategyManager:
             return FeatureScaler.normalize(data, exclude_columns)
         elif strategy == 'standardize':
             return FeatureScaler.standardize(data, exclude_columns)
+        else:
+            raise ValueError("Strategia non valida. Scegli tra 'normalize' o 'standardize'.")
+
+    @staticmethod
+    def get_scaler(strategy: str, exclude_columns: list = None) -> FittedScaler:
+        """
+        Restituisce uno scaler da addestrare con fit, ad esempio sul solo training set, e da
+        applicare con transform a qualsiasi dataset.
+
+        Args:
+            strategy (str): La strategia da applicare ('normalize' o 'standardize').
+            exclude_columns (list, optional): Lista di colonne da escludere dallo scaling.
+
+        Returns:
+            FittedScaler: Lo scaler non ancora addestrato.
+        """
+        if strategy == 'normalize':
+            return MinMaxScaler(exclude_columns)
+        elif strategy == 'standardize':
+            return StandardScaler(exclude_columns)
         else:
             raise ValueError("Strategia non valida. Scegli tra 'normalize' o 'standardize'.")
\ No newline at end of file
@@ -1,15 +1,38 @@
+import warnings
+import numpy as np
 import pandas as pd
 from .data_parser import ParserFactory
+from .streaming_statistics import ScalingStatistics, QuantileSketch, FrequentValuesSketch
+from models.knn import KNNClassifier
 
 class MissingValuesHandler:
     """
     Classe per la gestione dei valori mancanti in un DataFrame.
+
+    Oltre ai singoli passaggi (conversione, filtro delle etichette, riempimento), `impute`
+    esegue l'intera gestione con un solo passaggio per le statistiche e uno per il riempimento,
+    su blocchi di colonne di al più `BLOCK_BYTES` byte, con gli stessi risultati.
     """
+    # Memoria massima indicativa (in byte) di un blocco di colonne estratto dal DataFrame
+    BLOCK_BYTES = 4 * 1024 ** 2
+    LABEL_COLUMN = 'classtype_v1'
+    STRATEGIES = ('remove', 'mean', 'median', 'mode', 'knn')
+    # Numero di vicini usati di default dalla strategia 'knn'
+    KNN_NEIGHBORS = 5
+    _LEGACY_METHODS = {'remove': 'remove_missing_rows', 'mean': 'fill_missing_with_mean',
+                       'median': 'fill_missing_with_median', 'mode': 'fill_missing_with_mode',
+                       'knn': 'fill_missing_with_knn'}
+
     @staticmethod
     def convert_numeric_columns(data: pd.DataFrame) -> pd.DataFrame:
         """
         Converte le colonne numeriche rappresentate come stringhe in numeri float.
 
+        Le colonne già float (ad esempio lette con uno schema dichiarato, vedi
+        DelimitedDataParser) restano invariate, anche se float32; le altre colonne numeriche
+        vengono convertite in float64 direttamente e solo le colonne testuali passano da
+        `pd.to_numeric`.
+
         Args:
             data (pd.DataFrame): Il dataset con possibili valori numerici rappresentati come stringhe.
 
@@ -17,6 +40,11 @@ class MissingValuesHandler:
             pd.DataFrame: Dataset con colonne numeriche convertite in float.
         """
         for column in data.columns:
+            if pd.api.types.is_float_dtype(data[column]):
+                continue
+            if pd.api.types.is_numeric_dtype(data[column]):
+                data[column] = data[column].astype('float64')
+                continue
             # Converte in float forzatamente
             try:
                 data[column] = pd.to_numeric(data[column], errors='coerce').astype('float64')
@@ -90,37 +118,430 @@ class MissingValuesHandler:
         mode = data.mode().iloc[0]
         return data.fillna(mode)
 
+    @staticmethod
+    def fill_missing_with_knn(data: pd.DataFrame, k: int = None, exclude_columns: list = None,
+                              inplace: bool = False) -> pd.DataFrame:
+        """
+        Riempie ogni valore mancante con la media dei valori dei k vicini più vicini tra le
+        righe complete.
+
+        La distanza è euclidea sulle sole feature osservate nella riga da completare: le righe
+        con gli stessi valori mancanti vengono raggruppate e per ogni gruppo i vicini sono
+        cercati con il motore di KNNClassifier (ricerca esaustiva vettorizzata, a blocchi di
+        query e di training entro il budget di memoria) sulle colonne osservate delle righe
+        complete; un albero andrebbe ricostruito per ogni gruppo e non verrebbe ammortizzato. Il
+        fattore di scala della distanza euclidea mascherata, uguale per tutte le righe del
+        gruppo, non cambia i vicini. Le righe senza feature osservate ricevono la media delle
+        righe complete. Le colonne escluse (di default `classtype_v1`) non entrano nella
+        distanza e non vengono riempite.
+
+        Args:
+            data (pd.DataFrame): Il dataset con colonne numeriche e possibili valori mancanti.
+            k (int, optional): Numero di vicini (default `KNN_NEIGHBORS`).
+            exclude_columns (list, optional): Colonne escluse dalla distanza e dal riempimento
+                                              (default ['classtype_v1']).
+            inplace (bool): Se True, riempie i valori mancanti direttamente in `data` (default False).
+
+        Returns:
+            pd.DataFrame: Dataset con valori mancanti riempiti dai vicini.
+        """
+        k = MissingValuesHandler.KNN_NEIGHBORS if k is None else k
+        if isinstance(k, bool) or not isinstance(k, int) or k <= 0:
+            raise ValueError("k deve essere un intero positivo.")
+        exclude_columns = [MissingValuesHandler.LABEL_COLUMN] if exclude_columns is None else exclude_columns
+        features = data.columns[~data.columns.isin(exclude_columns)]
+        values = data[features].to_numpy(dtype=np.float64)
+        missing = np.isnan(values)
+        incomplete = missing.any(axis=1)
+        result = data if inplace else data.copy()
+        if not incomplete.any():
+            return result
+        donors = values[~incomplete]
+        if len(donors) == 0:
+            raise ValueError("Il dataset non contiene righe complete da usare come vicini.")
+
+        rows = np.flatnonzero(incomplete)
+        patterns, groups = np.unique(missing[rows], axis=0, return_inverse=True)
+        groups = groups.ravel()
+        labels = pd.Series(np.zeros(len(donors)))
+        for position, pattern in enumerate(patterns):
+            group = rows[groups == position]
+            observed = ~pattern
+            if not observed.any():
+                values[np.ix_(group, pattern)] = donors.mean(axis=0)
+                continue
+            knn = KNNClassifier(k)
+            knn.fit(pd.DataFrame(donors[:, observed]), labels)
+            _, neighbors = knn.kneighbors(pd.DataFrame(values[np.ix_(group, observed)]))
+            values[np.ix_(group, pattern)] = donors[:, pattern][neighbors].mean(axis=1)
+
+        for position in np.flatnonzero(missing.any(axis=0)):
+            column = features[position]
+            result.loc[:, column] = values[:, position].astype(result[column].dtype, copy=False)
+        return result
+
+    @staticmethod
+    def impute(data: pd.DataFrame, strategy: str, inplace: bool = False) -> pd.DataFrame:
+        """
+        Converte le colonne in numeri, rimuove le righe senza `classtype_v1` e gestisce i valori
+        mancanti con la strategia indicata, con gli stessi risultati dei singoli passaggi.
+
+        Le statistiche (media, mediana o moda) vengono calcolate a blocchi di colonne sulle sole
+        righe con etichetta, senza creare il DataFrame filtrato intermedio; il riempimento
+        avviene poi sul posto, blocco per blocco, nel DataFrame risultato. Il DataFrame viene
+        copiato al più una volta, per rimuovere le righe; con `inplace` e senza righe da
+        rimuovere il riempimento avviene direttamente in `data`. Con 'knn' i valori mancanti
+        vengono riempiti dai vicini tra le righe complete (vedi `fill_missing_with_knn`).
+
+        Args:
+            data (pd.DataFrame): Il dataset con possibili valori mancanti.
+            strategy (str): La strategia da applicare ('remove', 'mean', 'median', 'mode', 'knn').
+            inplace (bool): Se True, riempie i valori mancanti direttamente in `data` quando
+                            nessuna riga va rimossa (default False).
+
+        Returns:
+            pd.DataFrame: Dataset con valori mancanti gestiti.
+        """
+        if strategy not in MissingValuesHandler.STRATEGIES:
+            raise ValueError("Strategia non valida. Scegli tra 'remove', 'mean', 'median', 'mode', 'knn'.")
+        data = MissingValuesHandler.convert_numeric_columns(data)
+        if not all(pd.api.types.is_float_dtype(dtype) for dtype in data.dtypes):
+            # Colonne non convertibili: le statistiche di pandas sollevano gli stessi errori di prima
+            data = MissingValuesHandler.remove_rows_with_missing_classtype(data)
+            return getattr(MissingValuesHandler, MissingValuesHandler._LEGACY_METHODS[strategy])(data)
+
+        keep = data[MissingValuesHandler.LABEL_COLUMN].notna().to_numpy()
+        blocks = list(MissingValuesHandler._column_blocks(data.dtypes, len(data)))
+
+        if strategy == 'knn':
+            if keep.all():
+                return MissingValuesHandler.fill_missing_with_knn(data, inplace=inplace)
+            return MissingValuesHandler.fill_missing_with_knn(data[keep], inplace=True)
+
+        if strategy == 'remove':
+            for block in blocks:
+                keep &= ~np.isnan(data[block].to_numpy()).any(axis=1)
+            return data[keep] if not inplace or not keep.all() else data
+
+        # Primo passaggio: statistiche delle righe con etichetta, per le sole colonne con mancanti
+        fill = []
+        all_kept = keep.all()
+        for block in blocks:
+            values = data[block].to_numpy()
+            missing = np.isnan(values)
+            if not all_kept:
+                values, missing = values[keep], missing[keep]
+            has_missing = missing.any(axis=0)
+            if has_missing.all():
+                fill.append((block, MissingValuesHandler._column_statistics(strategy, values, missing)))
+            elif has_missing.any():
+                statistics = MissingValuesHandler._column_statistics(
+                    strategy, values[:, has_missing], missing[:, has_missing])
+                fill.append((block[has_missing], statistics))
+
+        # Secondo passaggio: riempimento sul posto nel DataFrame risultato
+        result = data[keep] if not all_kept else (data if inplace else data.copy())
+        for block, statistics in fill:
+            # La selezione di più colonne crea già una copia: la matrice si può modificare
+            values = result[block].to_numpy()
+            np.copyto(values, statistics, where=np.isnan(values))
+            result.loc[:, block] = values
+        return result
+
+    @staticmethod
+    def _column_blocks(dtypes: pd.Series, n_rows: int):
+        """
+        Suddivide le colonne (indice di `dtypes`) in blocchi dello stesso tipo di al più
+        `BLOCK_BYTES` byte.
+        """
+        groups = {}
+        for column, dtype in dtypes.items():
+            groups.setdefault(dtype, []).append(column)
+        for dtype, columns in groups.items():
+            block_columns = max(1, MissingValuesHandler.BLOCK_BYTES // max(dtype.itemsize * n_rows, 1))
+            for start in range(0, len(columns), block_columns):
+                yield pd.Index(columns[start:start + block_columns])
+
+    @staticmethod
+    def _column_statistics(strategy: str, values: np.ndarray, missing: np.ndarray) -> np.ndarray:
+        """
+        Calcola la statistica di ogni colonna della matrice ignorando i valori mancanti, con le
+        stesse operazioni delle riduzioni di pandas.
+        """
+        # In ordine Fortran ogni colonna è contigua e le riduzioni sommano come in pandas
+        values = np.asfortranarray(values)
+        if len(values) == 0:
+            return np.full(values.shape[1], np.nan, dtype=values.dtype)
+        if strategy == 'mean':
+            # Come in pandas: somma con i mancanti a zero divisa per il conteggio, nel tipo della colonna.
+            # La copia mantiene l'ordine Fortran (copy() passerebbe all'ordine C e cambierebbe le somme)
+            values = np.array(values, order='F')
+            values[missing] = 0
+            count = (len(values) - missing.sum(axis=0)).astype(values.dtype)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return values.sum(axis=0, dtype=values.dtype) / count
+        if strategy == 'median':
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                return np.nanmedian(values, axis=0)
+        return MissingValuesHandler._column_modes(values)
+
+    @staticmethod
+    def _column_modes(values: np.ndarray) -> np.ndarray:
+        """
+        Calcola la moda di ogni colonna ignorando i valori mancanti; a parità di frequenza
+        sceglie il valore più piccolo, come `DataFrame.mode().iloc[0]`.
+
+        Le colonne vengono ordinate e le sequenze di valori uguali misurate tutte insieme sulla
+        matrice appiattita: i NaN, ordinati in fondo e diversi da ogni valore, formano sequenze
+        di lunghezza 1 che seguono tutti i valori validi e vengono scelte solo se la colonna
+        non ne contiene.
+        """
+        n_rows, n_columns = values.shape
+        flat = np.sort(values, axis=0).ravel(order='F')
+        starts = np.ones(len(flat), dtype=bool)
+        starts[1:] = flat[1:] != flat[:-1]
+        starts[::n_rows] = True
+        positions = np.flatnonzero(starts)
+        lengths = np.diff(np.append(positions, len(flat)))
+        run_columns = positions // n_rows
+        first_runs = np.searchsorted(run_columns, np.arange(n_columns))
+        longest = np.maximum.reduceat(lengths, first_runs)
+        candidates = np.where(lengths == longest[run_columns], np.arange(len(lengths)), len(lengths))
+        return flat[positions[np.minimum.reduceat(candidates, first_runs)]]
+
+
+class MissingValuesImputer:
+    """
+    Imputer con valori di riempimento memorizzati.
+
+    `fit` calcola la statistica della strategia (media, mediana o moda) di ogni colonna non
+    esclusa, con le stesse operazioni di `MissingValuesHandler`, e la memorizza in
+    `fill_values_`, un array float64 allineato a `columns_`. `transform` sostituisce i valori
+    mancanti con questi valori senza ricalcolare statistiche, in O(righe x feature), anche su
+    dati diversi da quelli usati in fit, ad esempio il test set di uno split o un singolo
+    record: per un record come array NumPy il riempimento è una sola operazione vettoriale.
+
+    Per i dataset che non entrano in memoria, `partial_fit` stima i valori di riempimento
+    blocco per blocco con un accumulatore in streaming (la media con `ScalingStatistics`, la
+    mediana con il t-digest di `QuantileSketch`, la moda con lo sketch di Misra-Gries di
+    `FrequentValuesSketch`, con gli errori massimi documentati nelle rispettive classi) e
+    `fit_from_statistics` li ricava da un accumulatore calcolato altrove, ad esempio unendo
+    quelli di più processi.
+    """
+    STRATEGIES = ('mean', 'median', 'mode')
+    _STATISTICS = {'mean': ScalingStatistics, 'median': QuantileSketch, 'mode': FrequentValuesSketch}
+
+    def __init__(self, strategy: str, exclude_columns: list = None):
+        """
+        Args:
+            strategy (str): La statistica dei valori di riempimento ('mean', 'median', 'mode').
+            exclude_columns (list, optional): Lista di colonne da escludere dall'imputazione,
+                                              ad esempio `classtype_v1`.
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError("Strategia non valida. Scegli tra 'mean', 'median', 'mode'.")
+        self.strategy = strategy
+        self.exclude_columns = [] if exclude_columns is None else list(exclude_columns)
+        self.columns_ = None
+        self.fill_values_ = None
+        self.statistics_ = None
+
+    def fit(self, data: pd.DataFrame) -> 'MissingValuesImputer':
+        """
+        Calcola i valori di riempimento delle colonne non escluse, ignorando i valori mancanti.
+
+        Args:
+            data (pd.DataFrame): Il dataset con colonne numeriche su cui stimare le statistiche.
+
+        Returns:
+            MissingValuesImputer: L'imputer stesso.
+        """
+        if not isinstance(data, pd.DataFrame):
+            raise ValueError("I dati devono essere forniti come Pandas DataFrame.")
+        if len(data) == 0:
+            raise ValueError("Il dataset su cui addestrare l'imputer è vuoto.")
+        columns = data.columns[~data.columns.isin(self.exclude_columns)]
+        if not columns.is_unique:
+            raise ValueError("Le colonne del dataset devono avere nomi distinti.")
+        dtypes = data.dtypes[columns]
+        self._check_numeric(dtypes)
+
+        fill_values = np.empty(len(columns))
+        for block in MissingValuesHandler._column_blocks(dtypes, len(data)):
+            values = data[block].to_numpy()
+            if not pd.api.types.is_float_dtype(values.dtype):
+                # Colonne intere o booleane: come dopo MissingValuesHandler.convert_numeric_columns
+                values = values.astype(np.float64)
+            statistics = MissingValuesHandler._column_statistics(self.strategy, values, np.isnan(values))
+            fill_values[columns.get_indexer(block)] = statistics
+        self.columns_ = columns
+        self.fill_values_ = fill_values
+        self.statistics_ = None
+        return self
+
+    def partial_fit(self, data: pd.DataFrame) -> 'MissingValuesImputer':
+        """
+        Aggiorna i valori di riempimento con un blocco di righe, ad esempio letto con
+        `DataParser.iter_chunks`. Le righe non vengono conservate: l'accumulatore della
+        strategia è in `statistics_`.
+
+        Args:
+            data (pd.DataFrame): Blocco del dataset.
+
+        Returns:
+            MissingValuesImputer: L'imputer stesso.
+        """
+        if self.statistics_ is None:
+            self.statistics_ = self._STATISTICS[self.strategy](self.exclude_columns)
+        self.statistics_.update(data)
+        return self.fit_from_statistics(self.statistics_)
+
+    def fit_from_statistics(self, statistics: ScalingStatistics | QuantileSketch | FrequentValuesSketch
+                            ) -> 'MissingValuesImputer':
+        """
+        Ricava i valori di riempimento da un accumulatore in streaming: `ScalingStatistics` per
+        la media, `QuantileSketch` per la mediana, `FrequentValuesSketch` per la moda.
+
+        Args:
+            statistics (ScalingStatistics | QuantileSketch | FrequentValuesSketch): Accumulatore
+                delle colonne da imputare.
+
+        Returns:
+            MissingValuesImputer: L'imputer stesso.
+        """
+        if not isinstance(statistics, self._STATISTICS[self.strategy]):
+            raise ValueError(f"La strategia '{self.strategy}' richiede un accumulatore "
+                             f"{self._STATISTICS[self.strategy].__name__}.")
+        if statistics.count is None or not statistics.count.any():
+            raise ValueError("Le statistiche non contengono dati su cui addestrare l'imputer.")
+        self.columns_ = statistics.columns
+        if self.strategy == 'mean':
+            self.fill_values_ = statistics.mean.copy()
+        elif self.strategy == 'median':
+            self.fill_values_ = statistics.median()
+        else:
+            self.fill_values_ = statistics.mode()
+        return self
+
+    def transform(self, data: pd.DataFrame | pd.Series | np.ndarray,
+                  inplace: bool = False) -> pd.DataFrame | pd.Series | np.ndarray:
+        """
+        Sostituisce i valori mancanti delle colonne usate in fit con i valori memorizzati.
+
+        Un DataFrame viene riempito a blocchi di colonne dello stesso tipo, toccando solo i
+        blocchi con valori mancanti; un singolo record può essere una Series con le colonne
+        usate in fit oppure un array NumPy con le sole feature nell'ordine di `columns_`, la
+        forma più veloce (anche una matrice, una riga per record).
+
+        Args:
+            data (pd.DataFrame | pd.Series | np.ndarray): Il dataset o il record da completare.
+            inplace (bool): Se True, riempie direttamente il DataFrame o l'array float `data`
+                            (default False); non disponibile per una Series.
+
+        Returns:
+            pd.DataFrame | pd.Series | np.ndarray: Dati senza valori mancanti nelle colonne usate in fit.
+        """
+        if self.columns_ is None:
+            raise ValueError("L'imputer non è stato addestrato. Usa il metodo 'fit' prima di trasformare.")
+
+        if isinstance(data, np.ndarray):
+            if data.ndim not in (1, 2) or data.shape[-1] != len(self.columns_):
+                raise ValueError("L'array deve avere una colonna per ogni feature usata in fit.")
+            if not pd.api.types.is_float_dtype(data.dtype):
+                if inplace:
+                    raise ValueError("inplace è disponibile solo per gli array float.")
+                values = data.astype(np.float64)
+            else:
+                values = data if inplace else data.copy()
+            np.copyto(values, self.fill_values_, where=np.isnan(values))
+            return values
+
+        if isinstance(data, pd.Series):
+            if inplace:
+                raise ValueError("inplace è disponibile solo per i DataFrame e gli array.")
+            positions = data.index.get_indexer(self.columns_)
+            if (positions < 0).any():
+                raise ValueError("I dati non contengono tutte le colonne usate in fit.")
+            values = data.to_numpy(copy=True)
+            missing = pd.isna(values[positions])
+            values[positions[missing]] = self.fill_values_[missing]
+            return pd.Series(values, index=data.index, name=data.name, copy=False)
+
+        if not self.columns_.isin(data.columns).all():
+            raise ValueError("I dati non contengono tutte le colonne usate in fit.")
+        dtypes = data.dtypes[self.columns_]
+        self._check_numeric(dtypes)
+        result = data if inplace else data.copy()
+        for block in MissingValuesHandler._column_blocks(dtypes, len(result)):
+            if not pd.api.types.is_float_dtype(dtypes[block[0]]):
+                # Le colonne intere o booleane non possono contenere valori mancanti
+                continue
+            # La selezione di più colonne crea già una copia: la matrice si può modificare
+            values = result[block].to_numpy()
+            missing = np.isnan(values)
+            if missing.any():
+                np.copyto(values, self.fill_values_[self.columns_.get_indexer(block)], where=missing)
+                result.loc[:, block] = values
+        return result
+
+    def fit_transform(self, data: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+        """
+        Calcola i valori di riempimento e li applica allo stesso dataset.
+
+        Args:
+            data (pd.DataFrame): Il dataset da completare.
+            inplace (bool): Se True, riempie i valori mancanti direttamente in `data` (default False).
+
+        Returns:
+            pd.DataFrame: Dataset senza valori mancanti nelle colonne non escluse.
+        """
+        return self.fit(data).transform(data, inplace=inplace)
+
+    @staticmethod
+    def _check_numeric(dtypes: pd.Series) -> None:
+        """
+        Verifica che le colonne siano numeriche, ad esempio dopo `convert_numeric_columns`.
+        """
+        if not all(isinstance(dtype, np.dtype) and dtype.kind in 'biuf' for dtype in dtypes):
+            raise ValueError("Le colonne da imputare devono essere numeriche: usa prima "
+                             "MissingValuesHandler.convert_numeric_columns.")
+
+
 class MissingValuesStrategyManager:
     """
     Factory per la gestione dinamica dei valori mancanti.
     """
     @staticmethod
-    def handle_missing_values(strategy: str, data: pd.DataFrame) -> pd.DataFrame:
+    def handle_missing_values(strategy: str, data: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
         """
-        Gestisce i valori mancanti utilizzando la strategia specificata.
+        Gestisce i valori mancanti utilizzando la strategia specificata (vedi MissingValuesHandler.impute).
 
         Args:
-            strategy (str): La strategia da applicare ('remove', 'mean', 'median', 'mode').
+            strategy (str): La strategia da applicare ('remove', 'mean', 'median', 'mode', 'knn').
             data (pd.DataFrame): Il dataset con possibili valori mancanti.
+            inplace (bool): Se True, riempie i valori mancanti direttamente in `data` quando
+                            nessuna riga va rimossa (default False).
 
         Returns:
             pd.DataFrame: Dataset con valori mancanti gestiti.
         """
-        data = MissingValuesHandler.convert_numeric_columns(data)
+        return MissingValuesHandler.impute(data, strategy, inplace=inplace)
 
-        # Rimuovi righe con classtype_v1 mancante
-        data = MissingValuesHandler.remove_rows_with_missing_classtype(data)
+    @staticmethod
+    def get_imputer(strategy: str, exclude_columns: list = None) -> MissingValuesImputer:
+        """
+        Restituisce un imputer da addestrare con fit, ad esempio sul solo training set, e da
+        applicare con transform a qualsiasi dataset o record.
 
-        if strategy == 'remove':
-            return MissingValuesHandler.remove_missing_rows(data)
-        elif strategy == 'mean':
-            return MissingValuesHandler.fill_missing_with_mean(data)
-        elif strategy == 'median':
-            return MissingValuesHandler.fill_missing_with_median(data)
-        elif strategy == 'mode':
-            return MissingValuesHandler.fill_missing_with_mode(data)
-        else:
-            raise ValueError("Strategia non valida. Scegli tra 'remove', 'mean', 'median', 'mode'.")
+        Args:
+            strategy (str): La strategia da applicare ('mean', 'median', 'mode').
+            exclude_columns (list, optional): Lista di colonne da escludere dall'imputazione.
+
+        Returns:
+            MissingValuesImputer: L'imputer non ancora addestrato.
+        """
+        return MissingValuesImputer(strategy, exclude_columns)
 
 if __name__ == "__main__":
     # Esempio di utilizzo della classe MissingValuesFactory
@@ -132,7 +553,7 @@ if __name__ == "__main__":
     print(data.head())
 
     # Applicare diverse strategie usando la factory
-    strategies = ['remove', 'mean', 'median', 'mode']
+    strategies = ['remove', 'mean', 'median', 'mode', 'knn']
 
     for strategy in strategies:
         print(f"\nStrategy: {strategy}")
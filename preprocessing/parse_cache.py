@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+class ParseCache:
+    """
+    Cache su disco dei dataset già letti e ripuliti dai parser.
+
+    Ogni file viene associato a una cartella della cache in base al percorso assoluto e alla
+    configurazione del parser (tipo e schema di lettura); la voce è valida finché data di
+    modifica e dimensione del file non cambiano. Il DataFrame viene salvato in formato
+    colonnare binario: le colonne dello stesso tipo NumPy formano una sola matrice `.npy` in
+    ordine Fortran, la stessa disposizione dei blocchi di pandas, così che al caricamento
+    vengano mappate in memoria e usate dal DataFrame senza copie né parsing. Le colonne di
+    testo (stringhe e valori mancanti) sono salvate come stringhe Unicode con la maschera dei
+    mancanti; i DataFrame con altri tipi non vengono memorizzati.
+
+    La mappatura è copy-on-write: il DataFrame caricato si può modificare senza alterare la
+    cache. Le voci vengono scritte in una cartella temporanea e poi rinominate, così che più
+    processi possano usare la stessa cache; una voce illeggibile viene trattata come assente.
+    """
+    DEFAULT_DIRECTORY = '.parse_cache'
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, mmap: bool = True):
+        """
+        Args:
+            directory (str): Cartella della cache, creata al primo salvataggio (default '.parse_cache').
+            mmap (bool): Se True, mappa in memoria le colonne numeriche invece di leggerle (default True).
+        """
+        self.directory = directory
+        self.mmap = mmap
+        self.hits = 0
+        self.misses = 0
+
+    def load_or_parse(self, parser, file_path: str) -> pd.DataFrame:
+        """
+        Restituisce il dataset dalla cache se la voce è valida, altrimenti lo legge con il parser
+        e lo salva nella cache.
+
+        Args:
+            parser (DataParser): Parser del formato del file.
+            file_path (str): Percorso del file.
+
+        Returns:
+            pd.DataFrame: Il dataset come restituito da `parser.parse`.
+        """
+        entry = self._entry_path(parser, file_path)
+        source = self._source(file_path)
+        data = self._load(entry, source)
+        if data is not None:
+            self.hits += 1
+            print(f"Cache hit: {file_path}")
+            return data
+
+        self.misses += 1
+        print(f"Cache miss: {file_path}")
+        data = parser.parse(file_path)
+        if not self._store(entry, source, data):
+            print(f"Il dataset contiene colonne che non possono essere salvate nella cache: {file_path}")
+        return data
+
+    def report(self) -> str:
+        """
+        Restituisce il riepilogo degli accessi alla cache.
+        """
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"Cache dei dataset: {self.hits} hit, {self.misses} miss ({rate:.0%} hit rate)"
+
+    def clear(self) -> None:
+        """
+        Elimina tutte le voci della cache.
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _entry_path(self, parser, file_path: str) -> str:
+        """
+        Restituisce la cartella della voce: una sola per ogni coppia (file, configurazione del parser).
+        """
+        config = repr((type(parser).__name__, sorted(vars(parser).items())))
+        key = hashlib.sha1(f"{os.path.abspath(file_path)}\0{config}".encode('utf-8')).hexdigest()[:20]
+        return os.path.join(self.directory, key)
+
+    @staticmethod
+    def _source(file_path: str) -> dict:
+        stat = os.stat(file_path)
+        return {'path': os.path.abspath(file_path), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+    def _load(self, entry: str, source: dict) -> pd.DataFrame | None:
+        """
+        Carica la voce se esiste ed è aggiornata rispetto al file, altrimenti restituisce None.
+        """
+        try:
+            with open(os.path.join(entry, 'meta.json'), encoding='utf-8') as file:
+                meta = json.load(file)
+            if meta['format_version'] != self.FORMAT_VERSION or meta['source'] != source:
+                return None
+
+            frames = []
+            for block in meta['blocks']:
+                values = np.load(os.path.join(entry, block['file']), mmap_mode='c' if self.mmap else None)
+                frames.append(pd.DataFrame(values, columns=block['columns'], copy=False))
+            for column in meta['text_columns']:
+                values = self._read_text(entry, column['file'])
+                frames.append(pd.DataFrame({column['name']: values}))
+            index = meta['index']
+            if index['text']:
+                index_values = self._read_text(entry, index['file'])
+            else:
+                index_values = np.load(os.path.join(entry, index['file']), mmap_mode='c' if self.mmap else None)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if len(frames) == 0:
+            data = pd.DataFrame(index=pd.RangeIndex(len(index_values)))
+        else:
+            data = frames[0] if len(frames) == 1 else pd.concat(frames, axis=1, copy=False)
+        if data.columns.tolist() != meta['columns']:
+            # Colonne di tipi diversi alternate: il riordino richiede una copia
+            data = data[meta['columns']]
+        data.index = pd.Index(index_values, name=index['name'], copy=False)
+        return data
+
+    def _store(self, entry: str, source: dict, data: pd.DataFrame) -> bool:
+        """
+        Salva il DataFrame nella voce. Restituisce False se il DataFrame ha colonne di tipi non supportati.
+        """
+        if not data.columns.is_unique:
+            return False
+        groups = {}
+        text_columns = []
+        for column in data.columns:
+            dtype = data[column].dtype
+            if isinstance(dtype, np.dtype) and dtype != object:
+                groups.setdefault(dtype, []).append(column)
+            elif self._is_text(data[column]):
+                text_columns.append(column)
+            else:
+                return False
+        index_is_text = data.index.dtype == object
+        if not isinstance(data.index.dtype, np.dtype) or (index_is_text and not self._is_text(data.index)):
+            return False
+
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = tempfile.mkdtemp(dir=self.directory, prefix='.tmp-')
+        try:
+            meta = {'format_version': self.FORMAT_VERSION, 'source': source, 'columns': data.columns.tolist(),
+                    'blocks': [], 'text_columns': []}
+            for position, (dtype, columns) in enumerate(groups.items()):
+                name = f"block_{position}.npy"
+                np.save(os.path.join(temporary, name), np.asfortranarray(data[columns].to_numpy(dtype=dtype)))
+                meta['blocks'].append({'file': name, 'columns': columns})
+            for position, column in enumerate(text_columns):
+                name = f"text_{position}"
+                self._write_text(temporary, name, data[column])
+                meta['text_columns'].append({'file': name, 'name': column})
+            if index_is_text:
+                self._write_text(temporary, 'index', data.index)
+            else:
+                np.save(os.path.join(temporary, 'index.npy'), data.index.to_numpy())
+            meta['index'] = {'file': 'index' if index_is_text else 'index.npy', 'text': bool(index_is_text),
+                             'name': data.index.name}
+            with open(os.path.join(temporary, 'meta.json'), 'w', encoding='utf-8') as file:
+                json.dump(meta, file, indent=2, default=lambda value: value.item())
+
+            self._publish(temporary, entry, source)
+        except OSError:
+            shutil.rmtree(temporary, ignore_errors=True)
+        return True
+
+    def _publish(self, temporary: str, entry: str, source: dict) -> None:
+        """
+        Rende visibile la voce scritta nella cartella temporanea rinominandola, un'operazione
+        atomica: un `_load` concorrente vede la voce completa oppure nessuna voce. Se la voce
+        esiste già ed è aggiornata (l'ha scritta un altro processo) si mantiene quella e la
+        cartella temporanea viene eliminata. Una voce non più aggiornata viene prima spostata
+        fuori dal suo percorso, poi eliminata e sostituita.
+        """
+        for _ in range(3):
+            try:
+                os.rename(temporary, entry)
+                return
+            except OSError:
+                if not os.path.isdir(entry):
+                    raise
+            if self._is_current(entry, source):
+                break
+            stale = tempfile.mkdtemp(dir=self.directory, prefix='.stale-')
+            try:
+                os.rename(entry, os.path.join(stale, 'entry'))
+            except OSError:
+                # Già spostata o sostituita da un altro processo: si riprova la rinomina
+                pass
+            shutil.rmtree(stale, ignore_errors=True)
+        shutil.rmtree(temporary, ignore_errors=True)
+
+    def _is_current(self, entry: str, source: dict) -> bool:
+        """
+        Verifica che la voce sia leggibile e aggiornata rispetto al file.
+        """
+        try:
+            with open(os.path.join(entry, 'meta.json'), encoding='utf-8') as file:
+                meta = json.load(file)
+            return meta['format_version'] == self.FORMAT_VERSION and meta['source'] == source
+        except (OSError, ValueError, KeyError):
+            return False
+
+    @staticmethod
+    def _is_text(values: pd.Series | pd.Index) -> bool:
+        """
+        Verifica che una colonna di oggetti contenga solo stringhe e valori mancanti.
+        """
+        missing = pd.isna(values)
+        return all(isinstance(value, str) for value in np.asarray(values, dtype=object)[~missing])
+
+    @staticmethod
+    def _write_text(path: str, name: str, values: pd.Series | pd.Index) -> None:
+        missing = np.asarray(pd.isna(values))
+        strings = np.asarray(values, dtype=object).copy()
+        strings[missing] = ''
+        np.save(os.path.join(path, name + '.npy'), strings.astype(str))
+        np.save(os.path.join(path, name + '_missing.npy'), missing)
+
+    @staticmethod
+    def _read_text(path: str, name: str) -> np.ndarray:
+        values = np.load(os.path.join(path, name + '.npy')).astype(object)
+        values[np.load(os.path.join(path, name + '_missing.npy'))] = np.nan
+        return values
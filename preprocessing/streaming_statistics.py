@@ -0,0 +1,463 @@
+import warnings
+import numpy as np
+import pandas as pd
+
+class _ColumnStatistics:
+    """
+    Base degli accumulatori in streaming: gestisce le colonne (non escluse) a cui si
+    riferiscono le statistiche, uguali in ogni blocco e in ogni accumulatore da unire.
+    """
+    def __init__(self, exclude_columns: list = None):
+        """
+        Args:
+            exclude_columns (list, optional): Lista di colonne da escludere dalle statistiche.
+        """
+        self.exclude_columns = [] if exclude_columns is None else list(exclude_columns)
+        self.columns = None
+
+    def _block_values(self, data: pd.DataFrame) -> np.ndarray | None:
+        """
+        Restituisce la matrice float64 in ordine Fortran delle colonne del blocco, oppure None
+        se il blocco non ha righe.
+        """
+        if not isinstance(data, pd.DataFrame):
+            raise ValueError("I dati devono essere forniti come Pandas DataFrame.")
+        columns = data.columns[~data.columns.isin(self.exclude_columns)]
+        if self.columns is None:
+            self.columns = columns
+        elif len(columns) != len(self.columns) or not self.columns.isin(columns).all():
+            raise ValueError("Il blocco deve avere le stesse colonne dei blocchi precedenti.")
+        if len(data) == 0:
+            return None
+        # In ordine Fortran ogni colonna è contigua, come nelle riduzioni di FittedScaler.fit
+        return np.asfortranarray(data[self.columns].to_numpy(dtype=np.float64))
+
+    def _merge_order(self, other: '_ColumnStatistics') -> np.ndarray | None:
+        """
+        Restituisce le posizioni delle colonne di `self` tra quelle di `other`, oppure None se
+        `other` non contiene ancora dati.
+        """
+        if other.columns is None:
+            return None
+        if self.columns is None:
+            self.columns = other.columns
+        elif len(other.columns) != len(self.columns) or not self.columns.isin(other.columns).all():
+            raise ValueError("Gli accumulatori devono riferirsi alle stesse colonne.")
+        return other.columns.get_indexer(self.columns)
+
+
+class ScalingStatistics(_ColumnStatistics):
+    """
+    Accumulatore in streaming delle statistiche dello scaling (conteggio, minimo, massimo,
+    media e somma dei quadrati degli scarti) di ogni colonna.
+
+    Ogni blocco di righe viene riassunto con riduzioni vettorizzate e unito ai blocchi
+    precedenti con la formula di Chan per la varianza, la variante parallela dell'algoritmo
+    di Welford: la media e la varianza non richiedono di conservare i dati e due
+    accumulatori calcolati su parti diverse del dataset, ad esempio da processi diversi,
+    possono essere uniti con `merge`. I valori mancanti vengono ignorati, come in pandas.
+
+    Minimo e massimo coincidono con quelli calcolati sull'intero dataset; con un solo blocco
+    coincidono anche media e deviazione standard, mentre con più blocchi differiscono solo
+    per gli arrotondamenti (errore relativo dell'ordine di 1e-15 per blocco).
+    """
+    def __init__(self, exclude_columns: list = None):
+        """
+        Args:
+            exclude_columns (list, optional): Lista di colonne da escludere dalle statistiche.
+        """
+        super().__init__(exclude_columns)
+        self.count = None
+        self.minimum = None
+        self.maximum = None
+        self.mean = None
+        self.m2 = None
+
+    def update(self, data: pd.DataFrame) -> 'ScalingStatistics':
+        """
+        Aggiunge un blocco di righe alle statistiche.
+
+        Args:
+            data (pd.DataFrame): Blocco del dataset, con le stesse colonne dei blocchi precedenti.
+
+        Returns:
+            ScalingStatistics: L'accumulatore stesso.
+        """
+        values = self._block_values(data)
+        if values is None:
+            return self
+        missing = np.isnan(values)
+        count = len(values) - missing.sum(axis=0)
+        with warnings.catch_warnings():
+            # Le colonne senza valori validi nel blocco danno statistiche NaN, scartate in _combine
+            warnings.simplefilter('ignore', RuntimeWarning)
+            if missing.any():
+                minimum, maximum = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+                values[missing] = 0
+            else:
+                minimum, maximum = values.min(axis=0), values.max(axis=0)
+            # Stesse operazioni di np.nanvar, così che con un solo blocco la varianza coincida
+            mean = values.sum(axis=0) / count
+            np.subtract(values, mean, out=values)
+            values[missing] = 0
+            m2 = np.multiply(values, values, out=values).sum(axis=0)
+
+        self._combine(count, minimum, maximum, mean, m2)
+        return self
+
+    def merge(self, other: 'ScalingStatistics') -> 'ScalingStatistics':
+        """
+        Unisce le statistiche di un altro accumulatore, calcolate su altre righe dello stesso dataset.
+
+        Args:
+            other (ScalingStatistics): Accumulatore da unire.
+
+        Returns:
+            ScalingStatistics: L'accumulatore stesso.
+        """
+        order = self._merge_order(other)
+        if order is None:
+            return self
+        self._combine(other.count[order], other.minimum[order], other.maximum[order], other.mean[order],
+                      other.m2[order])
+        return self
+
+    def variance(self, ddof: int = 1) -> np.ndarray:
+        """
+        Restituisce la varianza di ogni colonna (campionaria con ddof=1, come in pandas).
+
+        Args:
+            ddof (int): Gradi di libertà sottratti al conteggio (default 1).
+
+        Returns:
+            np.ndarray: Varianza di ogni colonna; NaN se i valori sono al più ddof.
+        """
+        if self.columns is None:
+            raise ValueError("Le statistiche non contengono ancora dati.")
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.count > ddof, self.m2 / (self.count - ddof), np.nan)
+
+    def std(self, ddof: int = 1) -> np.ndarray:
+        """
+        Restituisce la deviazione standard di ogni colonna (campionaria con ddof=1).
+        """
+        return np.sqrt(self.variance(ddof))
+
+    def _combine(self, count: np.ndarray, minimum: np.ndarray, maximum: np.ndarray, mean: np.ndarray,
+                 m2: np.ndarray) -> None:
+        """
+        Unisce alle statistiche accumulate quelle di un altro insieme di righe (formula di Chan).
+        """
+        if self.count is None:
+            self.count = np.zeros(len(self.columns), dtype=np.int64)
+            self.minimum = np.full(len(self.columns), np.nan)
+            self.maximum = np.full(len(self.columns), np.nan)
+            self.mean = np.full(len(self.columns), np.nan)
+            self.m2 = np.full(len(self.columns), np.nan)
+
+        # Le colonne vuote da una delle due parti prendono direttamente le statistiche dell'altra
+        first = (self.count == 0) & (count > 0)
+        both = (self.count > 0) & (count > 0)
+        for current, new in [(self.minimum, minimum), (self.maximum, maximum), (self.mean, mean), (self.m2, m2)]:
+            current[first] = new[first]
+
+        # I conteggi vengono convertiti in float64 per evitare l'overflow del loro prodotto
+        count_a, count_b = self.count[both].astype(np.float64), count[both].astype(np.float64)
+        total = count_a + count_b
+        delta = mean[both] - self.mean[both]
+        self.m2[both] += m2[both] + delta ** 2 * (count_a * count_b / total)
+        self.mean[both] += delta * (count_b / total)
+        self.minimum[both] = np.minimum(self.minimum[both], minimum[both])
+        self.maximum[both] = np.maximum(self.maximum[both], maximum[both])
+        self.count += count
+
+
+class QuantileSketch(_ColumnStatistics):
+    """
+    Stima in streaming dei quantili (in particolare della mediana) di ogni colonna con un
+    t-digest.
+
+    Ogni colonna è riassunta da centroidi (media, peso) ordinati per valore. Finché la colonna
+    ha al più `compression` valori distinti i centroidi sono i valori stessi con il loro
+    conteggio e i quantili coincidono con quelli calcolati sull'intera colonna (la mediana con
+    quella di pandas). Oltre questa soglia i valori vicini vengono fusi con la funzione di
+    scala k1, k(q) = compression / (2π) · asin(2q - 1): ogni centroide copre al più un'unità
+    di k, quindi i centroidi sono piccoli sulle code e al più una frazione π / compression
+    dei valori attorno alla mediana. Il quantile viene interpolato tra i centri dei
+    centroidi; l'errore sul rango della mediana è indicativamente inferiore a
+    π / (2 · compression) (0.8% con il default 200) e non cresce con il numero di valori.
+
+    Due sketch calcolati su parti diverse del dataset, ad esempio da processi diversi, si
+    uniscono con `merge`. I valori mancanti vengono ignorati, come in pandas.
+    """
+    def __init__(self, exclude_columns: list = None, compression: int = 200):
+        """
+        Args:
+            exclude_columns (list, optional): Lista di colonne da escludere dalle statistiche.
+            compression (int): Numero di valori distinti conservati esattamente e parametro
+                               della funzione di scala (default 200).
+        """
+        if isinstance(compression, bool) or not isinstance(compression, int) or compression < 2:
+            raise ValueError("compression deve essere un intero maggiore di 1.")
+        super().__init__(exclude_columns)
+        self.compression = compression
+        self.count = None
+        self.minimum = None
+        self.maximum = None
+        self.means = None
+        self.weights = None
+        self.exact = None
+
+    def update(self, data: pd.DataFrame) -> 'QuantileSketch':
+        """
+        Aggiunge un blocco di righe allo sketch.
+
+        Args:
+            data (pd.DataFrame): Blocco del dataset, con le stesse colonne dei blocchi precedenti.
+
+        Returns:
+            QuantileSketch: Lo sketch stesso.
+        """
+        values = self._block_values(data)
+        if values is None:
+            return self
+        self._initialize()
+        for position in range(len(self.columns)):
+            column = values[:, position]
+            column = column[~np.isnan(column)]
+            self._combine(position, column, np.ones(len(column)), len(column), True)
+        return self
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """
+        Unisce un altro sketch, calcolato su altre righe dello stesso dataset.
+
+        Args:
+            other (QuantileSketch): Sketch da unire.
+
+        Returns:
+            QuantileSketch: Lo sketch stesso.
+        """
+        order = self._merge_order(other)
+        if order is None:
+            return self
+        self._initialize()
+        for position, other_position in enumerate(order):
+            self._combine(position, other.means[other_position], other.weights[other_position],
+                          other.count[other_position], other.exact[other_position])
+            if other.count[other_position] > 0:
+                self.minimum[position] = np.fmin(self.minimum[position], other.minimum[other_position])
+                self.maximum[position] = np.fmax(self.maximum[position], other.maximum[other_position])
+        return self
+
+    def quantile(self, q: float) -> np.ndarray:
+        """
+        Restituisce il quantile q di ogni colonna.
+
+        Args:
+            q (float): Quantile da stimare, tra 0 e 1.
+
+        Returns:
+            np.ndarray: Quantile di ogni colonna; NaN per le colonne senza valori.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("Il quantile deve essere compreso tra 0 e 1.")
+        return self._estimate(q, False)
+
+    def median(self) -> np.ndarray:
+        """
+        Restituisce la mediana di ogni colonna; con valori esatti, la media dei due valori
+        centrali per un numero pari di valori, come in pandas.
+        """
+        return self._estimate(0.5, True)
+
+    def _initialize(self) -> None:
+        if self.count is None:
+            self.count = np.zeros(len(self.columns), dtype=np.int64)
+            self.minimum = np.full(len(self.columns), np.nan)
+            self.maximum = np.full(len(self.columns), np.nan)
+            self.means = [np.empty(0) for _ in self.columns]
+            self.weights = [np.empty(0) for _ in self.columns]
+            self.exact = np.ones(len(self.columns), dtype=bool)
+
+    def _combine(self, position: int, means: np.ndarray, weights: np.ndarray, count: int, exact: bool) -> None:
+        """
+        Unisce ai centroidi di una colonna altri centroidi (o valori con peso 1) e li comprime.
+        """
+        if count == 0:
+            return
+        if len(means) > 0:
+            self.minimum[position] = np.fmin(self.minimum[position], means.min())
+            self.maximum[position] = np.fmax(self.maximum[position], means.max())
+        means = np.concatenate([self.means[position], means])
+        weights = np.concatenate([self.weights[position], weights])
+
+        # I valori uguali formano un solo centroide con la somma dei pesi
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        starts = np.flatnonzero(np.r_[True, means[1:] != means[:-1]])
+        means, weights = means[starts], np.add.reduceat(weights, starts)
+        exact = bool(self.exact[position] and exact)
+
+        if not exact or len(means) > self.compression:
+            # Centroidi raggruppati per unità della funzione di scala k1 del loro estremo sinistro
+            cumulative = np.cumsum(weights)
+            left = np.clip((cumulative - weights) / cumulative[-1], 0, 1)
+            scale = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * left - 1))
+            starts = np.flatnonzero(np.r_[True, scale[1:] != scale[:-1]])
+            grouped = np.add.reduceat(weights, starts)
+            means = np.add.reduceat(means * weights, starts) / grouped
+            weights = grouped
+            exact = False
+
+        self.means[position], self.weights[position] = means, weights
+        self.count[position] += count
+        self.exact[position] = exact
+
+    def _estimate(self, q: float, midpoint: bool) -> np.ndarray:
+        """
+        Calcola il quantile q di ogni colonna: sui valori esatti come np.quantile (o
+        np.median con `midpoint`), altrimenti interpolando tra i centri dei centroidi.
+        """
+        if self.columns is None:
+            raise ValueError("Lo sketch non contiene ancora dati.")
+        if self.count is None:
+            return np.full(len(self.columns), np.nan)
+        result = np.full(len(self.columns), np.nan)
+        for position in np.flatnonzero(self.count > 0):
+            means, weights = self.means[position], self.weights[position]
+            cumulative = np.cumsum(weights)
+            if self.exact[position]:
+                # Valori alle posizioni intere attorno a q · (n - 1) nella colonna ordinata
+                rank = q * (cumulative[-1] - 1)
+                lower = means[np.searchsorted(cumulative, np.floor(rank), side='right')]
+                upper = means[np.searchsorted(cumulative, np.ceil(rank), side='right')]
+                fraction = rank - np.floor(rank)
+                if midpoint and fraction > 0:
+                    result[position] = (lower + upper) / 2
+                else:
+                    result[position] = lower + (upper - lower) * fraction
+            else:
+                centers = cumulative - weights / 2
+                result[position] = np.interp(q * cumulative[-1], np.r_[0, centers, cumulative[-1]],
+                                             np.r_[self.minimum[position], means, self.maximum[position]])
+        return result
+
+
+class FrequentValuesSketch(_ColumnStatistics):
+    """
+    Stima in streaming della moda di ogni colonna con l'algoritmo di Misra-Gries.
+
+    Per ogni colonna vengono conservati al più `capacity` valori con un contatore. Quando un
+    blocco porta i valori oltre la capacità, a tutti i contatori viene sottratto il
+    (capacity + 1)-esimo conteggio più alto e i contatori non positivi vengono eliminati:
+    il conteggio stimato di ogni valore sottostima quello reale di al più `error`, che non
+    supera n / (capacity + 1) per n valori, e ogni valore più frequente di n / (capacity + 1)
+    resta tra quelli conservati. La moda stimata è quindi esatta se supera il secondo valore
+    più frequente di più di `error`; con al più `capacity` valori distinti (`error` pari a 0)
+    coincide con `DataFrame.mode().iloc[0]`, anche nella scelta del valore più piccolo a
+    parità di frequenza.
+
+    Due sketch calcolati su parti diverse del dataset si uniscono con `merge` mantenendo le
+    stesse garanzie (sketch di Misra-Gries unibili). I valori mancanti vengono ignorati.
+    """
+    def __init__(self, exclude_columns: list = None, capacity: int = 256):
+        """
+        Args:
+            exclude_columns (list, optional): Lista di colonne da escludere dalle statistiche.
+            capacity (int): Numero massimo di valori conservati per colonna (default 256).
+        """
+        if isinstance(capacity, bool) or not isinstance(capacity, int) or capacity < 1:
+            raise ValueError("capacity deve essere un intero positivo.")
+        super().__init__(exclude_columns)
+        self.capacity = capacity
+        self.count = None
+        self.error = None
+        self.values = None
+        self.counts = None
+
+    def update(self, data: pd.DataFrame) -> 'FrequentValuesSketch':
+        """
+        Aggiunge un blocco di righe allo sketch.
+
+        Args:
+            data (pd.DataFrame): Blocco del dataset, con le stesse colonne dei blocchi precedenti.
+
+        Returns:
+            FrequentValuesSketch: Lo sketch stesso.
+        """
+        values = self._block_values(data)
+        if values is None:
+            return self
+        self._initialize()
+        for position in range(len(self.columns)):
+            column = values[:, position]
+            column = column[~np.isnan(column)]
+            self.count[position] += len(column)
+            self._combine(position, column, np.ones(len(column), dtype=np.int64), 0)
+        return self
+
+    def merge(self, other: 'FrequentValuesSketch') -> 'FrequentValuesSketch':
+        """
+        Unisce un altro sketch, calcolato su altre righe dello stesso dataset.
+
+        Args:
+            other (FrequentValuesSketch): Sketch da unire.
+
+        Returns:
+            FrequentValuesSketch: Lo sketch stesso.
+        """
+        order = self._merge_order(other)
+        if order is None:
+            return self
+        self._initialize()
+        for position, other_position in enumerate(order):
+            self.count[position] += other.count[other_position]
+            self._combine(position, other.values[other_position], other.counts[other_position],
+                          other.error[other_position])
+        return self
+
+    def mode(self) -> np.ndarray:
+        """
+        Restituisce la moda stimata di ogni colonna (il valore più piccolo a parità di
+        conteggio); NaN per le colonne senza valori.
+        """
+        if self.columns is None:
+            raise ValueError("Lo sketch non contiene ancora dati.")
+        result = np.full(len(self.columns), np.nan)
+        if self.count is None:
+            return result
+        for position in np.flatnonzero(self.count > 0):
+            counts = self.counts[position]
+            # I valori sono ordinati: il primo con il conteggio massimo è il più piccolo
+            result[position] = self.values[position][np.argmax(counts)]
+        return result
+
+    def _initialize(self) -> None:
+        if self.count is None:
+            self.count = np.zeros(len(self.columns), dtype=np.int64)
+            self.error = np.zeros(len(self.columns), dtype=np.int64)
+            self.values = [np.empty(0) for _ in self.columns]
+            self.counts = [np.empty(0, dtype=np.int64) for _ in self.columns]
+
+    def _combine(self, position: int, values: np.ndarray, counts: np.ndarray, error: int) -> None:
+        """
+        Unisce ai contatori di una colonna altri valori con i loro conteggi e riduce i
+        contatori alla capacità.
+        """
+        self.error[position] += error
+        if len(values) == 0:
+            return
+        values = np.concatenate([self.values[position], values])
+        counts = np.concatenate([self.counts[position], counts])
+        order = np.argsort(values, kind='stable')
+        values, counts = values[order], counts[order]
+        starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+        values, counts = values[starts], np.add.reduceat(counts, starts)
+        if len(values) > self.capacity:
+            threshold = np.partition(counts, len(counts) - self.capacity - 1)[len(counts) - self.capacity - 1]
+            counts = counts - threshold
+            kept = counts > 0
+            values, counts = values[kept], counts[kept]
+            self.error[position] += threshold
+        self.values[position], self.counts[position] = values, counts
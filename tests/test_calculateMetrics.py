@@ -69,5 +69,55 @@ class TestMetricsCalculator(unittest.TestCase):
             expected_auc = (sensitivity + specificity) / 2
             self.assertAlmostEqual(auc, expected_auc)
 
+    def test_confusion_matrices(self):
+        # Un solo conteggio per tutti gli split dà le stesse matrici del calcolo per split;
+        # le coppie con valori diversi da 0 e 1 non vengono contate
+        data = self.sample_data + [([], []), ([1, 2, 0], [1, 1, 2])]
+        matrices = self.calculator.confusion_matrices(data)
+        self.assertEqual(matrices.shape, (len(data), 4))
+        for matrix, (y_true, y_pred) in zip(matrices, data):
+            self.assertEqual(tuple(matrix), self.calculator._confusion_matrix(y_true, y_pred))
+        self.assertEqual(matrices[-1].tolist(), [1, 0, 0, 0])
+        with self.assertRaises(ValueError):
+            self.calculator.confusion_matrices([([1, 0], [1])])
+
+    def test_split_metrics(self):
+        # Le metriche vettorizzate di ogni split coincidono con i metodi per il singolo split
+        split_metrics = self.calculator.calculate_split_metrics(self.sample_data)
+        self.assertEqual(list(split_metrics), list(MetricsCalculator.METRICS))
+        for position, (y_true, y_pred) in enumerate(self.sample_data):
+            tp, tn, fp, fn = self.calculator._confusion_matrix(y_true, y_pred)
+            expected = [self.calculator._accuracy_rate(tp, tn, fp, fn), self.calculator._error_rate(tp, tn, fp, fn),
+                        self.calculator._sensitivity(tp, fn), self.calculator._specificity(tn, fp),
+                        self.calculator._geometric_mean(tp, tn, fp, fn), self.calculator._area_under_curve(tp, tn, fp, fn)]
+            self.assertEqual([values[position] for values in split_metrics.values()], expected)
+
+        aggregated = self.calculator.calculate_metrics(self.sample_data)
+        for key, values in split_metrics.items():
+            self.assertAlmostEqual(aggregated[key], values.mean())
+        # Denominatori nulli (nessun positivo reale) danno 0.0 come nei metodi per il singolo split
+        self.assertEqual(self.calculator.calculate_metrics([([0, 0], [0, 1])])["Sensitivity"], 0.0)
+
+    def test_roc_curve(self):
+        y_true = [1, 0, 1, 1, 0, 0]
+        y_score = [0.9, 0.8, 0.8, 0.4, 0.3, 0.1]
+        fpr, tpr, thresholds = self.calculator.roc_curve(y_true, y_score)
+        # Una soglia per ogni punteggio distinto, più quella iniziale
+        self.assertEqual(thresholds.tolist(), [float('inf'), 0.9, 0.8, 0.4, 0.3, 0.1])
+        self.assertEqual(fpr.tolist(), [0, 0, 1 / 3, 1 / 3, 2 / 3, 1])
+        self.assertEqual(tpr.tolist(), [0, 1 / 3, 2 / 3, 1, 1, 1])
+
+    def test_roc_auc(self):
+        # Confronto con la statistica di Mann-Whitney: coppie (positivo, negativo) ordinate
+        # correttamente, con i pareggi contati a metà
+        y_true = [1, 0, 1, 1, 0, 0]
+        y_score = [0.9, 0.8, 0.8, 0.4, 0.3, 0.1]
+        positives = [s for y, s in zip(y_true, y_score) if y == 1]
+        negatives = [s for y, s in zip(y_true, y_score) if y == 0]
+        expected = sum((p > n) + 0.5 * (p == n) for p in positives for n in negatives) / 9
+        self.assertAlmostEqual(self.calculator.roc_auc(y_true, y_score), expected)
+        # Punteggi perfettamente separati
+        self.assertAlmostEqual(self.calculator.roc_auc([0, 0, 1, 1], [0.1, 0.2, 0.7, 0.9]), 1.0)
+
 if __name__ == '__main__':
     unittest.main() 
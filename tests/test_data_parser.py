@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+import numpy as np
+from preprocessing import ParserFactory, MissingValuesHandler
+from preprocessing.data_parser import SeenIds
+
+class TestDataParser(unittest.TestCase):
+
+    def setUp(self):
+        # Dataset di esempio con identificativi duplicati, anche mancanti, in blocchi diversi
+        self.data = pd.DataFrame({
+            "Sample code number": [1.0, 2.0, 3.0, 1.0, np.nan, 4.0, 2.0, np.nan, 5.0, 3.0],
+            "A": [10, 20, 30, 40, 50, 60, 70, 80, 90, 100],
+            "B": [0.5, 1.5, 2.5, 3.5, 4.5, 5.5, 6.5, 7.5, 8.5, 9.5],
+        })
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, extension: str, **kwargs) -> str:
+        file_path = os.path.join(self.directory.name, f"data{extension}")
+        if extension in (".csv", ".txt"):
+            self.data.to_csv(file_path, index=False)
+        elif extension == ".tsv":
+            self.data.to_csv(file_path, index=False, sep="\t")
+        elif extension == ".xlsx":
+            self.data.to_excel(file_path, index=False)
+        else:
+            self.data.to_json(file_path, **kwargs)
+        return file_path
+
+    def test_iter_chunks_matches_parse(self):
+        # La concatenazione dei blocchi coincide con parse per ogni formato, anche con blocchi di una riga
+        cases = [(".csv", {}), (".txt", {}), (".tsv", {}), (".xlsx", {}),
+                 (".json", {}), (".json", {"orient": "records", "lines": True})]
+        for extension, kwargs in cases:
+            file_path = self.write(extension, **kwargs)
+            parser = ParserFactory.get_parser(file_path)
+            expected = parser.parse(file_path)
+            for chunksize in [1, 3, 100]:
+                with self.subTest(extension=extension, lines=bool(kwargs), chunksize=chunksize):
+                    chunks = list(parser.iter_chunks(file_path, chunksize))
+                    self.assertTrue(all(len(chunk) <= chunksize for chunk in chunks))
+                    result = pd.concat(chunks)
+                    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_index_type=False)
+
+    def test_iter_chunks_invalid_chunksize(self):
+        file_path = self.write(".csv")
+        parser = ParserFactory.get_parser(file_path)
+        for chunksize in [0, -1, 2.5, True]:
+            with self.assertRaises(ValueError):
+                next(parser.iter_chunks(file_path, chunksize))
+
+    def test_typed_parsing(self):
+        # Lo schema dichiarato dà lo stesso risultato della deduzione dei tipi seguita dalla conversione
+        self.data["A"] = self.data["A"].astype(object)
+        self.data.loc[2, "A"] = "?"
+        self.data.loc[5, "A"] = "1,0"
+        for extension in [".csv", ".txt", ".tsv"]:
+            file_path = self.write(extension)
+            expected = MissingValuesHandler.convert_numeric_columns(ParserFactory.get_parser(file_path).parse(file_path))
+            for dtype in ["float64", "float32"]:
+                with self.subTest(extension=extension, dtype=dtype):
+                    parser = ParserFactory.get_parser(file_path, dtype=dtype, na_values=["?"])
+                    result = parser.parse(file_path)
+                    self.assertEqual(result.dtypes.unique().tolist(), [np.dtype(dtype)])
+                    self.assertEqual(result.index.dtype, np.float64)
+                    pd.testing.assert_frame_equal(result.astype("float64"), expected)
+                    pd.testing.assert_frame_equal(pd.concat(parser.iter_chunks(file_path, 3)), result)
+
+        # Senza na_values i valori non numerici vengono convertiti senza rileggere il file
+        for dtype in ["float32", {"A": "float64", "B": "float32"}]:
+            with self.subTest(dtype=dtype):
+                parser = ParserFactory.get_parser(file_path, dtype=dtype)
+                with mock.patch("pandas.read_csv", wraps=pd.read_csv) as read_csv:
+                    result = parser.parse(file_path)
+                self.assertEqual(read_csv.call_count, 1)
+                pd.testing.assert_frame_equal(result.astype("float64"), expected)
+
+        parser = ParserFactory.get_parser(file_path, dtype={"B": "float32"}, usecols=["B"])
+        result = parser.parse(file_path)
+        self.assertEqual(result.columns.tolist(), ["B"])
+        self.assertEqual(result["B"].dtype, np.float32)
+
+        with self.assertRaises(ValueError):
+            ParserFactory.get_parser(file_path, dtype="int64")
+        with self.assertRaises(ValueError):
+            ParserFactory.get_parser(file_path, engine="python")
+        with self.assertRaises(ValueError):
+            ParserFactory.get_parser("data.json", dtype="float32")
+
+    def test_parse_files(self):
+        # Più file di formati diversi danno lo stesso dataset di un unico file, anche in parallelo
+        expected = ParserFactory.get_parser(self.write(".csv")).parse(os.path.join(self.directory.name, "data.csv"))
+        shards = [self.data.iloc[:4], self.data.iloc[4:7], self.data.iloc[7:]]
+        files = []
+        for position, (shard, extension) in enumerate(zip(shards, [".csv", ".xlsx", ".json"])):
+            file_path = os.path.join(self.directory.name, f"shard_{position}{extension}")
+            if extension == ".csv":
+                shard.to_csv(file_path, index=False)
+            elif extension == ".xlsx":
+                shard.to_excel(file_path, index=False)
+            else:
+                shard.reset_index(drop=True).to_json(file_path)
+            files.append(file_path)
+
+        for n_jobs in [1, 2]:
+            with self.subTest(n_jobs=n_jobs):
+                result = ParserFactory.parse_files(files, n_jobs=n_jobs)
+                pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_index_type=False)
+
+        result = ParserFactory.parse_files(os.path.join(self.directory.name, "shard_*"), dtype="float32")
+        self.assertEqual(len(result), len(expected))
+
+        with self.assertRaises(ValueError):
+            ParserFactory.parse_files(os.path.join(self.directory.name, "*.tsv"))
+        with self.assertRaises(ValueError):
+            ParserFactory.parse_files(files, n_jobs=0)
+
+    def test_seen_ids(self):
+        # Identificativi interi, float e stringhe; i mancanti sono uguali tra loro come in drop_duplicates
+        seen = SeenIds()
+        first = seen.first_occurrences(pd.Series([3, 1, 3, 2]))
+        self.assertEqual(first.tolist(), [True, True, False, True])
+        second = seen.first_occurrences(pd.Series([2.0, np.nan, 7.0, 0.5, np.nan, 0.5]))
+        self.assertEqual(second.tolist(), [False, True, True, True, False, False])
+        third = seen.first_occurrences(pd.Series(["a", np.nan, "a", "b"], dtype=object))
+        self.assertEqual(third.tolist(), [True, False, False, True])
+        self.assertEqual(len(seen), 8)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 import pandas as pd
 import numpy as np
-from preprocessing import FeatureScaler, FeatureScalerStrategyManager  # Sostituisci con il nome del modulo corretto
+from preprocessing import FeatureScaler, FeatureScalerStrategyManager, MinMaxScaler, StandardScaler, ScalingStatistics  # Sostituisci con il nome del modulo corretto
 
 class TestFeatureScaler(unittest.TestCase):
 
@@ -68,5 +68,81 @@ class TestFeatureScaler(unittest.TestCase):
             self.assertAlmostEqual(scaled_data[col].mean(), 0, places=6)
             self.assertAlmostEqual(scaled_data[col].std(), 1, places=6)
 
+    def test_inplace(self):
+        # Con inplace il dataset viene scalato direttamente e il risultato coincide con la copia
+        for strategy in ["normalize", "standardize"]:
+            expected = getattr(FeatureScaler, strategy)(self.data, self.exclude_columns)
+            data = self.data.copy()
+            result = getattr(FeatureScaler, strategy)(data, self.exclude_columns, inplace=True)
+            self.assertIs(result, data)
+            pd.testing.assert_frame_equal(data, expected)
+        self.assertEqual(self.data["A"].tolist(), [10, 20, 30, 40])
+
+    def test_fitted_scalers_match_static(self):
+        # Lo scaler addestrato e applicato sullo stesso dataset coincide con i metodi statici
+        for strategy, scale in [("normalize", FeatureScaler.normalize), ("standardize", FeatureScaler.standardize)]:
+            scaler = FeatureScalerStrategyManager.get_scaler(strategy, self.exclude_columns)
+            pd.testing.assert_frame_equal(scaler.fit_transform(self.data), scale(self.data, self.exclude_columns))
+
+    def test_fitted_scaler_transform(self):
+        # I parametri stimati in fit vengono applicati a nuovi dati e a un singolo punto
+        scaler = MinMaxScaler(self.exclude_columns).fit(self.data)
+        np.testing.assert_array_equal(scaler.offset_, [10, 1.0])
+        np.testing.assert_array_equal(scaler.scale_, [30, 3.0])
+
+        new_data = pd.DataFrame({"C": [500], "B": [5.5], "A": [25]})
+        scaled = scaler.transform(new_data)
+        self.assertEqual(scaled.columns.tolist(), ["C", "B", "A"])
+        self.assertEqual(scaled.iloc[0].tolist(), [500, 1.5, 0.5])
+
+        point = scaler.transform(new_data.iloc[0])
+        self.assertEqual(point.tolist(), [500, 1.5, 0.5])
+
+        standard = StandardScaler(self.exclude_columns).fit(self.data)
+        self.assertAlmostEqual(standard.scale_[0], self.data["A"].std())
+
+        with self.assertRaises(ValueError):
+            scaler.transform(self.data[["A"]])
+        with self.assertRaises(ValueError):
+            StandardScaler().transform(self.data)
+        with self.assertRaises(ValueError):
+            FeatureScalerStrategyManager.get_scaler("invalid_strategy")
+
+    def test_partial_fit(self):
+        # Le statistiche accumulate a blocchi danno gli stessi parametri di fit sull'intero dataset
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame(rng.normal(5, 3, size=(1000, 4)), columns=list("ABCD"))
+        data.iloc[rng.choice(1000, 50), 1] = np.nan
+        data["id"] = np.arange(1000)
+
+        for scaler_class in [MinMaxScaler, StandardScaler]:
+            expected = scaler_class(["id"]).fit(data)
+
+            single = scaler_class(["id"]).partial_fit(data)
+            np.testing.assert_array_equal(single.offset_, expected.offset_)
+            np.testing.assert_array_equal(single.scale_, expected.scale_)
+
+            chunked = scaler_class(["id"])
+            for chunk in np.array_split(np.arange(1000), 7):
+                chunked.partial_fit(data.iloc[chunk])
+            self.assertEqual(chunked.columns_.tolist(), list("ABCD"))
+            np.testing.assert_allclose(chunked.offset_, expected.offset_, rtol=1e-12)
+            np.testing.assert_allclose(chunked.scale_, expected.scale_, rtol=1e-12)
+            pd.testing.assert_frame_equal(chunked.transform(data), expected.transform(data), rtol=1e-12)
+
+        # Gli accumulatori di più processi si uniscono con merge, anche con colonne in ordine diverso
+        first = ScalingStatistics(["id"]).update(data.iloc[:300])
+        second = ScalingStatistics(["id"]).update(data.iloc[300:, ::-1])
+        scaler = StandardScaler(["id"]).fit_from_statistics(first.merge(second))
+        np.testing.assert_array_equal(first.minimum, data[list("ABCD")].min().to_numpy())
+        np.testing.assert_allclose(scaler.offset_, data[list("ABCD")].mean().to_numpy(), rtol=1e-12)
+        np.testing.assert_allclose(scaler.scale_, data[list("ABCD")].std().to_numpy(), rtol=1e-12)
+        self.assertEqual(first.count.tolist(), data[list("ABCD")].count().tolist())
+
+        with self.assertRaises(ValueError):
+            first.update(data[["A"]])
+        with self.assertRaises(ValueError):
+            StandardScaler().fit_from_statistics(ScalingStatistics())
+
 if __name__ == "__main__":
     unittest.main()
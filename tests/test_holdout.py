@@ -99,5 +99,31 @@ class TestHoldout(unittest.TestCase):
         # Verifica che le due liste siano disgiunte
         self.assertTrue(set(test_indices).isdisjoint(set(train_indices)))
 
+    def test_generate_splits_scaling(self):
+        """
+        Testa che con scaling i parametri vengano stimati sul solo training set dello split
+        e applicati al test set.
+        """
+        rng = np.random.default_rng(3)
+        data = pd.DataFrame({"feature1": rng.normal(size=40), "feature2": rng.normal(scale=100, size=40)})
+        labels = pd.Series(rng.choice([2, 4], size=40))
+
+        holdout = Holdout(test_size=0.25, random_state=0, scaling='standardize')
+        y_real, y_pred = holdout.generate_splits(data, labels, k=3)[0]
+
+        shuffled = np.random.default_rng(0).permutation(len(data))
+        test_indices, train_indices = shuffled[:10], shuffled[10:]
+        train_data = data.iloc[train_indices]
+        test_data = (data.iloc[test_indices] - train_data.mean()) / train_data.std()
+        knn = KNNClassifier(k=3)
+        knn.fit((train_data - train_data.mean()) / train_data.std(), labels.iloc[train_indices])
+        self.assertEqual(y_real, labels.iloc[test_indices].tolist())
+        self.assertEqual(y_pred, knn.predict_batch(test_data).tolist())
+
+        with self.assertRaises(ValueError):
+            Holdout(scaling='invalid')
+        with self.assertRaises(ValueError):
+            Holdout(scaling='normalize', precompute_distances=True)
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,4 +1,7 @@
 import unittest
+import random
+import tempfile
+import numpy as np
 import pandas as pd
 from models.knn import KNNClassifier
 
@@ -28,7 +31,8 @@ class TestKNNClassifier(unittest.TestCase):
         Verifica che il metodo fit memorizzi correttamente i dati di training.
         """
         self.knn.fit(self.training_data, self.training_labels)
-        pd.testing.assert_frame_equal(self.knn.data, self.training_data)
+        # Le feature vengono memorizzate nel tipo del modello (np.float64)
+        pd.testing.assert_frame_equal(self.knn.data, self.training_data.astype(float))
         pd.testing.assert_series_equal(self.knn.labels, self.training_labels)
 
     def test_predict(self):
@@ -39,6 +43,365 @@ class TestKNNClassifier(unittest.TestCase):
         prediction = self.knn.predict(self.test_data.iloc[0])
         self.assertEqual(prediction, self.expected_predictions[0])
 
+    def test_predict_batch(self):
+        """
+        Verifica che predict_batch fornisca i risultati attesi.
+        """
+        self.knn.fit(self.training_data, self.training_labels)
+        predictions = self.knn.predict_batch(self.test_data)
+        self.assertEqual(predictions.iloc[0], self.expected_predictions[0])
+        self.assertEqual(predictions.iloc[1], self.knn.predict(self.test_data.iloc[1]))
+        pd.testing.assert_index_equal(predictions.index, self.test_data.index)
+
+    def test_predict_batch_matches_predict(self):
+        """
+        Verifica che predict_batch coincida con predict applicato riga per riga,
+        anche in presenza di punti duplicati e di pareggi tra le classi.
+        """
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame(rng.integers(1, 4, size=(60, 3)), columns=['A', 'B', 'C'])
+        labels = pd.Series(rng.choice([2, 4], size=60))
+        points = pd.DataFrame(rng.integers(1, 4, size=(25, 3)), columns=['A', 'B', 'C'])
+
+        for k in [1, 2, 4, 7]:
+            knn = KNNClassifier(k=k)
+            knn.fit(data, labels)
+            random.seed(k)
+            batch = knn.predict_batch(points)
+            random.seed(k)
+            expected = points.apply(knn.predict, axis=1)
+            self.assertEqual(batch.tolist(), expected.tolist())
+
+    def test_predict_batch_memory_budget(self):
+        """
+        Verifica che la suddivisione in tessere (chunk_size, max_bytes) non cambi le predizioni.
+        """
+        rng = np.random.default_rng(1)
+        data = pd.DataFrame(rng.normal(size=(200, 4)))
+        labels = pd.Series(rng.choice([0, 1, 2], size=200))
+        points = pd.DataFrame(rng.normal(size=(50, 4)))
+
+        knn = KNNClassifier(k=5)
+        knn.fit(data, labels)
+        random.seed(0)
+        expected = knn.predict_batch(points)
+        random.seed(0)
+        tiled = knn.predict_batch(points, chunk_size=7, max_bytes=KNNClassifier.BYTES_PER_CELL * 70)
+        pd.testing.assert_series_equal(tiled, expected)
+
+    def test_predict_batch_invalid_budget(self):
+        """
+        Verifica che valori non validi di chunk_size e max_bytes sollevino un'eccezione.
+        """
+        self.knn.fit(self.training_data, self.training_labels)
+        with self.assertRaises(ValueError):
+            self.knn.predict_batch(self.test_data, chunk_size=0)
+        with self.assertRaises(ValueError):
+            self.knn.predict_batch(self.test_data, max_bytes=-1)
+
+    def test_algorithms_match_brute(self):
+        """
+        Verifica che KD-tree e ball-tree restituiscano le stesse predizioni della ricerca esaustiva.
+        """
+        rng = np.random.default_rng(2)
+        data = pd.DataFrame(rng.integers(1, 6, size=(150, 4)), columns=['A', 'B', 'C', 'D'])
+        labels = pd.Series(rng.choice([2, 4], size=150))
+        points = pd.DataFrame(rng.integers(1, 6, size=(40, 4)), columns=['A', 'B', 'C', 'D'])
+
+        brute = KNNClassifier(k=4)
+        brute.fit(data, labels)
+        random.seed(0)
+        expected = brute.predict_batch(points)
+
+        for algorithm in ['kd_tree', 'ball_tree', 'auto']:
+            knn = KNNClassifier(k=4, algorithm=algorithm, leaf_size=5)
+            knn.fit(data, labels)
+            random.seed(0)
+            pd.testing.assert_series_equal(knn.predict_batch(points), expected)
+            random.seed(0)
+            self.assertEqual(knn.predict(points.iloc[0]), expected.iloc[0])
+
+    def test_kneighbors(self):
+        """
+        Verifica che kneighbors restituisca i vicini ordinati per distanza.
+        """
+        self.knn.fit(self.training_data, self.training_labels)
+        distances, positions = self.knn.kneighbors(self.test_data)
+        self.assertEqual(positions.shape, (2, 3))
+        self.assertEqual(positions[1].tolist(), [3, 1, 2])
+        self.assertTrue((np.diff(distances, axis=1) >= 0).all())
+
+    def test_predict_from_distances(self):
+        """
+        Verifica che la predizione da distanze precalcolate coincida con predict_batch.
+        """
+        self.knn.fit(self.training_data, self.training_labels)
+        distances = np.sqrt(((self.test_data.to_numpy()[:, None, :]
+                              - self.training_data.to_numpy()[None, :, :]) ** 2).sum(axis=2))
+        random.seed(0)
+        expected = self.knn.predict_batch(self.test_data)
+        random.seed(0)
+        predictions = self.knn.predict_from_distances(distances, self.test_data.index)
+        self.assertEqual(predictions.tolist(), expected.tolist())
+
+        with self.assertRaises(ValueError):
+            self.knn.predict_from_distances(distances[:, :2])
+
+    def test_predict_batch_multi_k(self):
+        """
+        Verifica che la predizione per più valori di k coincida con predict_batch per ogni k.
+        """
+        self.knn.fit(self.training_data, self.training_labels)
+        random.seed(0)
+        predictions = self.knn.predict_batch_multi_k(self.test_data, [1, 2, 3])
+        random.seed(0)
+        for k in [1, 2, 3]:
+            expected = KNNClassifier(k=k)
+            expected.fit(self.training_data, self.training_labels)
+            self.assertEqual(predictions[k].tolist(), expected.predict_batch(self.test_data).tolist())
+
+        with self.assertRaises(ValueError):
+            self.knn.predict_batch_multi_k(self.test_data, [])
+
+    def test_metrics(self):
+        """
+        Verifica che ogni metrica trovi gli stessi vicini del calcolo diretto delle distanze
+        e che gli alberi, dove supportati, coincidano con la ricerca esaustiva.
+        """
+        rng = np.random.default_rng(5)
+        data = pd.DataFrame(rng.integers(1, 6, size=(120, 3)).astype(float))
+        labels = pd.Series(rng.choice([2, 4], size=120))
+        points = pd.DataFrame(rng.integers(1, 6, size=(15, 3)).astype(float))
+        offsets = points.to_numpy()[:, None, :] - data.to_numpy()[None, :, :]
+        expected_distances = {
+            'euclidean': np.sqrt((offsets ** 2).sum(axis=2)),
+            'sqeuclidean': (offsets ** 2).sum(axis=2),
+            'manhattan': np.abs(offsets).sum(axis=2),
+            'chebyshev': np.abs(offsets).max(axis=2),
+            'minkowski': (np.abs(offsets) ** 3).sum(axis=2) ** (1 / 3),
+        }
+
+        for metric, distances in expected_distances.items():
+            expected = np.argsort(distances, axis=1, kind='stable')[:, :5]
+            algorithms = ['brute'] if metric == 'sqeuclidean' else ['brute', 'kd_tree', 'ball_tree']
+            for algorithm in algorithms:
+                knn = KNNClassifier(k=5, algorithm=algorithm, metric=metric, p=3, leaf_size=4)
+                knn.fit(data, labels)
+                self.assertEqual(knn.kneighbors(points)[1].tolist(), expected.tolist(), (metric, algorithm))
+
+        cosine = KNNClassifier(k=5, metric='cosine')
+        cosine.fit(data, labels)
+        similarities = (points.to_numpy() @ data.to_numpy().T
+                        / np.linalg.norm(points.to_numpy(), axis=1)[:, None] / np.linalg.norm(data.to_numpy(), axis=1))
+        np.testing.assert_allclose(cosine.kneighbors(points)[0], np.sort(1 - similarities, axis=1)[:, :5], atol=1e-12)
+
+    def test_invalid_metric(self):
+        """
+        Verifica che metriche non valide o non supportate dagli alberi sollevino un'eccezione.
+        """
+        with self.assertRaises(ValueError):
+            KNNClassifier(k=3, metric='hamming')
+        with self.assertRaises(ValueError):
+            KNNClassifier(k=3, metric='cosine', algorithm='kd_tree')
+        with self.assertRaises(ValueError):
+            KNNClassifier(k=3, metric='minkowski', p=0.5)
+
+    def test_predict_proba_batch(self):
+        """
+        Verifica che le probabilità siano le frazioni dei voti dei vicini e che le etichette
+        restituite insieme coincidano con predict_batch.
+        """
+        self.knn.fit(self.training_data, self.training_labels)
+        probabilities = self.knn.predict_proba_batch(self.test_data)
+        self.assertEqual(probabilities.columns.tolist(), [0, 1])
+        # Vicini del primo punto: etichette 1, 1, 0; del secondo: 0, 1, 1 (vedi test_kneighbors)
+        np.testing.assert_allclose(probabilities.to_numpy(), [[1 / 3, 2 / 3], [1 / 3, 2 / 3]])
+
+        random.seed(0)
+        probabilities, predictions = self.knn.predict_proba_batch(self.test_data, return_predictions=True)
+        random.seed(0)
+        self.assertEqual(predictions.tolist(), self.knn.predict_batch(self.test_data).tolist())
+
+    def test_distance_weights(self):
+        """
+        Verifica il voto pesato con l'inverso della distanza, anche con vicini a distanza nulla.
+        """
+        knn = KNNClassifier(k=3, weights='distance')
+        knn.fit(self.training_data, self.training_labels)
+        distances, positions = knn.kneighbors(self.test_data)
+        weights = 1 / distances
+        codes = self.training_labels.to_numpy()[positions]
+        expected = np.stack([(weights * (codes == label)).sum(axis=1) for label in [0, 1]], axis=1)
+        expected /= expected.sum(axis=1, keepdims=True)
+        np.testing.assert_allclose(knn.predict_proba_batch(self.test_data).to_numpy(), expected)
+        self.assertEqual(knn.predict_batch(self.test_data).tolist(), expected.argmax(axis=1).tolist())
+
+        # Un punto coincidente con un campione di training riceve la sua etichetta
+        probabilities = knn.predict_proba_batch(self.training_data.iloc[[3]])
+        self.assertEqual(probabilities.to_numpy().tolist(), [[1.0, 0.0]])
+
+        with self.assertRaises(ValueError):
+            KNNClassifier(k=3, weights='rank')
+
+    def test_ivf_recall(self):
+        """
+        Verifica che l'indice approssimato 'ivf' diventi esatto esaminando tutte le celle
+        e che recall_at_k misuri un richiamo compreso tra 0 e 1.
+        """
+        rng = np.random.default_rng(3)
+        data = pd.DataFrame(rng.normal(size=(300, 3)))
+        labels = pd.Series(rng.choice([2, 4], size=300))
+        points = pd.DataFrame(rng.normal(size=(30, 3)))
+
+        approximate = KNNClassifier(k=5, algorithm='ivf', n_lists=10, n_probe=1, random_state=0)
+        approximate.fit(data, labels)
+        recall = approximate.recall_at_k(points)
+        self.assertGreaterEqual(recall, 0.0)
+        self.assertLessEqual(recall, 1.0)
+
+        exhaustive = KNNClassifier(k=5, algorithm='ivf', n_lists=10, n_probe=10, random_state=0)
+        exhaustive.fit(data, labels)
+        self.assertEqual(exhaustive.recall_at_k(points), 1.0)
+
+    def test_predict_batch_parallel(self):
+        """
+        Verifica che la ricerca su più thread restituisca le predizioni nell'ordine dei punti
+        e identiche a quelle sequenziali con lo stesso seme.
+        """
+        rng = np.random.default_rng(4)
+        data = pd.DataFrame(rng.integers(1, 4, size=(120, 3)))
+        labels = pd.Series(rng.choice([2, 4], size=120))
+        points = pd.DataFrame(rng.integers(1, 4, size=(45, 3)), index=rng.permutation(45))
+
+        sequential = KNNClassifier(k=4)
+        sequential.fit(data, labels)
+        random.seed(0)
+        expected = sequential.predict_batch(points)
+
+        parallel = KNNClassifier(k=4, n_jobs=3)
+        parallel.fit(data, labels)
+        random.seed(0)
+        pd.testing.assert_series_equal(parallel.predict_batch(points, chunk_size=8), expected)
+
+    def test_invalid_algorithm(self):
+        """
+        Verifica che un algoritmo di ricerca non valido sollevi un'eccezione.
+        """
+        with self.assertRaises(ValueError):
+            KNNClassifier(k=3, algorithm='invalid')
+        with self.assertRaises(ValueError):
+            KNNClassifier(k=3, n_jobs=0)
+        with self.assertRaises(ValueError):
+            KNNClassifier(k=3, dtype=np.int64)
+
+    def test_predict_columns_order(self):
+        """
+        Verifica che le feature dei punti vengano allineate per nome a quelle di training.
+        """
+        self.knn.fit(self.training_data, self.training_labels)
+        point = self.test_data.iloc[0][['Feature2', 'Feature1']]
+        self.assertEqual(self.knn.predict(point), self.expected_predictions[0])
+
+    def test_float32(self):
+        """
+        Verifica che i dati in precisione singola producano gli stessi vicini.
+        """
+        knn = KNNClassifier(k=3, dtype=np.float32)
+        knn.fit(self.training_data, self.training_labels)
+        self.knn.fit(self.training_data, self.training_labels)
+        self.assertEqual(knn.kneighbors(self.test_data)[1].tolist(),
+                         self.knn.kneighbors(self.test_data)[1].tolist())
+
+        # Anche gli indici non esaustivi lavorano sulla matrice in precisione singola, senza copie
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame(rng.normal(size=(300, 4)), columns=['A', 'B', 'C', 'D'])
+        labels = pd.Series(rng.choice([2, 4], size=300))
+        points = pd.DataFrame(rng.normal(size=(20, 4)), columns=['A', 'B', 'C', 'D'])
+        brute = KNNClassifier(k=5, dtype=np.float32)
+        brute.fit(data, labels)
+        for algorithm in ['kd_tree', 'ball_tree', 'ivf']:
+            with self.subTest(algorithm=algorithm):
+                knn = KNNClassifier(k=5, algorithm=algorithm, dtype=np.float32, n_probe=100)
+                knn.fit(data, labels)
+                self.assertEqual(knn._search.data.dtype, np.float32)
+                self.assertTrue(np.shares_memory(knn._search.data, knn._buffer))
+                self.assertEqual(knn.kneighbors(points)[1].tolist(), brute.kneighbors(points)[1].tolist())
+
+    def test_partial_fit_and_forget(self):
+        """
+        Verifica che aggiunte e rimozioni incrementali diano gli stessi vicini e le stesse
+        predizioni di un modello addestrato da zero sui campioni rimasti.
+        """
+        rng = np.random.default_rng(5)
+        data = pd.DataFrame(rng.integers(1, 6, size=(200, 3)), columns=['A', 'B', 'C'])
+        labels = pd.Series(rng.choice([2, 4, 6], size=200))
+        points = pd.DataFrame(rng.integers(1, 6, size=(30, 3)), columns=['A', 'B', 'C'])
+
+        for algorithm in ['brute', 'kd_tree', 'ball_tree']:
+            knn = KNNClassifier(k=4, algorithm=algorithm, leaf_size=5)
+            knn.fit(data.iloc[:60], labels.iloc[:60])
+            for start in range(60, 200, 20):
+                # Colonne in ordine diverso: vengono riallineate per nome
+                knn.partial_fit(data.iloc[start:start + 20][['C', 'A', 'B']], labels.iloc[start:start + 20])
+                self.assertEqual(knn.forget([start - 3, start + 5, 1000]), 2)
+            self.assertEqual(knn.forget(list(range(0, 40))), 40)
+
+            remaining = data.index.difference([start - 3 for start in range(60, 200, 20)] +
+                                              [start + 5 for start in range(60, 200, 20)] + list(range(0, 40)))
+            pd.testing.assert_frame_equal(knn.data, data.loc[remaining].astype(float))
+            pd.testing.assert_series_equal(knn.labels, labels.loc[remaining])
+
+            fresh = KNNClassifier(k=4)
+            fresh.fit(data.loc[remaining], labels.loc[remaining])
+            np.testing.assert_array_equal(knn.kneighbors(points)[1], fresh.kneighbors(points)[1])
+            random.seed(0)
+            expected = fresh.predict_batch(points)
+            random.seed(0)
+            pd.testing.assert_series_equal(knn.predict_batch(points), expected)
+
+    def test_partial_fit_new_class(self):
+        """
+        Verifica che partial_fit accetti classi non viste in fit e che forget non possa
+        svuotare il training set.
+        """
+        self.knn.fit(self.training_data, self.training_labels)
+        self.knn.partial_fit(pd.DataFrame({'Feature1': [50], 'Feature2': [50]}, index=[10]), pd.Series([7], index=[10]))
+        self.assertEqual(list(self.knn.predict_proba_batch(self.test_data).columns), [0, 1, 7])
+        self.assertEqual(self.knn.predict_batch(self.test_data).tolist(), [1, 1])
+        with self.assertRaises(ValueError):
+            self.knn.forget([0, 1, 2, 3, 10])
+        with self.assertRaises(ValueError):
+            self.knn.partial_fit(pd.DataFrame({'Feature1': [1]}), pd.Series([0]))
+
+    def test_save_load(self):
+        """
+        Verifica che un modello salvato e ricaricato, con e senza mappatura in memoria,
+        restituisca le stesse predizioni e gli array di preprocessing salvati.
+        """
+        rng = np.random.default_rng(6)
+        data = pd.DataFrame(rng.integers(1, 6, size=(150, 3)), columns=['A', 'B', 'C'])
+        labels = pd.Series(rng.choice(['benigno', 'maligno'], size=150))
+        points = pd.DataFrame(rng.integers(1, 6, size=(20, 3)), columns=['A', 'B', 'C'])
+
+        for algorithm in ['brute', 'kd_tree', 'ball_tree']:
+            knn = KNNClassifier(k=4, algorithm=algorithm, leaf_size=5)
+            knn.fit(data, labels)
+            random.seed(0)
+            expected = knn.predict_batch(points)
+            with tempfile.TemporaryDirectory() as path:
+                knn.save(path, {'mean': np.array([1.0, 2.0, 3.0])})
+                for mmap in [True, False]:
+                    loaded = KNNClassifier.load(path, mmap=mmap)
+                    self.assertEqual(loaded.algorithm, algorithm)
+                    np.testing.assert_array_equal(loaded.preprocessing['mean'], [1.0, 2.0, 3.0])
+                    pd.testing.assert_series_equal(loaded.labels, labels)
+                    random.seed(0)
+                    pd.testing.assert_series_equal(loaded.predict_batch(points), expected)
+
+                    # Un modello mappato in sola lettura accetta comunque nuovi campioni
+                    loaded.partial_fit(points, expected)
+                    self.assertEqual(len(loaded.data), 170)
+
     def test_invalid_fit_input(self):
         """
         Verifica che venga sollevata un'eccezione se i dati forniti a fit non sono validi.
@@ -72,5 +72,30 @@ class TestLeavePOutCV(unittest.TestCase):
         # Il risultato deve essere una lista vuota
         self.assertEqual(len(results), 0)
 
+    def test_generate_splits_parallel_reproducible(self):
+        """
+        Testa che, a parità di random_state, la valutazione su più processi restituisca gli
+        stessi risultati, nello stesso ordine, di quella sequenziale.
+        """
+        sequential = LeavePOutCV(p=2, n_combinations=12, random_state=7)
+        parallel = LeavePOutCV(p=2, n_combinations=12, n_jobs=2, random_state=7)
+
+        self.assertEqual(parallel.generate_splits(self.data, self.labels),
+                         sequential.generate_splits(self.data, self.labels))
+
+    def test_generate_splits_precomputed_distances(self):
+        """
+        Testa che, a parità di random_state, le distanze precalcolate producano gli stessi
+        risultati del calcolo da zero in ogni split.
+        """
+        direct = LeavePOutCV(p=1, n_combinations=8, random_state=3)
+        cached = LeavePOutCV(p=1, n_combinations=8, random_state=3, precompute_distances=True)
+
+        self.assertEqual(cached.generate_splits(self.data, self.labels),
+                         direct.generate_splits(self.data, self.labels))
+
+        with self.assertRaises(ValueError):
+            LeavePOutCV(precompute_distances="si")
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 import pandas as pd
 import numpy as np
-from preprocessing import MissingValuesHandler, MissingValuesStrategyManager
+from preprocessing import MissingValuesHandler, MissingValuesStrategyManager, MissingValuesImputer
 
 class TestMissingValuesHandler(unittest.TestCase):
 
@@ -20,6 +20,14 @@ class TestMissingValuesHandler(unittest.TestCase):
         expected = pd.Series([10.0, 20.0, 30.0, 40.0], dtype='float64', name="C")
         pd.testing.assert_series_equal(converted_data["C"], expected)
 
+    def test_convert_numeric_columns_typed(self):
+        # Le colonne già float restano invariate, anche float32; le intere diventano float64
+        data = pd.DataFrame({"A": np.array([1.5, np.nan], dtype="float32"), "B": [1, 2], "C": ["3", "x"]})
+        converted_data = MissingValuesHandler.convert_numeric_columns(data)
+        self.assertEqual(converted_data.dtypes.tolist(), [np.float32, np.float64, np.float64])
+        self.assertEqual(converted_data["B"].tolist(), [1.0, 2.0])
+        self.assertTrue(np.isnan(converted_data["C"].iloc[1]))
+
     def test_remove_rows_with_missing_classtype(self):
         filtered_data = MissingValuesHandler.remove_rows_with_missing_classtype(self.data)
         self.assertEqual(len(filtered_data), 3)
@@ -72,6 +80,163 @@ class TestMissingValuesHandler(unittest.TestCase):
         self.assertFalse(result.isnull().any().any())
         self.assertEqual(result["A"].iloc[1], 1)
 
+    def test_impute_matches_steps(self):
+        # impute dà esattamente il risultato dei singoli passaggi, anche su più blocchi di colonne
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame(rng.integers(0, 4, size=(60, 6)).astype(float), columns=list("ABCDEF"))
+        data = data.mask(rng.random(data.shape) < 0.2)
+        data["E"] = data["E"].astype("float32")
+        data["F"] = data["F"].astype(object).where(data["F"].notna(), "?")
+        data["classtype_v1"] = rng.choice([2.0, 4.0, np.nan], size=60)
+        methods = {"remove": MissingValuesHandler.remove_missing_rows,
+                   "mean": MissingValuesHandler.fill_missing_with_mean,
+                   "median": MissingValuesHandler.fill_missing_with_median,
+                   "mode": MissingValuesHandler.fill_missing_with_mode}
+        block_bytes = MissingValuesHandler.BLOCK_BYTES
+        try:
+            for bytes_ in [block_bytes, 1]:
+                MissingValuesHandler.BLOCK_BYTES = bytes_
+                for strategy, method in methods.items():
+                    with self.subTest(strategy=strategy, block_bytes=bytes_):
+                        numeric_data = MissingValuesHandler.convert_numeric_columns(data.copy())
+                        expected = method(MissingValuesHandler.remove_rows_with_missing_classtype(numeric_data))
+                        result = MissingValuesHandler.impute(data.copy(), strategy)
+                        pd.testing.assert_frame_equal(result, expected)
+        finally:
+            MissingValuesHandler.BLOCK_BYTES = block_bytes
+
+    def test_impute_inplace(self):
+        # Senza righe da rimuovere il riempimento avviene in data; altrimenti data non cambia
+        data = pd.DataFrame({"A": [1.0, np.nan, 3.0], "classtype_v1": [2.0, 4.0, 2.0]})
+        result = MissingValuesHandler.impute(data, "mean", inplace=True)
+        self.assertIs(result, data)
+        self.assertEqual(data["A"].tolist(), [1.0, 2.0, 3.0])
+
+        data = pd.DataFrame({"A": [1.0, np.nan, 3.0], "classtype_v1": [2.0, 4.0, 2.0]})
+        result = MissingValuesHandler.impute(data, "mean")
+        self.assertIsNot(result, data)
+        self.assertTrue(np.isnan(data["A"].iloc[1]))
+
+    def test_impute_mode_ties(self):
+        # A parità di frequenza la moda è il valore più piccolo, come DataFrame.mode().iloc[0]
+        data = pd.DataFrame({"A": [3.0, 1.0, 3.0, 1.0, np.nan], "B": [5.0, np.nan, np.nan, np.nan, 2.0],
+                             "classtype_v1": [2.0] * 5})
+        result = MissingValuesHandler.impute(data, "mode")
+        self.assertEqual(result["A"].iloc[4], 1.0)
+        self.assertEqual(result["B"].tolist(), [5.0, 2.0, 2.0, 2.0, 2.0])
+
+    def test_imputer_matches_fill_methods(self):
+        # I valori memorizzati in fit coincidono con le statistiche dei metodi fill_missing_with_*
+        data = MissingValuesHandler.convert_numeric_columns(self.data.copy())
+        data["B"] = data["B"].astype("float32")
+        methods = {"mean": MissingValuesHandler.fill_missing_with_mean,
+                   "median": MissingValuesHandler.fill_missing_with_median,
+                   "mode": MissingValuesHandler.fill_missing_with_mode}
+        for strategy, method in methods.items():
+            with self.subTest(strategy=strategy):
+                imputer = MissingValuesStrategyManager.get_imputer(strategy).fit(data)
+                self.assertEqual(imputer.fill_values_.dtype, np.float64)
+                pd.testing.assert_frame_equal(imputer.transform(data), method(data))
+
+    def test_imputer_transform(self):
+        # transform usa i valori di fit su dati nuovi: DataFrame, singolo record o array NumPy
+        data = MissingValuesHandler.convert_numeric_columns(self.data.copy())
+        imputer = MissingValuesImputer("mean", exclude_columns=["classtype_v1"]).fit(data)
+        self.assertEqual(imputer.columns_.tolist(), ["A", "B", "C"])
+        fill_values = [7.0 / 3.0, 3.0, 25.0]
+        np.testing.assert_allclose(imputer.fill_values_, fill_values)
+
+        new_data = pd.DataFrame({"C": [np.nan, 1.0], "A": [np.nan, 2.0], "B": [5.0, np.nan],
+                                 "classtype_v1": [np.nan, 2.0]})
+        result = imputer.transform(new_data)
+        self.assertEqual(result["A"].tolist(), [fill_values[0], 2.0])
+        self.assertEqual(result["C"].tolist(), [25.0, 1.0])
+        self.assertTrue(np.isnan(result["classtype_v1"].iloc[0]))
+        self.assertTrue(np.isnan(new_data["A"].iloc[0]))
+        self.assertIs(imputer.transform(new_data, inplace=True), new_data)
+        self.assertEqual(new_data["B"].tolist(), [5.0, 3.0])
+
+        record = pd.Series({"classtype_v1": 2.0, "A": np.nan, "B": 1.0, "C": np.nan}, name=7)
+        filled = imputer.transform(record)
+        self.assertEqual(filled.tolist(), [2.0, fill_values[0], 1.0, 25.0])
+        self.assertEqual(filled.name, 7)
+        np.testing.assert_array_equal(imputer.transform(np.array([np.nan, 1.0, np.nan])), [fill_values[0], 1.0, 25.0])
+        values = np.array([[np.nan, np.nan, 0.0]], dtype="float32")
+        self.assertIs(imputer.transform(values, inplace=True), values)
+        self.assertEqual(values.tolist(), [[np.float32(fill_values[0]), 3.0, 0.0]])
+
+        with self.assertRaises(ValueError):
+            imputer.transform(new_data[["A", "B"]])
+        with self.assertRaises(ValueError):
+            imputer.transform(np.zeros(2))
+        with self.assertRaises(ValueError):
+            MissingValuesImputer("mean").transform(new_data)
+        with self.assertRaises(ValueError):
+            MissingValuesImputer("mean").fit(self.data)
+        with self.assertRaises(ValueError):
+            MissingValuesImputer("remove")
+
+    def test_imputer_partial_fit(self):
+        # In streaming i valori di riempimento coincidono con fit (la media a meno degli arrotondamenti)
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame(rng.integers(1, 11, size=(500, 3)).astype(float), columns=["A", "B", "classtype_v1"])
+        data = data.mask(rng.random(data.shape) < 0.1)
+        for strategy in ["mean", "median", "mode"]:
+            with self.subTest(strategy=strategy):
+                expected = MissingValuesImputer(strategy, ["classtype_v1"]).fit(data)
+                imputer = MissingValuesImputer(strategy, ["classtype_v1"])
+                for start in range(0, len(data), 120):
+                    imputer.partial_fit(data.iloc[start:start + 120])
+                self.assertEqual(imputer.columns_.tolist(), ["A", "B"])
+                np.testing.assert_allclose(imputer.fill_values_, expected.fill_values_, rtol=1e-12)
+                imputer.fit(data)
+                self.assertIsNone(imputer.statistics_)
+
+        with self.assertRaises(ValueError):
+            MissingValuesImputer("median").fit_from_statistics(
+                MissingValuesImputer("mode").partial_fit(data).statistics_)
+
+    def test_fill_missing_with_knn(self):
+        # Ogni valore mancante è la media dei k vicini tra le righe complete, con la distanza
+        # sulle sole feature osservate della riga (calcolo di riferimento riga per riga)
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame(rng.normal(size=(300, 4)), columns=list("ABCD"))
+        data = data.mask(rng.random(data.shape) < 0.15)
+        data.loc[5, :] = np.nan
+        data["D"] = data["D"].astype("float32")
+        data["classtype_v1"] = rng.choice([2.0, 4.0], size=300)
+
+        values = data[list("ABCD")].to_numpy(dtype=np.float64)
+        missing = np.isnan(values)
+        donors = values[~missing.any(axis=1)]
+        filled = values.copy()
+        for row in np.flatnonzero(missing.any(axis=1)):
+            observed = ~missing[row]
+            distances = np.sqrt(((donors[:, observed] - values[row, observed]) ** 2).sum(axis=1))
+            neighbors = np.lexsort((np.arange(len(donors)), distances))[:3] if observed.any() else slice(None)
+            filled[row, missing[row]] = donors[neighbors][:, missing[row]].mean(axis=0)
+        expected = data.copy()
+        for position, column in enumerate("ABCD"):
+            expected[column] = filled[:, position].astype(data[column].dtype)
+
+        result = MissingValuesHandler.fill_missing_with_knn(data, k=3)
+        pd.testing.assert_frame_equal(result, expected, rtol=1e-6)
+        self.assertEqual(result["D"].dtype, np.float32)
+        self.assertTrue(data["A"].isna().any())
+
+        # L'etichetta non entra nella distanza; impute rimuove prima le righe senza etichetta
+        relabeled = MissingValuesHandler.fill_missing_with_knn(data.assign(classtype_v1=100.0), k=3)
+        pd.testing.assert_frame_equal(relabeled.drop(columns="classtype_v1"), result.drop(columns="classtype_v1"))
+        data.loc[[0, 1], "classtype_v1"] = np.nan
+        filtered = MissingValuesHandler.remove_rows_with_missing_classtype(data)
+        pd.testing.assert_frame_equal(MissingValuesStrategyManager.handle_missing_values("knn", data.copy()),
+                                      MissingValuesHandler.fill_missing_with_knn(filtered))
+
+        with self.assertRaises(ValueError):
+            MissingValuesHandler.fill_missing_with_knn(data, k=0)
+        with self.assertRaises(ValueError):
+            MissingValuesHandler.fill_missing_with_knn(pd.DataFrame({"A": [np.nan, 1.0], "B": [1.0, np.nan]}))
+
     def test_invalid_strategy(self):
         with self.assertRaises(ValueError):
             MissingValuesStrategyManager.handle_missing_values("invalid", self.data)
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+import numpy as np
+from preprocessing import ParserFactory, ParseCache
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        # Dataset di esempio con colonne di tipi diversi alternate e una colonna di testo
+        self.data = pd.DataFrame({
+            "Sample code number": [1.0, 2.0, 2.0, np.nan, 5.0],
+            "A": [1.5, np.nan, 3.0, 4.0, 5.0],
+            "B": [1, 2, 3, 4, 5],
+            "C": ["1,0", "2.0", "2.0", None, "x"],
+            "D": [0.5, 0.25, 0.125, 1.0, 2.0],
+        })
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "data.csv")
+        self.data.to_csv(self.file_path, index=False)
+        self.cache = ParseCache(os.path.join(self.directory.name, "cache"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hit_and_miss(self):
+        # Il secondo parsing viene letto dalla cache e coincide con il parsing del file
+        expected = ParserFactory.get_parser(self.file_path).parse(self.file_path)
+        parser = ParserFactory.get_parser(self.file_path, cache=self.cache)
+        pd.testing.assert_frame_equal(parser.parse(self.file_path), expected)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+        cached = parser.parse(self.file_path)
+        pd.testing.assert_frame_equal(cached, expected)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertIn("1 hit, 1 miss", self.cache.report())
+
+        # La copia mappata si può modificare senza alterare la cache
+        cached.iloc[0, 0] = -1.0
+        pd.testing.assert_frame_equal(parser.parse(self.file_path), expected)
+
+        # Senza mappatura e con uno schema diverso (voce separata) il risultato è lo stesso del parser
+        unmapped = ParserFactory.get_parser(self.file_path, cache=ParseCache(self.cache.directory, mmap=False))
+        pd.testing.assert_frame_equal(unmapped.parse(self.file_path), expected)
+        typed = ParserFactory.get_parser(self.file_path, cache=self.cache, dtype="float32")
+        self.assertEqual(typed.parse(self.file_path)["A"].dtype, np.float32)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_invalidation(self):
+        # Un file modificato (data di modifica o dimensione diverse) viene letto di nuovo
+        parser = ParserFactory.get_parser(self.file_path, cache=self.cache)
+        parser.parse(self.file_path)
+        self.data.loc[0, "A"] = 100.0
+        self.data.to_csv(self.file_path, index=False)
+        stat = os.stat(self.file_path)
+        os.utime(self.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(parser.parse(self.file_path)["A"].iloc[0], 100.0)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 2))
+        self.assertEqual(len(os.listdir(self.cache.directory)), 1)
+
+    def test_existing_entry(self):
+        # Una voce aggiornata scritta da un altro processo viene mantenuta, una non aggiornata sostituita
+        parser = ParserFactory.get_parser(self.file_path)
+        data = parser.parse(self.file_path)
+        entry = self.cache._entry_path(parser, self.file_path)
+        source = self.cache._source(self.file_path)
+        self.assertTrue(self.cache._store(entry, source, data))
+        meta_path = os.path.join(entry, "meta.json")
+        written = os.stat(meta_path).st_ino
+        self.assertTrue(self.cache._store(entry, source, data.iloc[:2]))
+        self.assertEqual(os.stat(meta_path).st_ino, written)
+        pd.testing.assert_frame_equal(self.cache._load(entry, source), data)
+
+        outdated = dict(source, size=source["size"] + 1)
+        self.assertTrue(self.cache._store(entry, outdated, data.iloc[:2]))
+        pd.testing.assert_frame_equal(self.cache._load(entry, outdated), data.iloc[:2])
+        self.assertEqual(os.listdir(self.cache.directory), [os.path.basename(entry)])
+
+    def test_unsupported_columns(self):
+        # Le colonne di oggetti che non sono solo stringhe non vengono salvate: il file viene riletto
+        json_path = os.path.join(self.directory.name, "data.json")
+        self.data.assign(C=[1, "a", 2.5, None, "b"]).to_json(json_path)
+        parser = ParserFactory.get_parser(json_path, cache=self.cache)
+        first = parser.parse(json_path)
+        pd.testing.assert_frame_equal(parser.parse(json_path), first)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -97,5 +97,38 @@ class TestRandomSubsampling(unittest.TestCase):
             # Verifica che train e test non abbiano sovrapposizioni
             self.assertTrue(set(test_indices).isdisjoint(set(train_indices)))
 
+    def test_generate_splits_parallel_reproducible(self):
+        """
+        Testa che, a parità di random_state, la valutazione su più processi restituisca gli
+        stessi risultati, nello stesso ordine, di quella sequenziale.
+        """
+        sequential = RandomSubsampling(n_iter=6, test_size=0.4, random_state=42)
+        parallel = RandomSubsampling(n_iter=6, test_size=0.4, n_jobs=2, random_state=42)
+
+        self.assertEqual(parallel.generate_splits(self.data, self.labels),
+                         sequential.generate_splits(self.data, self.labels))
+
+    def test_generate_splits_invalid_n_jobs(self):
+        """
+        Testa che un valore non valido di n_jobs sollevi un'eccezione.
+        """
+        with self.assertRaises(ValueError):
+            RandomSubsampling(n_jobs=0)
+
+    def test_generate_splits_multiple_k(self):
+        """
+        Testa che una lista di valori di k produca, per ogni k, gli stessi risultati di una
+        valutazione separata con lo stesso random_state.
+        """
+        strategy = RandomSubsampling(n_iter=4, test_size=0.4, random_state=5)
+        results = strategy.generate_splits(self.data, self.labels, [1, 3, 2, 3])
+
+        self.assertEqual(list(results.keys()), [1, 3, 2])
+        for k, k_results in results.items():
+            self.assertEqual(k_results, strategy.generate_splits(self.data, self.labels, k))
+
+        with self.assertRaises(ValueError):
+            strategy.generate_splits(self.data, self.labels, [1, 0])
+
 if __name__ == "__main__":
     unittest.main()
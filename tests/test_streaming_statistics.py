@@ -0,0 +1,83 @@
+import unittest
+import pandas as pd
+import numpy as np
+from preprocessing import QuantileSketch, FrequentValuesSketch
+
+class TestStreamingStatistics(unittest.TestCase):
+
+    def setUp(self):
+        # Dataset di esempio con pochi valori distinti e valori mancanti, letto a blocchi
+        rng = np.random.default_rng(0)
+        self.data = pd.DataFrame(rng.integers(1, 11, size=(1001, 3)).astype(float), columns=["A", "B", "C"])
+        self.data = self.data.mask(rng.random(self.data.shape) < 0.1)
+        self.data["id"] = np.arange(len(self.data), dtype=float)
+        self.chunks = [self.data.iloc[start:start + 150] for start in range(0, len(self.data), 150)]
+
+    def test_quantile_sketch_exact(self):
+        # Con al più `compression` valori distinti mediana e quantili coincidono con pandas
+        sketch = QuantileSketch(["id"])
+        for chunk in self.chunks:
+            sketch.update(chunk)
+        self.assertTrue(sketch.exact.all())
+        expected = self.data[["A", "B", "C"]]
+        np.testing.assert_array_equal(sketch.median(), expected.median().to_numpy())
+        np.testing.assert_allclose(sketch.quantile(0.3), expected.quantile(0.3).to_numpy())
+
+        # L'unione di sketch calcolati su parti diverse (colonne in altro ordine) dà lo stesso risultato
+        merged = QuantileSketch(["id"]).update(self.data.iloc[:500]).merge(
+            QuantileSketch(["id"]).update(self.data.iloc[500:, ::-1]))
+        np.testing.assert_array_equal(merged.median(), sketch.median())
+
+    def test_quantile_sketch_compressed(self):
+        # Oltre la soglia di valori distinti il rango della stima resta entro l'errore documentato
+        rng = np.random.default_rng(1)
+        values = rng.exponential(size=50000)
+        data = pd.DataFrame({"x": values})
+        sketch = QuantileSketch(compression=100)
+        for start in range(0, len(values), 5000):
+            sketch.merge(QuantileSketch(compression=100).update(data.iloc[start:start + 5000]))
+        self.assertFalse(sketch.exact[0])
+        self.assertLessEqual(len(sketch.means[0]), 100)
+        self.assertEqual(sketch.count[0], len(values))
+        for q in [0.01, 0.5, 0.9]:
+            rank = (values < sketch.quantile(q)[0]).mean()
+            self.assertLess(abs(rank - q), np.pi / (2 * 100))
+        self.assertEqual(sketch.quantile(0)[0], values.min())
+        self.assertEqual(sketch.quantile(1)[0], values.max())
+
+    def test_frequent_values_sketch(self):
+        # Con al più `capacity` valori distinti la moda è esatta (il più piccolo a parità di frequenza)
+        sketch = FrequentValuesSketch(["id"])
+        for chunk in self.chunks:
+            sketch.update(chunk)
+        self.assertEqual(sketch.error.tolist(), [0, 0, 0])
+        np.testing.assert_array_equal(sketch.mode(), self.data[["A", "B", "C"]].mode().iloc[0].to_numpy())
+
+        # Un valore frequente tra molti valori distinti viene trovato con l'errore garantito
+        rng = np.random.default_rng(2)
+        values = np.concatenate([rng.permutation(20000), np.full(500, 7)]).astype(float)
+        data = pd.DataFrame({"x": rng.permutation(values)})
+        sketch = FrequentValuesSketch(capacity=20)
+        for start in range(0, len(data), 1000):
+            sketch.merge(FrequentValuesSketch(capacity=20).update(data.iloc[start:start + 1000]))
+        self.assertEqual(sketch.mode()[0], 7.0)
+        self.assertLessEqual(sketch.error[0], len(values) / 21)
+        self.assertLessEqual(len(sketch.values[0]), 20)
+        true_count = 501
+        estimate = sketch.counts[0][sketch.values[0] == 7.0][0]
+        self.assertTrue(true_count - sketch.error[0] <= estimate <= true_count)
+
+    def test_invalid_sketches(self):
+        with self.assertRaises(ValueError):
+            QuantileSketch(compression=1)
+        with self.assertRaises(ValueError):
+            FrequentValuesSketch(capacity=0)
+        with self.assertRaises(ValueError):
+            QuantileSketch().median()
+        with self.assertRaises(ValueError):
+            QuantileSketch().update(self.data).quantile(1.5)
+        with self.assertRaises(ValueError):
+            QuantileSketch().update(self.data).merge(QuantileSketch().update(self.data[["A"]]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,19 +1,33 @@
 import numpy as np
 import pandas as pd
-from models.knn import KNNClassifier
 from .validation_strategy import ValidationStrategy
 
 class Holdout(ValidationStrategy):
-    def __init__(self, test_size=0.2):
+    def __init__(self, test_size=0.2, n_jobs=1, random_state=None,
+                 precompute_distances=False, scaling=None):
         """
         Inizializza la strategia Holdout con una dimensione del set di test.
 
         Args:
             test_size (float): Percentuale del dataset da utilizzare come test (default 0.2).
+            n_jobs (int): Numero di processi per la valutazione degli split (default 1).
+            random_state (int, optional): Seme per la generazione degli split e dei pareggi.
+            precompute_distances (bool): Se True, calcola una sola volta le distanze tra tutti i
+                                         campioni e le riutilizza in ogni split (default False).
+            scaling (str, optional): Strategia di scaling ('normalize' o 'standardize') addestrata
+                                     sul training set di ogni split (default: nessuno scaling).
         """
         if not (0 < test_size <= 1):
             raise ValueError("test_size deve essere compreso tra 0 e 1.")
+        self._validate_parallel_params(n_jobs)
+        if not isinstance(precompute_distances, bool):
+            raise ValueError("precompute_distances deve essere un booleano.")
+        self._validate_scaling(scaling, precompute_distances)
         self.test_size = test_size
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.precompute_distances = precompute_distances
+        self.scaling = scaling
 
     def generate_splits(self, data: pd.DataFrame, labels: pd.Series, k=3) -> list[tuple[list[int], list[int]]]:
         n_samples = len(data)
@@ -22,21 +36,13 @@ class Holdout(ValidationStrategy):
             raise ValueError("Il set di training è vuoto. Riduci il valore di test_size.")
         
         # Shuffle del dataset
-        shuffled_indices = np.random.permutation(n_samples)
+        rng = np.random if self.random_state is None else np.random.default_rng(self.random_state)
+        shuffled_indices = rng.permutation(n_samples)
         test_indices = shuffled_indices[:n_test]
         train_indices = shuffled_indices[n_test:]
         
-        # Split
-        train_data, test_data = data.iloc[train_indices], data.iloc[test_indices]
-        train_labels, test_labels = labels.iloc[train_indices], labels.iloc[test_indices]
-        
-        # Addestramento e predizione
-        knn = KNNClassifier(k)
-        knn.fit(train_data, train_labels)
-        predictions = knn.predict_batch(test_data)
-        
-        # Costruisce la lista di tuple (y_real, y_pred)
-        results = [(test_labels.tolist(), predictions.tolist())]
+        # Addestramento e predizione: restituisce la lista di tuple (y_real, y_pred)
+        results = self._evaluate_splits(data, labels, k, [(train_indices, test_indices)])
 
         """Il primo elemento (test_labels.tolist()) è una lista delle etichette reali del set di test.
         Il secondo elemento (predictions.tolist()) è una lista delle etichette previste dal modello."""
@@ -1,23 +1,38 @@
 import numpy as np
 import pandas as pd
-from models.knn import KNNClassifier
 from .validation_strategy import ValidationStrategy
 
 class LeavePOutCV(ValidationStrategy):
-    def __init__(self, p=2, n_combinations=100):
+    def __init__(self, p=2, n_combinations=100, n_jobs=1, random_state=None,
+                 precompute_distances=False, scaling=None):
         """
         Inizializza la strategia Leave-P-Out Cross Validation con combinazioni casuali.
 
         Args:
             p (int): Numero di campioni da lasciare fuori ad ogni iterazione.
             n_combinations (int): Numero di combinazioni casuali da generare.
+            n_jobs (int): Numero di processi per la valutazione delle combinazioni; -1 usa
+                          tutti i core disponibili (default 1).
+            random_state (int, optional): Seme per la generazione delle combinazioni e dei pareggi.
+            precompute_distances (bool): Se True, calcola una sola volta le distanze tra tutti i
+                                         campioni e le riutilizza in ogni split (default False).
+            scaling (str, optional): Strategia di scaling ('normalize' o 'standardize') addestrata
+                                     sul training set di ogni split (default: nessuno scaling).
         """
         if p <= 0:
             raise ValueError("Il valore di 'p' deve essere positivo.")
         if n_combinations <= 0:
             raise ValueError("Il valore di 'n_combinations' deve essere positivo.")
+        self._validate_parallel_params(n_jobs)
+        if not isinstance(precompute_distances, bool):
+            raise ValueError("precompute_distances deve essere un booleano.")
+        self._validate_scaling(scaling, precompute_distances)
         self.p = p
         self.n_combinations = n_combinations
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.precompute_distances = precompute_distances
+        self.scaling = scaling
 
     def generate_splits(self, data: pd.DataFrame, labels: pd.Series, k=3) -> list[tuple[list[int], list[int]]]:
         n_samples = len(data)
@@ -29,26 +44,17 @@ class LeavePOutCV(ValidationStrategy):
         if self.p > n_samples:
             raise ValueError("Il valore di 'p' non può essere maggiore del numero totale di campioni nel dataset.")
 
-        results = []
-        rng = np.random.default_rng()  # Generatore di numeri casuali
+        if self.p == n_samples:  # Verifica che il training set non sia vuoto
+            raise ValueError("Il training set è vuoto. Riduci il valore di 'p'.")
+
+        splits = []
+        rng = np.random.default_rng(self.random_state)  # Generatore di numeri casuali
 
         for _ in range(self.n_combinations):
             # Genera una combinazione casuale di 'p' indici
             test_indices = rng.choice(n_samples, self.p, replace=False)
             train_indices = np.setdiff1d(np.arange(n_samples), test_indices)
+            splits.append((train_indices, test_indices))
 
-            # Split
-            train_data, test_data = data.iloc[train_indices], data.iloc[test_indices]
-            train_labels, test_labels = labels.iloc[train_indices], labels.iloc[test_indices]
-
-            # Addestramento e predizione
-            knn = KNNClassifier(k)
-            if train_data.empty:  # Verifica che il training set non sia vuoto
-                raise ValueError("Il training set è vuoto. Riduci il valore di 'p'.")
-            knn.fit(train_data, train_labels)
-            predictions = knn.predict_batch(test_data)
-
-            # Aggiungi la tupla (y_real, y_pred) alla lista dei risultati
-            results.append((test_labels.tolist(), predictions.tolist()))
-
-        return results
+        # Addestramento e predizione: una tupla (y_real, y_pred) per ogni combinazione
+        return self._evaluate_splits(data, labels, k, splits)
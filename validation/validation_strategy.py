@@ -1,8 +1,107 @@
+import os
+import random
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
+from models.knn import KNNClassifier
+from models.distance_cache import DistanceCache
+from models.neighbor_search import nearest_from_distances
+from preprocessing.feature_scaler import FeatureScalerStrategyManager
+
+# Dataset condiviso da ogni processo worker, impostato una sola volta all'avvio del processo
+_worker_dataset = None
+
+
+def _init_worker(data: pd.DataFrame, labels: pd.Series, cache: DistanceCache = None) -> None:
+    """
+    Memorizza il dataset nel processo worker, così che i singoli split ricevano solo gli indici.
+    """
+    global _worker_dataset
+    _worker_dataset = (data, labels, cache)
+
+
+def _evaluate_split_in_worker(task: tuple) -> tuple[list[int], list[int]]:
+    """
+    Valuta uno split nel processo worker usando il dataset condiviso.
+    """
+    data, labels, cache = _worker_dataset
+    return _evaluate_split(data, labels, *task, cache=cache)
+
+
+def _evaluate_split(data: pd.DataFrame, labels: pd.Series, train_indices: np.ndarray, test_indices: np.ndarray,
+                    k: int | list[int], seed: int = None, scaling: str = None,
+                    cache: DistanceCache = None) -> tuple | dict:
+    """
+    Addestra il KNN sul training set di uno split e predice le etichette del test set.
+
+    Con una lista di valori di k i vicini vengono cercati una sola volta fino al k massimo
+    e ogni valore di k usa i primi k. Il seme viene reimpostato prima del voto di ogni k,
+    così che i risultati coincidano con quelli di una valutazione separata per quel k.
+    Con `scaling` i parametri dello scaling vengono stimati sul solo training set dello split
+    e applicati anche al test set, senza usare le statistiche dei campioni di test.
+
+    Args:
+        data (pd.DataFrame): Le feature del dataset.
+        labels (pd.Series): Le etichette del dataset.
+        train_indices (np.ndarray): Posizioni dei campioni di training.
+        test_indices (np.ndarray): Posizioni dei campioni di test.
+        k (int | list[int]): Numero di Neighbors per il KNN, oppure lista di valori di k.
+        seed (int, optional): Seme per la scelta casuale in caso di pareggio tra le classi.
+        scaling (str, optional): Strategia di scaling ('normalize' o 'standardize') da
+                                 addestrare sul training set dello split.
+        cache (DistanceCache, optional): Distanze precalcolate tra tutti i campioni del dataset.
+
+    Returns:
+        tuple[list[int], list[int]] | dict[int, tuple[list[int], list[int]]]: La tupla
+            (y_real, y_pred) dello split, oppure una tupla per ogni valore di k.
+    """
+    train_data, test_data = data.iloc[train_indices], data.iloc[test_indices]
+    train_labels, test_labels = labels.iloc[train_indices], labels.iloc[test_indices]
+    if scaling is not None:
+        scaler = FeatureScalerStrategyManager.get_scaler(scaling).fit(train_data)
+        train_data, test_data = scaler.transform(train_data), scaler.transform(test_data)
+    ks = k if isinstance(k, list) else [k]
+
+    knn = KNNClassifier(max(ks))
+    knn.fit(train_data, train_labels)
+    if cache is None:
+        distances, neighbors = knn.kneighbors(test_data)
+    else:
+        # Le righe del test set vengono lette dalla cache, mascherando le colonne di test
+        distances, neighbors = nearest_from_distances(cache.distances(test_indices, train_indices), max(ks))
+
+    y_real = test_labels.tolist()
+    results = {}
+    for value in ks:
+        if seed is not None:
+            random.seed(seed)
+        predictions = knn.predict_from_neighbors(neighbors[:, :value], test_data.index, distances[:, :value])
+        results[value] = (y_real, predictions.tolist())
+    return results if isinstance(k, list) else results[k]
+
 
 class ValidationStrategy(ABC):
+    """
+    Classe base delle strategie di validazione.
+
+    Le sottoclassi generano le coppie (train_indices, test_indices) e delegano a
+    `_evaluate_splits` l'addestramento e la predizione, che con `n_jobs > 1` vengono
+    distribuiti su più processi. Con `random_state` impostato sia gli split sia la scelta
+    casuale in caso di pareggio sono riproducibili, indipendentemente da `n_jobs`.
+
+    Con `precompute_distances` le distanze tra tutte le coppie di campioni vengono calcolate
+    una sola volta per dataset e ogni split legge dalla cache le righe del proprio test set.
+
+    Con `scaling` lo scaling delle feature viene addestrato sul training set di ogni split,
+    così che le statistiche del test set non influenzino la valutazione.
+    """
+    n_jobs = 1
+    random_state = None
+    precompute_distances = False
+    scaling = None
+    _distance_cache = None
+
     @abstractmethod
     def generate_splits(self, data: pd.DataFrame, labels: pd.Series, k:int) -> list[tuple[list[int], list[int]]]:
         """
@@ -12,9 +111,118 @@ class ValidationStrategy(ABC):
         Args:
             data (pd.DataFrame): Le feature del dataset.
             labels (pd.Series): Le etichette del dataset.
-            k (int): Numero di Neighbors per il KNN.
+            k (int | list[int]): Numero di Neighbors per il KNN, oppure lista di valori di k
+                                 da valutare con una sola ricerca dei vicini per split.
 
         Returns:
-            list[tuple[list[int], list[int]]]: Lista delle tuple (predizioni, etichette reali).
+            list[tuple[list[int], list[int]]]: Lista delle tuple (predizioni, etichette reali);
+                con una lista di valori di k, un dizionario con una lista per ogni k.
         """
         pass
+
+    @staticmethod
+    def _validate_ks(k: int | list[int]) -> int | list[int]:
+        """
+        Verifica il valore di k oppure la lista di valori di k da valutare, rimuovendo i
+        duplicati dalla lista e mantenendone l'ordine.
+
+        Args:
+            k (int | list[int]): Numero di Neighbors, oppure lista di valori di k.
+
+        Returns:
+            int | list[int]: Il valore di k oppure la lista dei valori distinti.
+        """
+        if not isinstance(k, (list, tuple, range)):
+            return k
+        ks = list(dict.fromkeys(k))
+        if not ks or any(isinstance(value, bool) or not isinstance(value, (int, np.integer)) or value <= 0 for value in ks):
+            raise ValueError("I valori di k devono essere interi positivi.")
+        return [int(value) for value in ks]
+
+    @staticmethod
+    def _validate_parallel_params(n_jobs: int) -> None:
+        """
+        Verifica il numero di processi richiesto.
+
+        Args:
+            n_jobs (int): Numero di processi; -1 usa tutti i core disponibili.
+        """
+        if not isinstance(n_jobs, int) or n_jobs == 0 or n_jobs < -1:
+            raise ValueError("n_jobs deve essere un intero positivo oppure -1.")
+
+    @staticmethod
+    def _validate_scaling(scaling: str, precompute_distances: bool) -> None:
+        """
+        Verifica la strategia di scaling per split.
+
+        Args:
+            scaling (str): Strategia di scaling ('normalize', 'standardize') oppure None.
+            precompute_distances (bool): Se le distanze vengono precalcolate sul dataset.
+        """
+        if scaling not in (None, 'normalize', 'standardize'):
+            raise ValueError("Strategia di scaling non valida. Scegli tra 'normalize' o 'standardize'.")
+        if scaling is not None and precompute_distances:
+            # Le distanze precalcolate si riferiscono alle feature non scalate
+            raise ValueError("Lo scaling per split non è compatibile con precompute_distances.")
+
+    def _evaluate_splits(self, data: pd.DataFrame, labels: pd.Series, k: int | list[int],
+                         splits: list[tuple[np.ndarray, np.ndarray]]) -> list[tuple] | dict[int, list[tuple]]:
+        """
+        Addestra e valuta il KNN su ogni split, in sequenza o su un pool di processi.
+
+        Il dataset viene inviato una sola volta a ogni processo; i singoli split ricevono solo
+        gli indici. I risultati vengono restituiti nell'ordine degli split.
+
+        Args:
+            data (pd.DataFrame): Le feature del dataset.
+            labels (pd.Series): Le etichette del dataset.
+            k (int | list[int]): Numero di Neighbors per il KNN, oppure lista di valori di k
+                                 valutati con una sola ricerca dei vicini per split.
+            splits (list[tuple[np.ndarray, np.ndarray]]): Coppie (train_indices, test_indices).
+
+        Returns:
+            list[tuple[list[int], list[int]]] | dict[int, list[tuple[list[int], list[int]]]]:
+                Lista delle tuple (y_real, y_pred), oppure una lista per ogni valore di k.
+        """
+        k = self._validate_ks(k)
+        results = self._run_splits(data, labels, k, splits)
+        if not isinstance(k, list):
+            return results
+        return {value: [split_results[value] for split_results in results] for value in k}
+
+    def _run_splits(self, data: pd.DataFrame, labels: pd.Series, k: int | list[int],
+                    splits: list[tuple[np.ndarray, np.ndarray]]) -> list:
+        """
+        Esegue `_evaluate_split` su ogni split, in sequenza o su un pool di processi.
+        """
+        if self.random_state is None:
+            seeds = [None] * len(splits)
+        else:
+            # Un seme per split, derivato da random_state, rende i pareggi riproducibili
+            seeds = np.random.SeedSequence(self.random_state).generate_state(len(splits)).tolist()
+        tasks = [(train_indices, test_indices, k, seed, self.scaling) for (train_indices, test_indices), seed in zip(splits, seeds)]
+        cache = self._get_distance_cache(data) if self.precompute_distances else None
+
+        n_jobs = (os.cpu_count() or 1) if self.n_jobs == -1 else self.n_jobs
+        if n_jobs == 1 or len(tasks) <= 1:
+            return [_evaluate_split(data, labels, *task, cache=cache) for task in tasks]
+
+        chunksize = max(1, len(tasks) // (4 * n_jobs))
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(data, labels, cache)) as executor:
+            return list(executor.map(_evaluate_split_in_worker, tasks, chunksize=chunksize))
+
+    def _get_distance_cache(self, data: pd.DataFrame) -> DistanceCache:
+        """
+        Restituisce la cache delle distanze del dataset, calcolandola solo alla prima
+        chiamata o quando il dataset cambia.
+
+        Args:
+            data (pd.DataFrame): Le feature del dataset.
+
+        Returns:
+            DistanceCache: Distanze tra tutte le coppie di campioni.
+        """
+        if self._distance_cache is None or self._distance_cache[0] is not data:
+            self._distance_cache = (data, DistanceCache(data.to_numpy(dtype=np.float64)))
+        return self._distance_cache[1]